@@ -7,10 +7,24 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# só processos do servidor agendam o clinch após recálculos (comandos não)
+from tournaments.services.clinch import serve_precompute  # noqa: E402
+
+serve_precompute()
+
+
+async def application(scope, receive, send):
+    # no ASGI as filas de recálculo e de clinch rodam como tasks no loop do servidor
+    from tournaments.services.scheduler import use_asyncio
+
+    use_asyncio(asyncio.get_running_loop())
+    await django_application(scope, receive, send)
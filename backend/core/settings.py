@@ -34,6 +34,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "tournaments.middleware.RequestMetricsMiddleware",  # só ativo com TOURNAMENTS_METRICS
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -78,11 +79,60 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # DRF & OpenAPI
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson quando instalado (cai no JSONRenderer padrão sem ele)
+    "DEFAULT_RENDERER_CLASSES": [
+        "tournaments.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 SPECTACULAR_SETTINGS = {
     "TITLE": "Organizador de Torneios API",
     "VERSION": "0.1.0",
 }
 
+# Ranking: backend de agregação dos grupos ("python" ou "numpy")
+TOURNAMENTS_AGG_BACKEND = os.getenv("TOURNAMENTS_AGG_BACKEND", "python")
+
+# Cache (locmem em dev/testes; em prod apontar para Redis/Memcached)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "tournaments"),
+    }
+}
+# tabelas de grupo: LRU local por processo (TTL curto) na frente do cache do Django
+TOURNAMENTS_TABLE_CACHE = {
+    "LOCAL_MAX_BYTES": int(os.getenv("TOURNAMENTS_TABLE_CACHE_LOCAL_MAX_BYTES", 8 * 1024 * 1024)),
+    "LOCAL_TTL": float(os.getenv("TOURNAMENTS_TABLE_CACHE_LOCAL_TTL", "5")),  # segundos; 0 desliga o LRU
+    "TIMEOUT": int(os.getenv("TOURNAMENTS_TABLE_CACHE_TIMEOUT", 300)),
+}
+
+# Fila de recálculo com debounce (reports enfileiram o grupo em vez de recalcular na hora)
+TOURNAMENTS_RECALC_QUEUE = {
+    "ENABLED": os.getenv("TOURNAMENTS_RECALC_QUEUE", "False").lower() == "true",
+    "DEBOUNCE": float(os.getenv("TOURNAMENTS_RECALC_DEBOUNCE", "2.0")),  # segundos
+    "WORKERS": int(os.getenv("TOURNAMENTS_RECALC_WORKERS", "4")),        # só no modo WSGI (threads)
+}
+
+# Classificação matemática (clinch): calculada em segundo plano na primeira leitura de cada
+# versão do grupo; com PRECOMPUTE, também logo após cada recálculo (só nos processos do servidor)
+TOURNAMENTS_CLINCH = {
+    "PRECOMPUTE": os.getenv("TOURNAMENTS_CLINCH_PRECOMPUTE", "False").lower() == "true",
+    "DEBOUNCE": float(os.getenv("TOURNAMENTS_CLINCH_DEBOUNCE", "1.0")),  # segundos
+    "WORKERS": int(os.getenv("TOURNAMENTS_CLINCH_WORKERS", "1")),        # só no modo WSGI (threads)
+}
+
+# Standings ao vivo (SSE): eventos pendentes por conexão antes de pedir resync
+TOURNAMENTS_LIVE_BACKLOG = int(os.getenv("TOURNAMENTS_LIVE_BACKLOG", "64"))
+# eventos de outros processos (WSGI, recalc_all, admin) via cache do Django; exige Redis/Memcached.
+# Desligado, só recálculos feitos no próprio processo ASGI chegam às conexões.
+TOURNAMENTS_LIVE_SHARED = os.getenv("TOURNAMENTS_LIVE_SHARED", "False").lower() == "true"
+TOURNAMENTS_LIVE_POLL = float(os.getenv("TOURNAMENTS_LIVE_POLL", "0.5"))  # segundos
+
+# Métricas (histogramas por modalidade/rota) expostas em /metrics no formato do Prometheus
+TOURNAMENTS_METRICS = {
+    "ENABLED": os.getenv("TOURNAMENTS_METRICS", "False").lower() == "true",
+}
+
 # CORS (liberado em dev; em prod vamos restringir)
 CORS_ALLOW_ALL_ORIGINS = True
@@ -1,14 +1,21 @@
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from tournaments.services import metrics
 
 def healthz(_):
     return JsonResponse({"status": "ok"})
 
+def metrics_view(_):
+    if not metrics.enabled():
+        raise Http404
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("healthz/", healthz),
+    path("metrics", metrics_view),
     path("api/", include("tournaments.api")),  # criaremos a seguir
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="docs"),
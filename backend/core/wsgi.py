@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# só processos do servidor agendam o clinch após recálculos (comandos não)
+from tournaments.services.clinch import serve_precompute  # noqa: E402
+
+serve_precompute()
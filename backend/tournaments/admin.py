@@ -1,37 +1,238 @@
-from django.contrib import admin
-from .models import Tournament, Group, Team, Enrollment, Match, Standing
+from django import forms
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.utils.functional import cached_property
+from .modalities.schema import ReportValidationError
+from .models import Tournament, Group, Team, Enrollment, Match, MatchStatus, Standing, LeaderboardEntry
+from .services.ranking import compile_tournament_ruleset
+from .services.recalc import apply_match_delta, recalc_group_standings, recalc_tournament_standings
+from .services.report import (
+    REPORT_FIELDS,
+    previous_state,
+    recalc_reported_groups,
+    report_match,
+    unreport_match,
+    wo_indices,
+)
+from .services.scheduler import queue_enabled
 
+# -----------------------------
+# Escala: contagem estimada, filtro de grupo por torneio
+# -----------------------------
+ESTIMATE_ABOVE = 10_000
+
+class EstimatedCountPaginator(Paginator):
+    """Changelist sem filtros em tabela grande: usa a estimativa do Postgres (pg_class)
+    em vez de COUNT(*), que varre a tabela inteira."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where and connection.vendor == "postgresql":
+            with connection.cursor() as cur:
+                cur.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                            [self.object_list.model._meta.db_table])
+                row = cur.fetchone()
+            if row and row[0] > ESTIMATE_ABOVE:
+                return row[0]
+        return super().count
+
+class GroupOfTournamentFilter(admin.SimpleListFilter):
+    """Filtro por grupo que só lista os grupos do torneio já filtrado (evita listar todos)."""
+    title = "grupo"
+    parameter_name = "group"
+
+    def lookups(self, request, model_admin):
+        tournament_id = request.GET.get("tournament__id__exact")
+        if not tournament_id:
+            return []
+        return list(Group.objects.filter(tournament_id=tournament_id).values_list("id", "code"))
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(group_id=self.value())
+        return queryset
+
+class ScaledAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # evita o COUNT(*) extra do "N resultados (M no total)"
+    list_per_page = 50
+
+# -----------------------------
+# Ações em lote
+# -----------------------------
+def _recalc_groups(modeladmin, request, groups):
+    done, failed = 0, []
+    for group in groups:
+        try:
+            with transaction.atomic():
+                recalc_group_standings(group.tournament, group)
+            done += 1
+        except ValueError as exc:
+            failed.append(f"{group}: {exc}")
+    modeladmin.message_user(request, f"{done} grupo(s) recalculado(s).")
+    for msg in failed[:10]:
+        modeladmin.message_user(request, msg, level=messages.ERROR)
+
+def _apply_in_bulk(modeladmin, request, matches, change, label):
+    # `change(match)` altera a partida sem salvar; grava em lote e aplica os deltas por grupo
+    changes = []
+    for match in matches:
+        previous = previous_state(match)
+        change(match)
+        changes.append((match, previous))
+    with transaction.atomic():
+        Match.objects.bulk_update(matches, REPORT_FIELDS, batch_size=500)
+        result = recalc_reported_groups(changes)
+    groups = len(result["groups_recalculated"]) + len(result["groups_queued"])
+    modeladmin.message_user(request, f"{len(matches)} {label}; {groups} grupo(s) atualizado(s).")
+    for err in result["recalc_errors"][:10]:
+        modeladmin.message_user(request, f"Grupo {err['group_id']}: {err['error']}", level=messages.ERROR)
+
+def _report_wo(modeladmin, request, queryset, winner):
+    matches = list(queryset.select_related("tournament", "group").filter(status=MatchStatus.PENDING))
+    _apply_in_bulk(
+        modeladmin, request, matches,
+        lambda m: report_match(m, wo_indices(m.tournament.modality, winner), is_wo=True, save=False),
+        "WO(s) reportado(s)",
+    )
+
+# -----------------------------
+# Admins
+# -----------------------------
 @admin.register(Tournament)
 class TournamentAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "modality", "groups_count", "teams_per_group", "advance_per_group", "status")
     list_filter = ("modality", "status")
     search_fields = ("name",)
+    actions = ["recalc_standings"]
+
+    @admin.action(description="Recalcular standings dos torneios selecionados")
+    def recalc_standings(self, request, queryset):
+        done, failed = 0, []
+        for tournament in queryset:
+            try:
+                recalc_tournament_standings(tournament)
+                done += 1
+            except ValueError as exc:
+                failed.append(f"{tournament}: {exc}")
+        self.message_user(request, f"{done} torneio(s) recalculado(s).")
+        for msg in failed[:10]:
+            self.message_user(request, msg, level=messages.ERROR)
 
 @admin.register(Group)
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(ScaledAdmin):
     list_display = ("id", "tournament", "code")
-    list_filter = ("tournament",)
-    search_fields = ("code",)
+    list_filter = ("tournament", "tournament__modality")
+    list_select_related = ("tournament",)
+    search_fields = ("code", "tournament__name")
+    autocomplete_fields = ("tournament",)
+    actions = ["recalc_standings"]
+
+    @admin.action(description="Recalcular standings dos grupos selecionados")
+    def recalc_standings(self, request, queryset):
+        _recalc_groups(self, request, queryset.select_related("tournament"))
 
 @admin.register(Team)
-class TeamAdmin(admin.ModelAdmin):
+class TeamAdmin(ScaledAdmin):
     list_display = ("id", "name")
     search_fields = ("name",)
+    ordering = ("name",)  # autocomplete pagina pela ordem (name é unique/indexado)
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(ScaledAdmin):
     list_display = ("id", "tournament", "team", "group")
-    list_filter = ("tournament", "group")
+    list_filter = ("tournament", GroupOfTournamentFilter)
+    list_select_related = ("tournament", "team", "group__tournament")
     search_fields = ("team__name",)
+    autocomplete_fields = ("tournament", "team", "group")
+
+class MatchAdminForm(forms.ModelForm):
+    class Meta:
+        model = Match
+        fields = "__all__"
+
+    def clean(self):
+        # report inválido vira erro no campo, em vez de 500 no recálculo do save_model
+        cleaned = super().clean()
+        tournament = cleaned.get("tournament")
+        if tournament is None or cleaned.get("status") != MatchStatus.REPORTED:
+            return cleaned
+        try:
+            compile_tournament_ruleset(tournament).normalize(cleaned.get("indices") or {})
+        except ReportValidationError as exc:
+            for err in exc.errors:
+                self.add_error("indices", err.message)
+        except ValueError as exc:
+            self.add_error("indices", str(exc))
+        return cleaned
 
 @admin.register(Match)
-class MatchAdmin(admin.ModelAdmin):
+class MatchAdmin(ScaledAdmin):
+    form = MatchAdminForm
     list_display = ("id", "tournament", "group", "home_team", "away_team", "status", "is_wo")
-    list_filter = ("tournament", "group", "status", "is_wo")
+    list_filter = ("tournament", GroupOfTournamentFilter, "status", "is_wo")
+    list_select_related = ("tournament", "group__tournament", "home_team", "away_team")
     search_fields = ("home_team__name", "away_team__name")
+    autocomplete_fields = ("tournament", "group", "home_team", "away_team")
+    actions = ["report_wo_home", "report_wo_away", "unreport", "recalc_groups"]
+
+    def save_model(self, request, obj, form, change):
+        # correção pelo formulário: desfaz a versão gravada e aplica a nova (caminho incremental)
+        previous = Match.objects.select_related("group").filter(pk=obj.pk).first() if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if queue_enabled():  # com a fila, o post_save já enfileirou o grupo
+                return
+            try:
+                with transaction.atomic():
+                    if previous is not None and previous.group_id != obj.group_id:
+                        # partida mudou de grupo: os dois grupos são refeitos por completo
+                        recalc_group_standings(obj.tournament, previous.group)
+                        recalc_group_standings(obj.tournament, obj.group)
+                    else:
+                        apply_match_delta(obj, previous)
+            except ValueError as exc:
+                # outra partida do grupo com report inválido: a edição fica, a tabela não
+                self.message_user(request, f"Standings não atualizados: {exc}", level=messages.ERROR)
+
+    @admin.action(description="Reportar WO (vitória do mandante) nas partidas pendentes selecionadas")
+    def report_wo_home(self, request, queryset):
+        _report_wo(self, request, queryset, "home")
+
+    @admin.action(description="Reportar WO (vitória do visitante) nas partidas pendentes selecionadas")
+    def report_wo_away(self, request, queryset):
+        _report_wo(self, request, queryset, "away")
+
+    @admin.action(description="Desfazer o report (voltar para pendente) das partidas selecionadas")
+    def unreport(self, request, queryset):
+        matches = list(queryset.select_related("tournament", "group").filter(status=MatchStatus.REPORTED))
+        _apply_in_bulk(self, request, matches, lambda m: unreport_match(m, save=False), "report(s) desfeito(s)")
+
+    @admin.action(description="Recalcular standings dos grupos das partidas selecionadas")
+    def recalc_groups(self, request, queryset):
+        groups = Group.objects.filter(id__in=queryset.values("group_id")).select_related("tournament")
+        _recalc_groups(self, request, groups)
 
 @admin.register(Standing)
-class StandingAdmin(admin.ModelAdmin):
+class StandingAdmin(ScaledAdmin):
     list_display = ("id", "tournament", "group", "team", "order_rank")
-    list_filter = ("tournament", "group")
+    list_filter = ("tournament", GroupOfTournamentFilter)
+    list_select_related = ("tournament", "group__tournament", "team")
+    search_fields = ("team__name",)
+    raw_id_fields = ("tournament", "group", "team")
+    actions = ["recalc_groups"]
+
+    @admin.action(description="Recalcular standings dos grupos selecionados")
+    def recalc_groups(self, request, queryset):
+        groups = Group.objects.filter(id__in=queryset.values("group_id")).select_related("tournament")
+        _recalc_groups(self, request, groups)
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(ScaledAdmin):
+    list_display = ("id", "tournament", "overall_rank", "team", "group", "points", "penalty_points")
+    list_filter = ("tournament",)
+    list_select_related = ("tournament", "team", "group__tournament")
     search_fields = ("team__name",)
+    raw_id_fields = ("tournament", "group", "team")
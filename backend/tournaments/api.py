@@ -1,9 +1,351 @@
-from django.urls import path
-from django.http import JsonResponse
+import codecs
+import json
+from dataclasses import asdict
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.urls import include, path
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+from rest_framework.decorators import api_view, permission_classes
+
+from .models import Group, Match, Tournament
+from .permissions import staff_with_perms
+from .services.cache import cached_group_value, get_group_standings, group_version
+from .services.clinch import get_group_clinch
+from .services.importer import FORMATS, KINDS, import_records
+from .services.leaderboard import get_leaderboard
+from .services.qualification import get_qualification
+from .services.ranking import compile_tournament_ruleset
+from .services.report import REPORT_FIELDS, previous_state, recalc_reported_groups, report_match
+from .services.simulation import simulate_group
+from .views import EnrollmentList, GroupList, MatchList, StandingList, TournamentList
+
+MAX_BATCH_REPORTS = 1000
+# a simulação roda no request: só combinações fixas (cada uma cacheada por versão do grupo).
+# Mais amostras ou outro rating, use o comando simulate_group.
+SIMULATION_SAMPLES = ("1000", "10000")
+SIMULATION_RATING_KEYS = ("rating",)  # chaves de Team.meta aceitas (mesmo padrão do sorteio)
 
 def ping(_):
     return JsonResponse({"pong": True})
 
+def _error(index, match_id, message, fields=None):
+    error = {"index": index, "match_id": match_id, "error": message}
+    if fields:  # erros por campo do indices_schema (ReportValidationError)
+        error["fields"] = [f._asdict() for f in fields]
+    return error
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+@api_view(["POST"])
+@permission_classes([staff_with_perms("tournaments.change_match")])
+def report_batch(request):
+    """Reporta várias partidas de uma vez (staff com permissão de alterar partidas).
+
+    Corpo: {"reports": [{"match_id": 1, "indices": {...}, "is_wo": false}, ...]};
+    match_id inteiro e is_wo true/false (opcional), sem conversões.
+    Itens inválidos voltam em "errors" sem desfazer os válidos; os válidos são
+    gravados com um único bulk_update e cada grupo afetado é recalculado uma vez
+    (na hora, ou enfileirado se a fila de recálculo estiver habilitada).
+    """
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "JSON inválido"}, status=400)
+    reports = payload.get("reports") if isinstance(payload, dict) else None
+    if not isinstance(reports, list):
+        return JsonResponse({"detail": "esperado {\"reports\": [...]}"}, status=400)
+    if len(reports) > MAX_BATCH_REPORTS:
+        return JsonResponse({"detail": f"máximo de {MAX_BATCH_REPORTS} reports por lote"}, status=400)
+
+    ids = [r.get("match_id") for r in reports if isinstance(r, dict)]
+    matches = Match.objects.select_related("tournament", "group").in_bulk([i for i in ids if _is_id(i)])
+
+    errors, valid, seen = [], {}, set()
+    for index, item in enumerate(reports):
+        match_id = item.get("match_id") if isinstance(item, dict) else None
+        if not isinstance(item, dict) or not _is_id(match_id) or not isinstance(item.get("indices"), dict):
+            errors.append(_error(index, match_id, "item precisa de match_id (inteiro) e indices (objeto)"))
+            continue
+        is_wo = item.get("is_wo", False)
+        if not isinstance(is_wo, bool):
+            errors.append(_error(index, match_id, "is_wo deve ser true/false"))
+            continue
+        match = matches.get(match_id)
+        if match is None:
+            errors.append(_error(index, match_id, "partida não encontrada"))
+            continue
+        if match_id in seen:
+            errors.append(_error(index, match_id, "partida repetida no lote"))
+            continue
+        seen.add(match_id)
+        t = match.tournament
+        previous = previous_state(match)  # correção: o caminho incremental desfaz o report antigo
+        try:
+            # validadores da modalidade (via ruleset compilado) + colunas derivadas
+            report_match(match, item["indices"], is_wo,
+                         rules=compile_tournament_ruleset(t), save=False)
+        except ValueError as exc:
+            errors.append(_error(index, match_id, str(exc), getattr(exc, "errors", None)))
+            continue
+        valid[match_id] = (match, previous)
+
+    with transaction.atomic():
+        Match.objects.bulk_update([m for m, _ in valid.values()], REPORT_FIELDS, batch_size=500)
+        recalc = recalc_reported_groups(valid.values())
+
+    return JsonResponse({"updated": len(valid), "errors": errors, **recalc})
+
+@api_view(["POST"])
+@permission_classes([staff_with_perms("tournaments.add_team", "tournaments.add_enrollment", "tournaments.add_match")])
+def import_upload(request):
+    """Importa um arquivo enviado em `file` (multipart). Query: ?format=csv|ndjson&kind=...
+
+    Só staff com permissão de criar times, inscrições e partidas.
+
+    O upload é lido linha a linha (sem carregar tudo em memória).
+    """
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"detail": "envie o arquivo no campo 'file'"}, status=400)
+    fmt = request.GET.get("format") or ("ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv")
+    kind = request.GET.get("kind") or None
+    if fmt not in FORMATS or (kind is not None and kind not in KINDS):
+        return JsonResponse({"detail": "format/kind inválidos"}, status=400)
+    try:
+        # utf-8-sig: planilhas exportadas com BOM não corrompem o primeiro cabeçalho
+        result = import_records(codecs.iterdecode(upload, "utf-8-sig"), fmt, kind)
+    except (ValueError, UnicodeDecodeError) as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+    return JsonResponse({
+        "read": result.read,
+        "written": result.written,
+        "skipped": result.skipped,
+        "errors": result.errors,
+    })
+
+# -----------------------------
+# Leitura com GET condicional (ETag/Last-Modified -> 304)
+# -----------------------------
+# Os validadores saem de uma consulta barata (versão do grupo no cache, ou
+# updated_at) e são conferidos antes de montar o payload; em 304 nada é serializado.
+
+def _revalidate(response):
+    # clientes/CDN podem guardar, mas sempre revalidam com If-None-Match
+    patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
+
+def _tournament_head(request, tournament_id):
+    if not hasattr(request, "_tournament_head"):
+        request._tournament_head = (
+            Tournament.objects.filter(pk=tournament_id)
+            .annotate(n_groups=Count("groups"), last_group=Max("groups__id"))
+            .values_list("updated_at", "n_groups", "last_group").first()
+        )
+    return request._tournament_head
+
+def _tournament_etag(request, tournament_id):
+    head = _tournament_head(request, tournament_id)
+    return head and f"t{tournament_id}.{head[0].timestamp()}.{head[1]}.{head[2]}"
+
+def _tournament_modified(request, tournament_id):
+    head = _tournament_head(request, tournament_id)
+    return head and head[0]
+
+@require_safe
+@condition(etag_func=_tournament_etag, last_modified_func=_tournament_modified)
+def tournament_detail(request, tournament_id):
+    t = Tournament.objects.filter(pk=tournament_id).first()
+    if t is None:
+        raise Http404
+    return _revalidate(JsonResponse({
+        "id": t.id,
+        "name": t.name,
+        "modality": t.modality,
+        "status": t.status,
+        "groups_count": t.groups_count,
+        "teams_per_group": t.teams_per_group,
+        "advance_per_group": t.advance_per_group,
+        "ruleset": t.ruleset,
+        "groups": list(t.groups.values("id", "code")),
+        "updated_at": t.updated_at,
+    }))
+
+def _group(request, group_id):
+    if not hasattr(request, "_group"):
+        request._group = Group.objects.select_related("tournament").filter(pk=group_id).first()
+    return request._group
+
+def _group_etag(kind):
+    # partidas, inscrições e standings incrementam a versão do grupo (ver signals.py)
+    def etag(request, group_id):
+        group = _group(request, group_id)
+        return group and f"g{group_id}.{kind}.{group_version(group.tournament_id, group_id)}"
+    return etag
+
+def _group_view(kind, load):
+    @require_safe
+    @condition(etag_func=_group_etag(kind))
+    def view(request, group_id):
+        group = _group(request, group_id)
+        if group is None:
+            raise Http404
+        return _revalidate(JsonResponse(load(group), safe=False))
+    return view
+
+def _group_payload(group):
+    def load():
+        teams = group.enrollments.order_by("team_id").values_list("team_id", "team__name")
+        return {
+            "id": group.id,
+            "tournament_id": group.tournament_id,
+            "code": group.code,
+            "teams": [{"id": tid, "name": name} for tid, name in teams],
+        }
+    return cached_group_value("group", group.tournament_id, group.id, load)
+
+def _match_dict(m):
+    return {
+        "id": m.id,
+        "tournament_id": m.tournament_id,
+        "group_id": m.group_id,
+        "home_team_id": m.home_team_id,
+        "away_team_id": m.away_team_id,
+        "scheduled_at": m.scheduled_at.isoformat() if m.scheduled_at else None,
+        "status": m.status,
+        "is_wo": m.is_wo,
+        "result": m.result,
+        "indices": m.indices,
+        "updated_at": m.updated_at.isoformat(),
+    }
+
+def _group_matches(group):
+    def load():
+        return [_match_dict(m) for m in group.matches.order_by("scheduled_at", "id")]
+    return cached_group_value("matches", group.tournament_id, group.id, load)
+
+def _group_standings(group):
+    return get_group_standings(group.tournament, group.id)
+
+group_detail = _group_view("group", _group_payload)
+group_matches = _group_view("matches", _group_matches)
+group_standings = _group_view("standings", _group_standings)
+# classificado/eliminado matematicamente (badges da tabela). Nunca calcula no
+# request: só a versão atual leva ETag; em miss serve o último resultado (stale)
+# ou 202 enquanto o primeiro cálculo do grupo não termina.
+def _clinch(request, group_id):
+    if not hasattr(request, "_clinch"):
+        group = _group(request, group_id)
+        request._clinch = group and get_group_clinch(group.tournament, group)
+    return request._clinch
+
+def _clinch_etag(request, group_id):
+    found = _clinch(request, group_id)
+    if found is None or not found[1]:
+        return None
+    return _group_etag("clinch")(request, group_id)
+
+@require_safe
+@condition(etag_func=_clinch_etag)
+def group_clinch(request, group_id):
+    found = _clinch(request, group_id)
+    if found is None:
+        raise Http404
+    value, fresh = found
+    if value is None:
+        response = JsonResponse({"pending": True}, status=202)
+        response["Retry-After"] = "1"
+        return response
+    return _revalidate(JsonResponse({**value, "stale": not fresh}))
+
+def _match_modified(request, match_id):
+    if not hasattr(request, "_match_modified"):
+        request._match_modified = Match.objects.filter(pk=match_id).values_list("updated_at", flat=True).first()
+    return request._match_modified
+
+def _match_etag(request, match_id):
+    modified = _match_modified(request, match_id)
+    return modified and f"m{match_id}.{modified.timestamp()}"
+
+@require_safe
+@condition(etag_func=_match_etag, last_modified_func=_match_modified)
+def match_detail(request, match_id):
+    m = Match.objects.filter(pk=match_id).first()
+    if m is None:
+        raise Http404
+    return _revalidate(JsonResponse(_match_dict(m)))
+
+@require_safe
+def tournament_qualification(request, tournament_id):
+    """Classificados e chave do mata-mata. Query: ?bracket_size=8 (potência de 2).
+
+    `group_clashes` > 0: confrontos da 1ª rodada entre times do mesmo grupo que nenhuma troca evitou.
+    """
+    tournament = Tournament.objects.filter(pk=tournament_id).first()
+    if tournament is None:
+        raise Http404
+    try:
+        size = int(request.GET["bracket_size"]) if request.GET.get("bracket_size") else None
+        return JsonResponse(get_qualification(tournament, size))
+    except ValueError as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+
+@require_safe
+def tournament_leaderboard(request, tournament_id):
+    """Quadro geral (com penalidades da modalidade). Query: ?limit=N."""
+    limit = request.GET.get("limit")
+    if limit is not None and not limit.isdigit():
+        return JsonResponse({"detail": "limit inválido"}, status=400)
+    return JsonResponse(get_leaderboard(tournament_id, int(limit) if limit else None), safe=False)
+
+@require_safe
+def group_simulation(request, group_id):
+    """Chances de cada time (posição final e classificação) simulando as partidas pendentes.
+
+    Query: ?samples=1000|10000 (padrão 10000) e ?rating_key=rating (chave de Team.meta;
+    sem ela, 50% por partida). Cacheado pela versão do grupo (edições de Team.meta não invalidam).
+    """
+    group = Group.objects.select_related("tournament").filter(pk=group_id).first()
+    if group is None:
+        raise Http404
+    samples = request.GET.get("samples", SIMULATION_SAMPLES[-1])
+    if samples not in SIMULATION_SAMPLES:
+        return JsonResponse({"detail": f"samples deve ser um de {', '.join(SIMULATION_SAMPLES)}"}, status=400)
+    rating_key = request.GET.get("rating_key") or None
+    if rating_key is not None and rating_key not in SIMULATION_RATING_KEYS:
+        return JsonResponse({"detail": f"rating_key deve ser um de {', '.join(SIMULATION_RATING_KEYS)}"}, status=400)
+
+    def compute():
+        return asdict(simulate_group(group.tournament, group, int(samples), rating_key, seed=0))
+
+    kind = f"simulation:{samples}:{rating_key or ''}"
+    try:
+        return JsonResponse(cached_group_value(kind, group.tournament_id, group.id, compute))
+    except ValueError as exc:
+        # partida REPORTED com indices inválidos (ver o comando validate_reports)
+        return JsonResponse({"detail": f"partida reportada inválida no grupo: {exc}"}, status=409)
+
 urlpatterns = [
     path("ping/", ping),
+    path("live/", include("tournaments.live")),
+    path("matches/report/batch", report_batch),
+    path("import/", import_upload),
+    # listas REST paginadas por cursor (views.py)
+    path("tournaments/", TournamentList.as_view()),
+    path("tournaments/<int:tournament_id>/groups/", GroupList.as_view()),
+    path("tournaments/<int:tournament_id>/enrollments/", EnrollmentList.as_view()),
+    path("tournaments/<int:tournament_id>/matches/", MatchList.as_view()),
+    path("tournaments/<int:tournament_id>/standings/", StandingList.as_view()),
+    path("tournaments/<int:tournament_id>/", tournament_detail),
+    path("tournaments/<int:tournament_id>/qualification/", tournament_qualification),
+    path("tournaments/<int:tournament_id>/leaderboard/", tournament_leaderboard),
+    path("groups/<int:group_id>/", group_detail),
+    path("groups/<int:group_id>/matches/", group_matches),
+    path("groups/<int:group_id>/standings/", group_standings),
+    path("groups/<int:group_id>/clinch/", group_clinch),
+    path("groups/<int:group_id>/simulation/", group_simulation),
+    path("matches/<int:match_id>/", match_detail),
 ]
@@ -5,5 +5,5 @@ class TournamentsConfig(AppConfig):
     name = "tournaments"
 
     def ready(self):
-        # importa sinais
-        from . import signals  # noqa
+        # importa sinais e checks
+        from . import checks, signals  # noqa
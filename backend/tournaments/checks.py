@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+_PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    # versões das tabelas (services/cache.py) precisam ser vistas por todos os workers
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend not in _PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        f"O cache 'default' ({backend.rsplit('.', 1)[-1]}) é por processo: as versões das tabelas "
+        "de grupo não são compartilhadas e outros workers servem tabelas antigas.",
+        hint="Em produção, aponte CACHE_BACKEND/CACHE_LOCATION para Redis ou Memcached.",
+        id="tournaments.W001",
+    )]
@@ -0,0 +1,47 @@
+import asyncio
+
+from django.http import StreamingHttpResponse
+from django.urls import path
+
+from .services.live import broker, group_channel, tournament_channel
+
+# Endpoints SSE (servidos pelo core/asgi.py). Eventos:
+#   standings -> {"tournament_id", "group_id", "changed": [{team_id, rank, stats?}], "removed"?}
+#   resync    -> o cliente ficou para trás; refazer o GET da tabela
+# Recálculos de outros processos só chegam com TOURNAMENTS_LIVE_SHARED (ver services/live.py).
+
+HEARTBEAT_SECONDS = 15
+
+
+async def _stream(channel: str):
+    sub = broker.subscribe(channel)
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(sub.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"  # mantém proxies/CDN com a conexão aberta
+    finally:
+        broker.unsubscribe(channel, sub)
+
+
+def _sse(channel: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(_stream(channel), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def group_standings_stream(request, group_id: int):
+    return _sse(group_channel(group_id))
+
+
+async def tournament_standings_stream(request, tournament_id: int):
+    return _sse(tournament_channel(tournament_id))
+
+
+urlpatterns = [
+    path("groups/<int:group_id>/standings/", group_standings_stream),
+    path("tournaments/<int:tournament_id>/standings/", tournament_standings_stream),
+]
@@ -0,0 +1,197 @@
+import json
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from tournaments.models import Match, MatchStatus, Modality, Team
+from tournaments.services.ranking import (
+    BACKEND_NUMPY,
+    BACKEND_PYTHON,
+    TeamAgg,
+    _apply_match_to_aggs,
+    compile_tournament_ruleset,
+    rank_aggs,
+)
+from tournaments.services.recalc import recalc_group_standings
+from tournaments.services.synthetic import (
+    SyntheticSpec,
+    create_synthetic_tournament,
+)
+
+BACKEND_DB = "db"
+PHASES = ("load", "aggregate", "sort", "persist")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Phases:
+    """Acumula tempo (s) e nº de queries por fase."""
+
+    def __init__(self):
+        self.seconds = {p: 0.0 for p in PHASES}
+        self.queries = {p: 0 for p in PHASES}
+
+    @contextmanager
+    def __call__(self, phase):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            yield
+            self.seconds[phase] += time.perf_counter() - start
+        self.queries[phase] += len(ctx.captured_queries)
+
+
+def _run_group(tournament, group, rules, backend, phases):
+    with phases("load"):
+        team_ids = list(
+            tournament.enrollments.filter(group=group).order_by("team_id").values_list("team_id", flat=True)
+        )
+        by_id = Team.objects.in_bulk(team_ids)
+        teams = [by_id[t] for t in team_ids]
+        matches = Match.objects.filter(tournament=tournament, group=group, status=MatchStatus.REPORTED)
+        if backend != BACKEND_DB:
+            matches = list(matches)
+
+    if backend == BACKEND_NUMPY:
+        from tournaments.services.columnar import aggregate_columnar, build_group_table_columnar, rank_columnar
+        with phases("aggregate"):
+            columns = aggregate_columnar(rules, team_ids, matches, with_h2h=True)
+        with phases("sort"):
+            rank_columnar(rules, columns)
+        table = build_group_table_columnar(rules, teams, matches)  # só para persistir, fora da medição
+    else:
+        with phases("aggregate"):
+            if backend == BACKEND_DB:
+                from tournaments.services.report import aggregate_group_db
+                aggs = aggregate_group_db(rules, matches, teams)
+            else:
+                aggs = {t.id: TeamAgg(team=t) for t in teams}
+                for m in matches:
+                    _apply_match_to_aggs(rules, m, aggs)
+        with phases("sort"):
+            table = rank_aggs(rules, aggs)
+
+    with phases("persist"):
+        recalc_group_standings(tournament, group, table=table)
+
+
+def _summary(samples):
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark do pipeline de ranking em torneios sintéticos: mede load, agregação, "
+        "ordenação e persistência separadamente e emite JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modality", nargs="+", default=list(Modality.values),
+                            choices=list(Modality.values))
+        parser.add_argument("--backend", nargs="+", default=[BACKEND_PYTHON, BACKEND_DB],
+                            choices=[BACKEND_PYTHON, BACKEND_NUMPY, BACKEND_DB])
+        parser.add_argument("--groups", type=int, default=8)
+        parser.add_argument("--teams", type=int, default=8, help="times por grupo")
+        parser.add_argument("--legs", type=int, choices=[1, 2], default=1)
+        parser.add_argument("--reported", type=float, default=1.0)
+        parser.add_argument("--wo-rate", type=float, default=0.05)
+        parser.add_argument("--tie-density", type=float, default=0.0)
+        parser.add_argument("--json-only", action="store_true",
+                            help="não normaliza os reports (ranking lê o JSON de indices)")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="grava o JSON neste arquivo em vez do stdout")
+        parser.add_argument("--keep", action="store_true", help="não apaga os torneios gerados")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat deve ser >= 1")
+        if BACKEND_NUMPY in options["backend"]:
+            from tournaments.services.columnar import np
+            if np is None:
+                raise CommandError("backend numpy requer numpy instalado")
+
+        runs = []
+        for modality in options["modality"]:
+            spec = SyntheticSpec(
+                modality=modality,
+                groups=options["groups"],
+                teams_per_group=options["teams"],
+                legs=options["legs"],
+                reported=options["reported"],
+                wo_rate=options["wo_rate"],
+                tie_density=options["tie_density"],
+                normalized=not options["json_only"],
+                seed=options["seed"],
+            )
+            for backend in options["backend"]:
+                runs.append(self._bench(spec, backend, options))
+
+        report = {
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "repeat": options["repeat"],
+            "runs": runs,
+        }
+        out = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(out + "\n")
+            self.stderr.write(f"{len(runs)} execução(ões) gravada(s) em {options['output']}")
+        else:
+            self.stdout.write(out)
+
+    def _bench(self, spec, backend, options):
+        if backend == BACKEND_DB and not spec.normalized:
+            raise CommandError("backend db exige reports normalizados (sem --json-only)")
+
+        result = {}
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                tournament = create_synthetic_tournament(spec)
+                setup = time.perf_counter() - start
+                rules = compile_tournament_ruleset(tournament)
+                groups = list(tournament.groups.order_by("id"))
+                matches = tournament.matches.filter(status=MatchStatus.REPORTED).count()
+
+                samples = {p: [] for p in PHASES}
+                queries = None
+                for _ in range(options["repeat"]):
+                    phases = Phases()
+                    for group in groups:
+                        _run_group(tournament, group, rules, backend, phases)
+                    for p in PHASES:
+                        samples[p].append(phases.seconds[p])
+                    queries = phases.queries  # iguais a cada repetição
+
+                totals = [sum(samples[p][i] for p in PHASES) for i in range(options["repeat"])]
+                result = {
+                    "modality": spec.modality,
+                    "backend": backend,
+                    "spec": spec.as_dict(),
+                    "groups": len(groups),
+                    "reported_matches": matches,
+                    "setup_seconds": setup,
+                    "phases": {p: {"seconds": _summary(samples[p]), "queries": queries[p]} for p in PHASES},
+                    "total_seconds": _summary(totals),
+                }
+                if options["keep"]:
+                    result["tournament_id"] = tournament.id
+                else:
+                    # nada do benchmark fica no banco (nem os on_commit dos sinais rodam)
+                    raise _Rollback
+        except _Rollback:
+            pass
+        return result
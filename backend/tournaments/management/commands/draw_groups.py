@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.models import Tournament
+from tournaments.services.draw import DRAW_METHODS, DRAW_RANDOM, draw_tournament
+
+
+class Command(BaseCommand):
+    help = "Sorteia os grupos do torneio e gera os jogos (todos contra todos) de cada grupo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tournament_id", type=int)
+        parser.add_argument("--teams", nargs="+", type=int, default=None,
+                            help="ids dos times (padrão: ressorteia os já inscritos)")
+        parser.add_argument("--method", choices=DRAW_METHODS, default=DRAW_RANDOM)
+        parser.add_argument("--rating-key", default="rating", help="chave de Team.meta usada como rating")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--legs", type=int, choices=[1, 2], default=1)
+        parser.add_argument("--replace", action="store_true",
+                            help="apaga grupos, inscrições e partidas anteriores")
+
+    def handle(self, *args, **options):
+        tournament = Tournament.objects.filter(id=options["tournament_id"]).first()
+        if tournament is None:
+            raise CommandError(f"Torneio não encontrado: {options['tournament_id']}")
+        replace = options["replace"] or options["teams"] is None
+        try:
+            result = draw_tournament(
+                tournament,
+                team_ids=options["teams"],
+                method=options["method"],
+                rating_key=options["rating_key"],
+                seed=options["seed"],
+                legs=options["legs"],
+                replace=replace,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{tournament}: {result.groups} grupo(s), {result.enrollments} inscrição(ões), "
+            f"{result.matches} partida(s)"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.services.importer import FORMATS, KINDS, import_records
+
+
+class Command(BaseCommand):
+    help = "Importa times, inscrições e partidas de um arquivo CSV ou NDJSON (em streaming)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--kind", choices=KINDS, help="tipo dos registros (obrigatório para CSV)")
+        parser.add_argument("--format", choices=FORMATS, help="padrão: pela extensão do arquivo")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                result = import_records(f, fmt, options["kind"], options["chunk_size"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for err in result.errors:
+            self.stderr.write(f"linha {err['line']}: {err['error']}")
+        written = ", ".join(f"{k}: {n}" for k, n in result.written.items() if n)
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.read} registro(s) lido(s); gravados {written or 'nenhum'}; {result.skipped} ignorado(s)"
+        ))
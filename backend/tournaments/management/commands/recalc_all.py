@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from tournaments.models import Tournament, TournamentStatus
+from tournaments.services.parallel import (
+    SHARD_GROUP,
+    SHARD_TOURNAMENT,
+    build_shards,
+    recalc_parallel,
+)
+
+
+class Command(BaseCommand):
+    help = "Recalcula os Standings de todos os torneios ativos/encerrados em paralelo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="processos no pool (1 = serial, no próprio processo)")
+        parser.add_argument("--shard", choices=[SHARD_TOURNAMENT, SHARD_GROUP], default=SHARD_TOURNAMENT,
+                            help="unidade de trabalho distribuída entre os workers")
+        parser.add_argument("--status", nargs="+",
+                            default=[TournamentStatus.ACTIVE, TournamentStatus.FINISHED],
+                            choices=list(TournamentStatus.values))
+        parser.add_argument("--modality", nargs="*", default=None)
+
+    def handle(self, *args, **options):
+        qs = Tournament.objects.filter(status__in=options["status"])
+        if options["modality"]:
+            qs = qs.filter(modality__in=[m.upper() for m in options["modality"]])
+        shards = build_shards(qs.order_by("id").values_list("id", flat=True), options["shard"])
+        if not shards:
+            self.stdout.write("Nada a recalcular.")
+            return
+
+        def progress(done, total, result):
+            if result.ok:
+                self.stdout.write(f"[{done}/{total}] {result.label}: {result.rows} standing(s)")
+            else:
+                self.stderr.write(f"[{done}/{total}] {result.label}: ERRO {result.error}")
+
+        failed = [r for r in recalc_parallel(shards, options["workers"], progress) if not r.ok]
+
+        summary = f"{len(shards) - len(failed)}/{len(shards)} shard(s) recalculado(s)"
+        if failed:
+            self.stderr.write(self.style.WARNING(f"{summary}; {len(failed)} com erro"))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.models import Tournament
+from tournaments.services.recalc import recalc_tournament_standings
+
+
+class Command(BaseCommand):
+    help = "Recalcula os Standings de todos os grupos dos torneios informados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tournament_ids", nargs="+", type=int)
+
+    def handle(self, *args, **options):
+        ids = options["tournament_ids"]
+        tournaments = {t.id: t for t in Tournament.objects.filter(id__in=ids)}
+        missing = [tid for tid in ids if tid not in tournaments]
+        if missing:
+            raise CommandError(f"Torneio(s) não encontrado(s): {missing}")
+
+        for tid in ids:
+            rows_by_group = recalc_tournament_standings(tournaments[tid])
+            rows = sum(len(r) for r in rows_by_group.values())
+            self.stdout.write(f"{tournaments[tid]}: {len(rows_by_group)} grupo(s), {rows} standing(s)")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime, parse_time
+
+from tournaments.models import Tournament
+from tournaments.services.scheduling import schedule_tournament
+
+
+class Command(BaseCommand):
+    help = "Agenda (scheduled_at) as partidas pendentes do torneio."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tournament_id", type=int)
+        parser.add_argument("--start", required=True, help="início, ISO 8601 (ex.: 2025-09-01T09:00)")
+        parser.add_argument("--capacity", type=int, required=True, help="partidas simultâneas (servidores/salas)")
+        parser.add_argument("--rest", type=int, default=0, help="descanso mínimo entre jogos de um time (min)")
+        parser.add_argument("--slot", type=int, default=None, help="duração fixa de cada partida (min)")
+        parser.add_argument("--day-start", default=None, help="início da janela diária (HH:MM)")
+        parser.add_argument("--day-end", default=None, help="fim da janela diária (HH:MM)")
+        parser.add_argument("--dry-run", action="store_true", help="calcula sem gravar")
+
+    def handle(self, *args, **options):
+        tournament = Tournament.objects.filter(id=options["tournament_id"]).first()
+        if tournament is None:
+            raise CommandError(f"Torneio não encontrado: {options['tournament_id']}")
+        start = parse_datetime(options["start"])
+        if start is None:
+            raise CommandError("--start inválido")
+        day_start = parse_time(options["day_start"]) if options["day_start"] else None
+        day_end = parse_time(options["day_end"]) if options["day_end"] else None
+        if (day_start is None) != (day_end is None):
+            raise CommandError("informe --day-start e --day-end juntos")
+
+        try:
+            result = schedule_tournament(
+                tournament, start, options["capacity"],
+                rest_minutes=options["rest"],
+                slot_minutes=options["slot"],
+                day_start=day_start,
+                day_end=day_end,
+                save=not options["dry_run"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not result.scheduled:
+            self.stdout.write("Nenhuma partida pendente.")
+            return
+        verb = "seriam agendadas" if options["dry_run"] else "agendada(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.scheduled} partida(s) {verb}: {result.first_start:%Y-%m-%d %H:%M} -> {result.last_end:%Y-%m-%d %H:%M}"
+        ))
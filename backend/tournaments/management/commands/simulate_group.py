@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.models import Group
+from tournaments.services.simulation import simulate_group
+
+
+class Command(BaseCommand):
+    help = "Simula (Monte Carlo) as partidas pendentes do grupo e mostra as chances de cada time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("group_id", type=int)
+        parser.add_argument("--samples", type=int, default=100_000)
+        parser.add_argument("--rating-key", default=None,
+                            help="chave de Team.meta usada como rating (padrão: 50%% por partida)")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--workers", type=int, default=1, help="processos (lotes de amostras em paralelo)")
+
+    def handle(self, *args, **options):
+        group = Group.objects.select_related("tournament").filter(id=options["group_id"]).first()
+        if group is None:
+            raise CommandError(f"Grupo não encontrado: {options['group_id']}")
+        try:
+            result = simulate_group(
+                group.tournament, group,
+                samples=options["samples"],
+                rating_key=options["rating_key"],
+                seed=options["seed"],
+                workers=options["workers"],
+            )
+        except (ValueError, ImportError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{group}: {result.samples} amostra(s), {result.pending} partida(s) pendente(s)")
+        for odds in result.teams:
+            positions = " ".join(f"{p * 100:5.1f}" for p in odds.positions)
+            self.stdout.write(f"  {odds.team:<30} classifica {odds.advance * 100:5.1f}%  | {positions}")
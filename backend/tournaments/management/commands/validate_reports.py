@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.models import Tournament
+from tournaments.services.report import validate_tournament_reports
+
+
+class Command(BaseCommand):
+    help = "Revalida os indices das partidas reportadas contra o indices_schema do ruleset (não grava nada)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("tournament_ids", type=int, nargs="*",
+                            help="torneios a validar (padrão: todos)")
+
+    def handle(self, *args, **options):
+        qs = Tournament.objects.order_by("id")
+        if options["tournament_ids"]:
+            qs = qs.filter(id__in=options["tournament_ids"])
+
+        invalid = 0
+        for tournament in qs.only("id", "name", "modality", "ruleset"):
+            try:
+                errors = validate_tournament_reports(tournament)
+            except ValueError as exc:  # ruleset/indices_schema customizado inválido
+                raise CommandError(f"{tournament.name}: {exc}")
+            invalid += len({e["match_id"] for e in errors})
+            for e in errors:
+                self.stdout.write(f"{tournament.name} #{e['match_id']}: [{e['code']}] {e['message']}")
+
+        if invalid:
+            self.stderr.write(self.style.WARNING(f"{invalid} partida(s) com report inválido"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Todos os reports são válidos."))
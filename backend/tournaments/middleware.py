@@ -0,0 +1,90 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .services import metrics
+
+
+class _QueryCounter:
+    """execute_wrapper: conta queries e soma o tempo gasto no banco."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+    # ASGI: a conexão é por thread; instala/remove na thread (thread_sensitive) da requisição
+    def install(self):
+        connection.execute_wrappers.append(self)
+
+    def uninstall(self):
+        connection.execute_wrappers.remove(self)
+
+
+def _route(request) -> str:
+    # rota (padrão da URL), não o caminho: mantém a cardinalidade dos labels baixa
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None else "unmatched"
+
+
+def _is_event_stream(response) -> bool:
+    return response.streaming and response.get("Content-Type", "").startswith("text/event-stream")
+
+
+class RequestMetricsMiddleware:
+    """Duração, nº de queries e tempo em banco por requisição (TOURNAMENTS_METRICS).
+
+    Desligado, o Django remove o middleware da cadeia na inicialização.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        self._observe(request, response, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        # views síncronas rodam via sync_to_async(thread_sensitive=True): a mesma thread
+        # por requisição, onde o wrapper é instalado antes e removido depois da view
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        await sync_to_async(counter.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(counter.uninstall)()
+        if _is_event_stream(response):
+            counter = None  # SSE: a resposta é só o início do stream
+        self._observe(request, response, time.perf_counter() - start, counter)
+        return response
+
+    def _observe(self, request, response, elapsed, counter):
+        labels = {"method": request.method, "route": _route(request), "status": f"{response.status_code // 100}xx"}
+        metrics.observe(metrics.REQUEST_SECONDS, elapsed, **labels)
+        if counter is not None:
+            metrics.observe(metrics.REQUEST_QUERIES, counter.count, **labels)
+            metrics.observe(metrics.REQUEST_DB_SECONDS, counter.seconds, **labels)
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:19
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120, unique=True)),
+                ('meta', models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120)),
+                ('modality', models.CharField(choices=[('FREE_FIRE', 'Free Fire'), ('VALORANT', 'Valorant'), ('LOL', 'League of Legends')], max_length=20)),
+                ('groups_count', models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('teams_per_group', models.PositiveIntegerField(default=4, validators=[django.core.validators.MinValueValidator(2)])),
+                ('advance_per_group', models.PositiveIntegerField(default=2, validators=[django.core.validators.MinValueValidator(1)])),
+                ('ruleset', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('DRAFT', 'Rascunho'), ('ACTIVE', 'Ativo'), ('FINISHED', 'Encerrado')], default='DRAFT', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['modality', 'status'], name='tournaments_modalit_a7d435_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Group',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=4)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='tournaments.tournament')),
+            ],
+            options={
+                'ordering': ['code'],
+                'unique_together': {('tournament', 'code')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stats', models.JSONField(default=dict)),
+                ('order_rank', models.PositiveIntegerField(default=0)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.group')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'order_rank'], name='tournaments_group_i_56c1fd_idx')],
+                'unique_together': {('group', 'team')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scheduled_at', models.DateTimeField(blank=True, null=True)),
+                ('round_number', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendente'), ('REPORTED', 'Reportada')], default='PENDING', max_length=20)),
+                ('is_wo', models.BooleanField(default=False)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('indices', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='matches', to='tournaments.group')),
+                ('away_team', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='away_matches', to='tournaments.team')),
+                ('home_team', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='home_matches', to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='tournaments.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', 'group'], name='tournaments_tournam_481ee4_idx'), models.Index(fields=['status'], name='tournaments_status_7d43fe_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('home_team', models.F('away_team')), _negated=True), name='match_home_neq_away', violation_error_message='Times da mesma partida devem ser diferentes.')],
+                'unique_together': {('tournament', 'group', 'home_team', 'away_team')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('penalty_points', models.IntegerField(default=0)),
+                ('stats', models.JSONField(default=dict)),
+                ('overall_rank', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='tournaments.group')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='tournaments.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', 'overall_rank'], name='tournaments_tournam_317cd9_idx')],
+                'unique_together': {('tournament', 'team')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='enrollments', to='tournaments.group')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='tournaments.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', 'group'], name='tournaments_tournam_58ce22_idx')],
+                'unique_together': {('tournament', 'team')},
+            },
+        ),
+    ]
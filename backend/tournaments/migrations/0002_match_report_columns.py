@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='winner_side',
+            field=models.CharField(blank=True, default='', max_length=4),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='home_rounds',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='away_rounds',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='home_maps',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='away_maps',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='win_duration_sec',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='normalized_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
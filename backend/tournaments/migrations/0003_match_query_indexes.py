@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0002_match_report_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='match',
+            name='tournaments_tournam_481ee4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'group', 'status'], name='match_t_group_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('status', 'REPORTED')), fields=['tournament', 'group'], name='match_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('normalized_at__isnull', True), ('status', 'REPORTED')), fields=['tournament', 'group'], name='match_unnormalized_idx'),
+        ),
+    ]
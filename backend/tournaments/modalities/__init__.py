@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple, Optional
 
 # --------- PRESETS ----------
 # NOTA: Estes presets foram derivados do regulamento que você forneceu (JUD 2K25).
@@ -25,7 +25,7 @@ FREE_FIRE_RULESET: Dict[str, Any] = {
     "scoring": {"win": 1, "loss": 0},  # 1 ponto por vitória da partida (duelo)
     "indices_schema": {
         "roundWins": {"type": "object", "required": True},  # {"home": 4, "away": 2}
-        "winner": {"type": "str", "required": True},        # "home" ou "away"
+        "winner": {"type": "str", "enum": ["home", "away"], "required": True},
         "wo": {"type": "bool", "required": False}
     },
     "tiebreakers": [
@@ -38,7 +38,7 @@ LOL_RULESET: Dict[str, Any] = {
     "name": "LOL",
     "scoring": {"win": 1, "loss": 0, "wo_loss": -1},  # provisório; ajustável pelo anexo técnico
     "indices_schema": {
-        "winner": {"type": "str", "required": True},        # "home" ou "away"
+        "winner": {"type": "str", "enum": ["home", "away"], "required": True},
         "gameDurationSec": {"type": "number", "required": True},
         "kills": {"type": "object", "required": False},
         "turrets": {"type": "object", "required": False},
@@ -96,3 +96,51 @@ def validate_report(modality: str, indices: Dict[str, Any]) -> None:
     if m == "FREE_FIRE": return validate_report_free_fire(indices)
     if m == "LOL": return validate_report_lol(indices)
     raise ValueError(f"Modality not supported: {modality}")
+
+
+# --------- NORMALIZAÇÃO (colunas tipadas gravadas no report) ----------
+class NormalizedReport(NamedTuple):
+    winner: Optional[str]          # "home" | "away" | None
+    home_rounds: int               # Valorant: soma dos rounds; Free Fire: roundWins
+    away_rounds: int
+    home_maps: int                 # Valorant MD3: mapas vencidos (0 nos demais casos)
+    away_maps: int
+    win_duration: Optional[float]  # Valorant: avgWinTimeSec; LoL: gameDurationSec
+
+def _win_duration(value: Any) -> Optional[float]:
+    # precisão de ms: o ranking soma os tempos como ms inteiros (ver ranking.duration_ms)
+    return round(float(value), 3) if isinstance(value, (int, float)) and value > 0 else None
+
+def normalize_report_valorant(indices: Dict[str, Any]) -> NormalizedReport:
+    rounds = indices.get("rounds", [])
+    home_maps = away_maps = 0
+    if indices.get("mode", "MD1") == "MD3":
+        # saldo de mapas só conta em MD3 (critério MAP_DIFF)
+        home_maps = sum(1 for r in rounds if r.get("home", 0) > r.get("away", 0))
+        away_maps = sum(1 for r in rounds if r.get("away", 0) > r.get("home", 0))
+    # por simplicidade: exigimos que o report informe winner explícito (home|away)
+    # (poderíamos inferir pelos rounds, mas manteremos direto para o MVP)
+    return NormalizedReport(
+        winner=indices.get("winner"),
+        home_rounds=sum(r.get("home", 0) for r in rounds),
+        away_rounds=sum(r.get("away", 0) for r in rounds),
+        home_maps=home_maps,
+        away_maps=away_maps,
+        win_duration=_win_duration(indices.get("avgWinTimeSec")),
+    )
+
+def normalize_report_free_fire(indices: Dict[str, Any]) -> NormalizedReport:
+    rw = indices.get("roundWins", {})
+    return NormalizedReport(indices.get("winner"), int(rw.get("home", 0)), int(rw.get("away", 0)), 0, 0, None)
+
+def normalize_report_lol(indices: Dict[str, Any]) -> NormalizedReport:
+    return NormalizedReport(indices.get("winner"), 0, 0, 0, 0, _win_duration(indices.get("gameDurationSec")))
+
+def normalize_report(modality: str, indices: Dict[str, Any]) -> NormalizedReport:
+    """Valida o report e devolve os campos derivados usados no ranking."""
+    validate_report(modality, indices)
+    m = modality.upper()
+    if m == "VALORANT": return normalize_report_valorant(indices)
+    if m == "FREE_FIRE": return normalize_report_free_fire(indices)
+    if m == "LOL": return normalize_report_lol(indices)
+    raise ValueError(f"Modality not supported: {modality}")
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Compilador do `indices_schema` declarado nos rulesets (presets ou Tournament.ruleset).
+#
+# Formato: {"campo": {"type": ..., "enum": [...], "min": n, "max": n, "required": bool}}
+#   type: str | number | int | bool | list | object (bool não conta como number/int)
+#   min/max: valor em number/int; tamanho em str/list/object
+#   campo ausente ou null: erro só se required
+# Campos não declarados são aceitos (ex.: "winner" no Valorant), por isso não há
+# código de erro para campo desconhecido.
+#
+# O schema vira, uma vez (cache pelo conteúdo), uma tupla de checagens por campo;
+# validar um report é só um loop sobre ela, sem reinterpretar o dicionário.
+
+
+class FieldError(NamedTuple):
+    field: str     # "" = o report inteiro
+    code: str      # required | type | enum | min | max | invalid
+    message: str
+
+
+class ReportValidationError(ValueError):
+    """ValueError com os erros estruturados do report em `errors`."""
+
+    def __init__(self, errors: List[FieldError]):
+        self.errors = errors
+        super().__init__("; ".join(e.message for e in errors))
+
+
+Validator = Callable[[Any], List[FieldError]]
+_Check = Callable[[Any], Optional[str]]
+
+_TYPES: Dict[str, Tuple[Callable[[Any], bool], str]] = {
+    "str": (lambda v: isinstance(v, str), "um texto"),
+    "number": (lambda v: isinstance(v, (int, float)) and not isinstance(v, bool), "um número"),
+    "int": (lambda v: isinstance(v, int) and not isinstance(v, bool), "um inteiro"),
+    "bool": (lambda v: isinstance(v, bool), "true/false"),
+    "list": (lambda v: isinstance(v, list), "uma lista"),
+    "object": (lambda v: isinstance(v, dict), "um objeto"),
+}
+_SIZED = {"str", "list", "object"}
+_KEYWORDS = {"type", "enum", "min", "max", "required"}
+
+
+def _bound(name: str, spec: Dict[str, Any], key: str) -> Optional[float]:
+    value = spec.get(key)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError(f"indices_schema.{name}.{key} deve ser numérico")
+    return value
+
+
+def _field_checks(name: str, spec: Dict[str, Any]) -> Tuple[Tuple[str, _Check], ...]:
+    if not isinstance(spec, dict):
+        raise ValueError(f"indices_schema.{name} deve ser um objeto")
+    unknown = set(spec) - _KEYWORDS
+    if unknown:
+        raise ValueError(f"indices_schema.{name}: chave(s) desconhecida(s) {', '.join(sorted(unknown))}")
+
+    checks: List[Tuple[str, _Check]] = []
+    kind = spec.get("type")
+    if kind is not None:
+        if kind not in _TYPES:
+            raise ValueError(f"indices_schema.{name}: tipo desconhecido {kind!r}")
+        is_type, label = _TYPES[kind]
+        checks.append(("type", lambda v: None if is_type(v) else f"deve ser {label}"))
+
+    if "enum" in spec:
+        options = spec["enum"]
+        if not isinstance(options, list) or not options:
+            raise ValueError(f"indices_schema.{name}.enum deve ser uma lista não vazia")
+        label = ", ".join(map(str, options))
+        if all(isinstance(o, str) for o in options):
+            names = frozenset(options)
+            checks.append(("enum", lambda v: None if isinstance(v, str) and v in names else f"deve ser um de {label}"))
+        else:
+            # valores não-texto: compara pela forma JSON (1 != true, listas/objetos por conteúdo)
+            encoded = frozenset(json.dumps(o, sort_keys=True) for o in options)
+            checks.append(("enum", lambda v: None if json.dumps(v, sort_keys=True) in encoded else f"deve ser um de {label}"))
+
+    lo, hi = _bound(name, spec, "min"), _bound(name, spec, "max")
+    if lo is not None and hi is not None and lo > hi:
+        raise ValueError(f"indices_schema.{name}: min maior que max")
+    if (lo is not None or hi is not None) and kind not in _SIZED | {"number", "int"}:
+        raise ValueError(f"indices_schema.{name}: min/max exigem type numérico, str, list ou object")
+    if kind in _SIZED:
+        if lo is not None:
+            checks.append(("min", lambda v: None if len(v) >= lo else f"deve ter ao menos {lo} item(ns)"))
+        if hi is not None:
+            checks.append(("max", lambda v: None if len(v) <= hi else f"deve ter no máximo {hi} item(ns)"))
+    else:
+        if lo is not None:
+            checks.append(("min", lambda v: None if v >= lo else f"deve ser >= {lo}"))
+        if hi is not None:
+            checks.append(("max", lambda v: None if v <= hi else f"deve ser <= {hi}"))
+    return tuple(checks)
+
+
+@lru_cache(maxsize=256)
+def _compile(content: str) -> Validator:
+    schema = json.loads(content)
+    if not isinstance(schema, dict):
+        raise ValueError("indices_schema deve ser um objeto")
+    fields = tuple(
+        (name, bool(spec.get("required")) if isinstance(spec, dict) else False, _field_checks(name, spec))
+        for name, spec in schema.items()
+    )
+
+    def validate(indices: Any) -> List[FieldError]:
+        if not isinstance(indices, dict):
+            return [FieldError("", "type", "indices deve ser um objeto")]
+        errors: List[FieldError] = []
+        for name, required, checks in fields:
+            value = indices.get(name)
+            if value is None:
+                if required:
+                    errors.append(FieldError(name, "required", f"{name} é obrigatório"))
+                continue
+            # para no primeiro erro do campo (min/max pressupõem o tipo certo)
+            for code, check in checks:
+                message = check(value)
+                if message is not None:
+                    errors.append(FieldError(name, code, f"{name} {message}"))
+                    break
+        return errors
+
+    return validate
+
+
+def compile_schema(schema: Optional[Dict[str, Any]]) -> Validator:
+    """Validador (com cache LRU pelo conteúdo) do `indices_schema`; ValueError se o schema for inválido."""
+    return _compile(json.dumps(schema or {}, sort_keys=True))
+
+
+def validate_batch(validate: Validator, reports: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Valida vários `indices`; devolve os erros de todos, cada um com o `index` do report."""
+    return [
+        {"index": index, **error._asdict()}
+        for index, indices in enumerate(reports)
+        for error in validate(indices)
+    ]
@@ -31,6 +31,7 @@ class Tournament(models.Model):
     ruleset = models.JSONField(default=dict)  # presets de pontuação, tiebreakers, índices
     status = models.CharField(max_length=20, choices=TournamentStatus.choices, default=TournamentStatus.DRAFT)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [models.Index(fields=["modality", "status"])]
@@ -79,6 +80,7 @@ class Match(models.Model):
     home_team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name="home_matches")
     away_team = models.ForeignKey(Team, on_delete=models.PROTECT, related_name="away_matches")
     scheduled_at = models.DateTimeField(null=True, blank=True)
+    round_number = models.PositiveSmallIntegerField(null=True, blank=True)  # rodada (gerada no sorteio)
 
     status = models.CharField(max_length=20, choices=MatchStatus.choices, default=MatchStatus.PENDING)
     is_wo = models.BooleanField(default=False)
@@ -87,11 +89,36 @@ class Match(models.Model):
     result = models.JSONField(default=dict, blank=True)
     indices = models.JSONField(default=dict, blank=True)
 
+    # colunas derivadas de `indices`, validadas e gravadas no report (ver services/report.py);
+    # normalized_at nulo = ainda não normalizado, o ranking cai no parse do JSON
+    winner_side = models.CharField(max_length=4, blank=True, default="")  # home | away
+    home_rounds = models.IntegerField(default=0)
+    away_rounds = models.IntegerField(default=0)
+    home_maps = models.PositiveSmallIntegerField(default=0)
+    away_maps = models.PositiveSmallIntegerField(default=0)
+    win_duration_sec = models.FloatField(null=True, blank=True)
+    normalized_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # ETag/Last-Modified da partida
 
     class Meta:
+        # índices conferidos pelos testes de plano (tests.py, QueryPlanTests)
         indexes = [
-            models.Index(fields=["tournament", "group"]),
+            # tabela/recálculo do grupo: partidas do grupo por status (substitui (tournament, group))
+            models.Index(fields=["tournament", "group", "status"], name="match_t_group_status_idx"),
+            # só as REPORTED: tabelas do torneio inteiro, revalidação dos reports
+            models.Index(
+                fields=["tournament", "group"],
+                condition=models.Q(status=MatchStatus.REPORTED),
+                name="match_reported_idx",
+            ),
+            # REPORTED ainda sem colunas normalizadas (checado a cada tabela; quase sempre vazio)
+            models.Index(
+                fields=["tournament", "group"],
+                condition=models.Q(status=MatchStatus.REPORTED, normalized_at__isnull=True),
+                name="match_unnormalized_idx",
+            ),
             models.Index(fields=["status"]),
         ]
         constraints = [
@@ -123,3 +150,23 @@ class Standing(models.Model):
 
     def __str__(self):
         return f"{self.group.code} #{self.order_rank} - {self.team}"
+
+
+class LeaderboardEntry(models.Model):
+    """Quadro geral do torneio, materializado a partir dos Standings dos grupos."""
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="leaderboard")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="leaderboard_entries")
+
+    points = models.IntegerField(default=0)          # pontos do grupo + penalidades
+    penalty_points = models.IntegerField(default=0)  # ex.: wo_penalty_points x WOs (Free Fire)
+    stats = models.JSONField(default=dict)           # stats públicos do Standing
+    overall_rank = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("tournament", "team")]
+        indexes = [models.Index(fields=["tournament", "overall_rank"])]
+
+    def __str__(self):
+        return f"{self.tournament.name} #{self.overall_rank} - {self.team}"
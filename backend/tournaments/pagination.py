@@ -0,0 +1,105 @@
+from __future__ import annotations
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Paginação por keyset (cursor) em vez de OFFSET.
+#
+# A view declara `keyset` (ex.: ("group_id", "order_rank", "id")), com o último
+# campo único; o cursor guarda os valores da última linha da página e a próxima
+# começa em `(campos) > (valores)`. Com a ordenação alinhada a um índice, cada
+# página é uma busca no índice — o custo não cresce com a profundidade, e linhas
+# inseridas no meio não duplicam nem pulam itens como no OFFSET.
+
+
+def _field(name: str) -> str:
+    return name.lstrip("-")
+
+
+def keyset_filter(keyset: Sequence[str], values: Sequence[Any]) -> Q:
+    """`(a, b, c) > (x, y, z)` expandido em OR de prefixos iguais (respeita "-campo")."""
+    q = Q()
+    for i, name in enumerate(keyset):
+        op = "lt" if name.startswith("-") else "gt"
+        step = Q(**{_field(prev): values[j] for j, prev in enumerate(keyset[:i])})
+        q |= step & Q(**{f"{_field(name)}__{op}": values[i]})
+    # limite redundante no 1º campo: deixa o planner usar o índice como faixa
+    first = keyset[0]
+    return q & Q(**{f"{_field(first)}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+
+
+class KeysetPagination(BasePagination):
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def _encode(self, values: List[Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode()
+
+    def _decode(self, raw: str, size: int) -> List[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(raw.encode()))
+        except (ValueError, binascii.Error):
+            raise NotFound("Cursor inválido")
+        if not isinstance(values, list) or len(values) != size:
+            raise NotFound("Cursor inválido")
+        return values
+
+    def get_page_size(self, request) -> int:
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw and raw.isdigit() and int(raw) > 0:
+            return min(int(raw), self.max_page_size)
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[List[Any]]:
+        keyset = view.keyset
+        self.request = request
+        self.keyset = keyset
+        size = self.get_page_size(request)
+
+        raw = request.query_params.get(self.cursor_query_param)
+        if raw:
+            queryset = queryset.filter(keyset_filter(keyset, self._decode(raw, len(keyset))))
+        rows = list(queryset.order_by(*keyset)[: size + 1])
+
+        self.next_values = None
+        if len(rows) > size:
+            rows = rows[:size]
+            last = rows[-1]
+            self.next_values = [getattr(last, _field(name)) for name in keyset]
+        return rows
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode(self.next_values))
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": self.cursor_query_param, "required": False, "in": "query",
+             "description": "Cursor da próxima página (campo `next`)", "schema": {"type": "string"}},
+            {"name": self.page_size_query_param, "required": False, "in": "query",
+             "description": f"Itens por página (máx. {self.max_page_size})", "schema": {"type": "integer"}},
+        ]
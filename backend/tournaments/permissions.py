@@ -0,0 +1,19 @@
+from __future__ import annotations
+from typing import Type
+
+from rest_framework.permissions import BasePermission
+
+# Escritas pela API seguem a regra do admin: usuário ativo, staff e com as
+# permissões de modelo da operação. A autenticação é a padrão do DRF (sessão do
+# admin, com CSRF, ou Basic).
+
+
+def staff_with_perms(*perms: str) -> Type[BasePermission]:
+    """Permissão DRF: staff ativo com todas as `perms` ("app.codename")."""
+
+    class StaffWithPerms(BasePermission):
+        def has_permission(self, request, view):
+            user = request.user
+            return bool(user and user.is_active and user.is_staff and user.has_perms(perms))
+
+    return StaffWithPerms
@@ -0,0 +1,23 @@
+from __future__ import annotations
+from rest_framework.renderers import JSONRenderer
+
+try:  # opcional: sem orjson, cai no JSONRenderer padrão do DRF
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON via orjson (payloads grandes, ex.: listas de partidas com `indices`).
+
+    Mesmo media type do JSONRenderer; sem orjson instalado, ou com `indent`
+    pedido no Accept, delega ao renderer padrão.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # `default` cobre o que o orjson não conhece (strings lazy de tradução, Decimal...)
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
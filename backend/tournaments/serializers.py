@@ -0,0 +1,70 @@
+from __future__ import annotations
+from rest_framework import serializers
+
+from .models import Enrollment, Group, Match, Standing, Tournament
+from .services.live import PUBLIC_STATS
+
+# Serializers só de leitura da API REST. Os campos de relacionamentos leem
+# objetos já carregados pelas views (select_related/prefetch_related).
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ["id", "tournament_id", "code"]
+
+
+class GroupBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ["id", "code"]
+
+
+class TournamentSerializer(serializers.ModelSerializer):
+    groups = GroupBriefSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Tournament
+        fields = [
+            "id", "name", "modality", "status", "groups_count", "teams_per_group",
+            "advance_per_group", "ruleset", "groups", "created_at", "updated_at",
+        ]
+
+
+class EnrollmentSerializer(serializers.ModelSerializer):
+    team = serializers.CharField(source="team.name", read_only=True)
+    group_code = serializers.CharField(source="group.code", read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ["id", "tournament_id", "group_id", "group_code", "team_id", "team"]
+
+
+class MatchSerializer(serializers.ModelSerializer):
+    group_code = serializers.CharField(source="group.code", read_only=True)
+    home_team = serializers.CharField(source="home_team.name", read_only=True)
+    away_team = serializers.CharField(source="away_team.name", read_only=True)
+
+    class Meta:
+        model = Match
+        fields = [
+            "id", "tournament_id", "group_id", "group_code", "round_number", "scheduled_at",
+            "home_team_id", "home_team", "away_team_id", "away_team",
+            "status", "is_wo", "winner_side", "result", "indices", "updated_at",
+        ]
+
+
+class StandingSerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(source="order_rank", read_only=True)
+    team = serializers.CharField(source="team.name", read_only=True)
+    group_code = serializers.CharField(source="group.code", read_only=True)
+    stats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Standing
+        fields = ["id", "group_id", "group_code", "rank", "team_id", "team", "stats"]
+
+    def get_stats(self, obj) -> dict:
+        # só os stats públicos (os campos do caminho incremental ficam de fora)
+        stats = obj.stats or {}
+        return {k: stats.get(k) for k in PUBLIC_STATS}
@@ -0,0 +1,228 @@
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+from tournaments.models import Standing, Tournament
+
+# Cache de leitura das tabelas de grupo, chaveado por (group_id, versão).
+# A versão combina um contador do torneio (ruleset) e um do grupo (partidas,
+# inscrições, standings); os sinais só incrementam contadores, nunca apagam
+# entradas: as antigas simplesmente deixam de ser lidas e expiram.
+#
+# Leitura: LRU local (por processo, TTL curto) -> cache do Django -> cálculo.
+#
+# As versões moram no cache do Django: com LocMemCache cada processo tem os seus
+# contadores e um worker não vê o incremento feito por outro (ver checks.py).
+
+_GROUP_VER = "tournaments:group:{}:v"
+_TOURNAMENT_VER = "tournaments:tournament:{}:v"
+_ENTRY = "tournaments:{}:{}:{}"  # kind, group_id, versão
+_TOURNAMENT_ENTRY = "tournaments:{}:t{}:{}"  # kind, tournament_id, versão dos grupos
+
+
+def _conf(name: str, default: Any) -> Any:
+    return getattr(settings, "TOURNAMENTS_TABLE_CACHE", {}).get(name, default)
+
+
+class _LocalLRU:
+    """LRU em memória com despejo por tamanho aproximado (bytes do JSON) e TTL.
+
+    O TTL limita por quanto tempo um processo serve uma entrada sem voltar ao
+    cache compartilhado, mesmo que a versão que ele enxerga esteja atrasada.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._data: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[2] <= time.monotonic():
+                del self._data[key]
+                self.size -= item[1]
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def set(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes or self.ttl <= 0:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._data[key] = (value, size, time.monotonic() + self.ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_local = _LocalLRU(_conf("LOCAL_MAX_BYTES", 8 * 1024 * 1024), _conf("LOCAL_TTL", 5.0))
+_stats_lock = threading.Lock()
+_stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        out = dict(_stats)
+    out.update(local_entries=len(_local), local_bytes=_local.size)
+    return out
+
+
+def reset_cache() -> None:
+    """Zera LRU local e contadores (útil em testes)."""
+    _local.clear()
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+# -----------------------------
+# Versões
+# -----------------------------
+def _bump(key: str) -> None:
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        # chave ausente/expirada: recomeça de um valor que não colide com versões antigas
+        shared_cache.set(key, time.time_ns(), None)
+
+
+def bump_group_version(group_id: int) -> None:
+    _bump(_GROUP_VER.format(group_id))
+
+
+def bump_tournament_version(tournament_id: int) -> None:
+    _bump(_TOURNAMENT_VER.format(tournament_id))
+
+
+def _versions(keys: List[str]) -> List[str]:
+    found = shared_cache.get_many(keys)
+    parts = []
+    for key in keys:
+        if key not in found:
+            shared_cache.add(key, time.time_ns(), None)
+            found[key] = shared_cache.get(key)
+        parts.append(str(found[key]))
+    return parts
+
+
+def group_version(tournament_id: int, group_id: int) -> str:
+    return ".".join(_versions([_TOURNAMENT_VER.format(tournament_id), _GROUP_VER.format(group_id)]))
+
+
+def tournament_version(tournament_id: int, group_ids: Iterable[int]) -> str:
+    """Versão de um valor que depende de vários grupos do torneio (muda se qualquer um mudar)."""
+    keys = [_TOURNAMENT_VER.format(tournament_id)] + [_GROUP_VER.format(g) for g in sorted(group_ids)]
+    return hashlib.blake2b(".".join(_versions(keys)).encode(), digest_size=12).hexdigest()
+
+
+# -----------------------------
+# Leitura
+# -----------------------------
+def cached_group_value(kind: str, tournament_id: int, group_id: int, compute: Callable[[], Any]) -> Any:
+    """Devolve o valor `kind` do grupo na versão atual, calculando só em miss.
+
+    `compute` deve devolver algo serializável em JSON.
+    """
+    return _cached(_ENTRY.format(kind, group_id, group_version(tournament_id, group_id)), compute)
+
+
+def cached_tournament_value(
+    kind: str, tournament_id: int, group_ids: Iterable[int], compute: Callable[[], Any]
+) -> Any:
+    """Como cached_group_value, para valores que dependem de todos os grupos do torneio."""
+    return _cached(_TOURNAMENT_ENTRY.format(kind, tournament_id, tournament_version(tournament_id, group_ids)), compute)
+
+
+def peek_group_value(kind: str, tournament_id: int, group_id: int) -> Optional[Any]:
+    """Valor `kind` do grupo na versão atual se já estiver no cache; nunca calcula."""
+    return _peek(_ENTRY.format(kind, group_id, group_version(tournament_id, group_id)))
+
+
+def _peek(key: str) -> Optional[Any]:
+    value = _local.get(key)
+    if value is not None:
+        _count("local_hits")
+        return value
+
+    value = shared_cache.get(key)
+    if value is None:
+        return None
+    _count("shared_hits")
+    _local.set(key, value, len(json.dumps(value, default=str)))
+    return value
+
+
+def _cached(key: str, compute: Callable[[], Any]) -> Any:
+    value = _peek(key)
+    if value is not None:
+        return value
+
+    _count("misses")
+    value = compute()
+    shared_cache.set(key, value, _conf("TIMEOUT", 300))
+    _local.set(key, value, len(json.dumps(value, default=str)))
+    return value
+
+
+def _table_rows(table) -> List[Dict[str, Any]]:
+    from .recalc import _stats_from_agg
+
+    return [
+        {"rank": pos, "team_id": agg.team.id, "team": agg.team.name, "stats": _stats_from_agg(agg)}
+        for pos, agg in enumerate(table, start=1)
+    ]
+
+
+def get_group_table(tournament: Tournament, group_id: int) -> List[Dict[str, Any]]:
+    """Saída de compute_group_table (serializada), servida do cache quando possível."""
+    from .ranking import compute_group_table
+
+    return cached_group_value(
+        "table", tournament.id, group_id,
+        lambda: _table_rows(compute_group_table(tournament, group_id)),
+    )
+
+
+def get_group_standings(tournament: Tournament, group_id: int) -> List[Dict[str, Any]]:
+    """Standings persistidos do grupo, servidos do cache quando possível."""
+    def load():
+        rows = (
+            Standing.objects.filter(tournament=tournament, group_id=group_id)
+            .select_related("team")
+            .order_by("order_rank")
+        )
+        return [
+            {"rank": s.order_rank, "team_id": s.team_id, "team": s.team.name, "stats": s.stats}
+            for s in rows
+        ]
+
+    return cached_group_value("standings", tournament.id, group_id, load)
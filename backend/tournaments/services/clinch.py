@@ -0,0 +1,450 @@
+from __future__ import annotations
+from dataclasses import dataclass, field, replace
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+from tournaments.models import Group, MatchStatus, Tournament
+from .cache import cached_group_value, peek_group_value
+from .ranking import (
+    TeamAgg,
+    _SCALAR_KEYS,
+    _mini_league_key,
+    _partition,
+    _tiebreak_plan,
+    compile_tournament_ruleset,
+    compute_group_table,
+)
+
+# Classificação/eliminação matemática (exata) no grupo.
+#
+# Um time está classificado se termina entre os `advance_per_group` em qualquer
+# resultado das partidas PENDING, e eliminado se fica de fora em todos. Para cada
+# time, uma busca em profundidade procura um contraexemplo: os jogos do próprio
+# time ficam fixados (pior/melhor caso); em cada nó, um b-matching decide se há
+# solução só em pontos com as partidas ainda abertas (sem solução = sem
+# contraexemplo; solução mesmo com os empates contra x = contraexemplo), e os
+# limites de pontos (mínimo/máximo) podam a subárvore quando já decidem. Partidas
+# entre dois times já decididos em relação a x não ramificam. Só nas folhas com
+# empate em pontos o plano de tiebreakers é avaliado.
+#
+# Premissas: partidas pendentes terminam em vitória/derrota em campo (sem WO).
+# Critérios que dependem do placar (rounds, mapas, tempos) de quem ainda tem jogo
+# são desconhecidos: o empate conta como indefinido, e nesse caso o time não é
+# dado como classificado nem como eliminado.
+#
+# O cálculo é caro (busca exponencial no pior caso) e nunca roda no request: a
+# view só lê o cache; em miss, agenda refresh_group_clinch (services/scheduler.py,
+# um cálculo por grupo e versão entre processos) e serve o último resultado
+# conhecido do grupo marcado como `stale`. Com TOURNAMENTS_CLINCH["PRECOMPUTE"],
+# os processos do servidor também agendam o cálculo após cada recálculo.
+
+CLINCHED = "clinched"
+ELIMINATED = "eliminated"
+ALIVE = "alive"
+
+# critérios que só dependem de quem venceu (conhecidos numa folha)
+_RESULT_KEYS = {"WO_FEWEST", "WINS"}
+_NAMES = {name: name for name in _SCALAR_KEYS}
+
+
+@dataclass
+class _Search:
+    k: int
+    win: int
+    loss: int
+    steps: Tuple[Tuple[str, Any], ...]
+    aggs: List[TeamAgg]                  # REPORTED, em ordem de team_id
+    matches: List[Tuple[int, int]]       # partidas pendentes (home, away), índices em `aggs`
+    with_pending: Set[int] = field(default_factory=set)
+    nodes: int = 0
+    exact: bool = True                   # False se alguma busca estourou MAX_NODES
+
+    @property
+    def n(self) -> int:
+        return len(self.aggs)
+
+
+def _leaf_aggs(s: _Search, teams: List[int], winners: List[int]) -> Dict[int, TeamAgg]:
+    """TeamAgg dos times informados com os resultados da folha.
+
+    Parte das estatísticas REPORTED (placar incluso); os critérios de placar só
+    valem para quem não tem partida pendente (ver _position_range).
+    """
+    out = {t: replace(s.aggs[t], h2h_points=dict(s.aggs[t].h2h_points)) for t in teams}
+    for (home, away), w in zip(s.matches, winners):
+        l = away if w == home else home
+        if w in out:
+            out[w].points += s.win
+            out[w].wins += 1
+            out[w].h2h_points[s.aggs[l].team.id] = out[w].h2h_points.get(s.aggs[l].team.id, 0) + s.win
+        if l in out:
+            out[l].points += s.loss
+            out[l].losses += 1
+            out[l].h2h_points[s.aggs[w].team.id] = out[l].h2h_points.get(s.aggs[w].team.id, 0) + s.loss
+    return out
+
+
+def _position_range(s: _Search, x: int, points: List[int], winners: List[int]) -> Tuple[int, int]:
+    """Melhor e pior posição possíveis de `x` numa folha (iguais se os critérios decidem)."""
+    above = sum(1 for p in points if p > points[x])
+    tied = [t for t in range(s.n) if points[t] == points[x]]
+    if len(tied) == 1:
+        return above + 1, above + 1
+
+    by_index = _leaf_aggs(s, tied, winners)
+    target = by_index[x]
+    index_of = {id(a): t for t, a in by_index.items()}
+    block = [by_index[t] for t in tied]
+    step = 0
+    while len(block) > 1 and step < len(s.steps):
+        kind, name = s.steps[step]
+        if kind == "keys":
+            unknown = [] if name in _RESULT_KEYS else [a for a in block if index_of[id(a)] in s.with_pending]
+            if target in unknown:
+                break  # placar de x ainda desconhecido: qualquer posição do bloco
+            if unknown:
+                # quem já terminou tem o critério final: os melhores que x ficam à
+                # frente, os piores atrás; os empatados com x e os que ainda jogam
+                # podem ficar de qualquer lado
+                known = [a for a in block if index_of[id(a)] not in s.with_pending]
+                for part in _partition(known, _SCALAR_KEYS[name]):
+                    if target in part:
+                        return above + 1, above + len(part) + len(unknown)
+                    above += len(part)
+            parts = _partition(block, _SCALAR_KEYS[name])
+            step += 1
+        else:
+            parts = _partition(block, _mini_league_key(block))
+            if len(parts) == 1:
+                step += 1
+                continue
+            # separou: a mini-liga é refeita entre os que continuam empatados
+        for part in parts:
+            if target in part:
+                block = part
+                break
+            above += len(part)
+    return above + 1, above + len(block)
+
+
+def _tie_edges(s: _Search, x: int) -> List[int]:
+    """Empate em pontos já decidido contra `x`: 1 = t fica à frente, -1 = x fica à frente.
+
+    Só quando o 1º critério é WO_FEWEST (partidas pendentes não geram WO, então
+    a contagem de WOs é final).
+    """
+    if not s.steps or s.steps[0] != ("keys", "WO_FEWEST"):
+        return [0] * s.n
+    wo = s.aggs[x].wo_count
+    return [(a.wo_count < wo) - (a.wo_count > wo) for a in s.aggs]
+
+
+def _b_matching(pairs: List[Tuple[int, int]], caps: Dict[int, int]) -> List[Optional[int]]:
+    """Vencedor de cada partida sem passar de caps[t] vitórias por time (caminhos aumentantes).
+
+    Maximiza o número de partidas atribuídas; as que sobram ficam None.
+    """
+    assign: List[Optional[int]] = [None] * len(pairs)
+    held: Dict[int, List[int]] = {t: [] for t in caps}
+
+    def augment(mi: int, seen: Set[int]) -> bool:
+        for t in pairs[mi]:
+            if t in seen or not caps.get(t):
+                continue
+            seen.add(t)
+            if len(held[t]) < caps[t]:
+                held[t].append(mi)
+                assign[mi] = t
+                return True
+            for pos, mj in enumerate(held[t]):
+                if augment(mj, seen):  # mj passou para o outro time da partida
+                    held[t][pos] = mi
+                    assign[mi] = t
+                    return True
+        return False
+
+    for mi in range(len(pairs)):
+        augment(mi, set())
+    return assign
+
+
+def _points_assignment(
+    s: _Search, x: int, points: List[int], left: List[int], edge: List[int], witness: str, open_: List[int]
+) -> Optional[Dict[int, int]]:
+    """Resultado das partidas abertas que satisfaz o contraexemplo só em pontos, ou None.
+
+    None prova que nenhuma folha da subárvore é contraexemplo (o empate em pontos
+    já conta a favor dele). Requer `x` com todos os jogos fixados e win > loss.
+    """
+    d = s.win - s.loss
+    base = [points[t] + left[t] * s.loss for t in range(s.n)]
+    pairs = [s.matches[i] for i in open_]
+    others = [t for t in range(s.n) if t != x]
+    if witness == "in":
+        # no máximo k-1 times à frente de x; os demais vencem no máximo `room` partidas
+        room = {t: min(left[t], (points[x] - (edge[t] > 0) - base[t]) // d) for t in others}
+        forced = {t for t in others if room[t] < 0}
+        free = s.k - 1 - len(forced)
+        if free < 0:
+            return None
+        candidates = sorted((t for t in others if 0 <= room[t] < left[t]), key=lambda t: room[t] - left[t])
+        for size in range(min(free, len(candidates)) + 1):
+            for extra in combinations(candidates, size):
+                ahead = forced.union(extra)
+                assign = _b_matching(pairs, {t: left[t] if t in ahead else room[t] for t in others})
+                if None not in assign:
+                    return dict(zip(open_, assign))
+        return None
+    # "out": k times empatando ou passando x, cada um com as vitórias que precisa
+    need = {t: max(0, -(-(points[x] + (edge[t] < 0) - base[t]) // d)) for t in others}
+    candidates = sorted((t for t in others if need[t] <= left[t]), key=lambda t: need[t])
+    for chosen in combinations(candidates, s.k):
+        caps = {t: need[t] for t in chosen}
+        if sum(caps.values()) > len(pairs):
+            continue
+        assign = _b_matching(pairs, caps)
+        if sum(a is not None for a in assign) == sum(caps.values()):
+            return {i: a if a is not None else s.matches[i][0] for i, a in zip(open_, assign)}
+    return None
+
+
+MAX_NODES = 50_000  # por busca; estourou, assume contraexemplo (resposta conservadora)
+
+
+class _Budget(Exception):
+    pass
+
+
+def _find(s: _Search, x: int, witness: str) -> bool:
+    """Existe resultado em que `x` não fica garantido (witness="out") ou pode se classificar ("in")?"""
+    points = [a.points for a in s.aggs]
+    left = [0] * s.n
+    leaf = [0] * len(s.matches)
+    # vencer só melhora a situação de x (pontos, vitórias, H2H): seus jogos ficam
+    # fixados no pior caso ("out") ou no melhor ("in"), sem ramificar
+    open_: List[int] = []
+    for i, (home, away) in enumerate(s.matches):
+        if x in (home, away) and s.win >= s.loss:
+            other = away if x == home else home
+            w, l = (other, x) if witness == "out" else (x, other)
+            points[w] += s.win
+            points[l] += s.loss
+            leaf[i] = w
+        else:
+            open_.append(i)
+            left[home] += 1
+            left[away] += 1
+    use_flow = s.win > s.loss and not left[x]
+    edge = _tie_edges(s, x)
+
+    def bounds() -> Optional[bool]:
+        # True/False se a subárvore inteira já decide; None = precisa ramificar
+        lo_w, hi_w = min(s.win, s.loss), max(s.win, s.loss)
+        x_min, x_max = points[x] + left[x] * lo_w, points[x] + left[x] * hi_w
+        can_reach = sum(
+            1 for t in range(s.n) if t != x and points[t] + left[t] * hi_w + (edge[t] >= 0) > x_min
+        )
+        surely_above = sum(
+            1 for t in range(s.n) if t != x and points[t] + left[t] * lo_w + (edge[t] > 0) > x_max
+        )
+        if can_reach < s.k:           # x entre os k em qualquer resultado daqui
+            return witness == "in"
+        if surely_above >= s.k:       # x fora dos k em qualquer resultado daqui
+            return witness == "out"
+        return None
+
+    def settled(t: int) -> bool:
+        if t == x:
+            return False
+        lo_w, hi_w = min(s.win, s.loss), max(s.win, s.loss)
+        x_min, x_max = points[x] + left[x] * lo_w, points[x] + left[x] * hi_w
+        return (
+            points[t] + left[t] * lo_w + (edge[t] > 0) > x_max          # sempre acima
+            or points[t] + left[t] * hi_w + (edge[t] >= 0) <= x_min     # nunca alcança
+        )
+
+    def leaf_result() -> bool:
+        lo, hi = _position_range(s, x, points, leaf)
+        return hi > s.k if witness == "out" else lo <= s.k
+
+    guide: Dict[int, int] = {}
+
+    # empates em pontos sempre contra x ("in") / a favor dos outros ("out"): solução
+    # assim é contraexemplo qualquer que seja o desempate
+    strict = [1 if witness == "in" else -1] * s.n
+
+    def flow(j: int) -> Optional[bool]:
+        # só pontos: sem solução, não há contraexemplo; com solução mesmo sem contar
+        # empates, há. No meio, a solução costuma ser o contraexemplo e, se não for,
+        # orienta a ordem dos ramos
+        if _points_assignment(s, x, points, left, strict, witness, open_[j:]) is not None:
+            return True
+        assign = _points_assignment(s, x, points, left, edge, witness, open_[j:])
+        if assign is None:
+            return False
+        if j:
+            return None  # nós internos: só a poda; a folha candidata e a ordem vêm da raiz
+        for i, w in assign.items():
+            home, away = s.matches[i]
+            l = away if w == home else home
+            points[w] += s.win
+            points[l] += s.loss
+            leaf[i] = w
+        found = leaf_result()
+        guide.update(assign)
+        for i, w in assign.items():
+            home, away = s.matches[i]
+            l = away if w == home else home
+            points[w] -= s.win
+            points[l] -= s.loss
+        return True if found else None
+
+    def visit(j: int) -> bool:
+        s.nodes += 1
+        if s.nodes > limit:
+            raise _Budget
+        decided = bounds()
+        if decided is None and use_flow and j < len(open_):
+            decided = flow(j)
+        if decided is not None:
+            return decided
+        if j == len(open_):
+            return leaf_result()
+
+        i = open_[j]
+        home, away = s.matches[i]
+        # tenta primeiro o resultado mais provável de gerar o contraexemplo
+        if x in (home, away):
+            first = (away if x == home else home) if witness == "out" else x
+        elif i in guide:
+            first = guide[i]
+        elif witness == "in":
+            # vitória para quem já passou de x (não piora nada) ou tem mais folga
+            first = max((home, away), key=lambda t: (points[t] > points[x] - (edge[t] > 0), points[x] - points[t]))
+        else:
+            # concentra vitórias em quem ainda não alcançou x, mas está mais perto
+            first = min((home, away), key=lambda t: (points[t] >= points[x], points[x] - points[t]))
+        # dois times já decididos em relação a x (acima ou abaixo em qualquer
+        # resultado daqui): o placar entre eles não muda a posição de x, um ramo basta
+        branches = (first,) if settled(home) and settled(away) else (first, away if first == home else home)
+        left[home] -= 1
+        left[away] -= 1
+        found = False
+        for w in branches:
+            l = away if w == home else home
+            points[w] += s.win
+            points[l] += s.loss
+            leaf[i] = w
+            found = visit(j + 1)
+            points[w] -= s.win
+            points[l] -= s.loss
+            if found:
+                break
+        left[home] += 1
+        left[away] += 1
+        return found
+
+    limit = s.nodes + MAX_NODES
+    try:
+        return visit(0)
+    except _Budget:
+        s.exact = False
+        return True
+
+
+@dataclass
+class ClinchResult:
+    status: Dict[int, str]   # team_id -> CLINCHED | ELIMINATED | ALIVE
+    exact: bool              # False: alguma busca parou em MAX_NODES (o time ficou ALIVE)
+    nodes: int
+
+
+def clinch_status(tournament: Tournament, group: Group) -> ClinchResult:
+    """Situação de cada time do grupo quanto aos `advance_per_group` classificados."""
+    rules = compile_tournament_ruleset(tournament)
+    aggs = sorted(compute_group_table(tournament, group.id), key=lambda a: a.team.id)
+    pos = {a.team.id: i for i, a in enumerate(aggs)}
+    pending = [
+        (pos[h], pos[a]) for h, a in
+        group.matches.filter(tournament=tournament, status=MatchStatus.PENDING)
+        .order_by("id").values_list("home_team_id", "away_team_id")
+    ]
+    # um passo por critério (tuplas do plano desfeitas): cada um pode parar num indefinido
+    steps = tuple(
+        (kind, name) for kind, names in _tiebreak_plan(rules.tiebreakers, _NAMES)
+        for name in (names if kind == "keys" else (None,))
+    )
+    s = _Search(
+        k=tournament.advance_per_group, win=rules.win, loss=rules.loss, steps=steps,
+        aggs=aggs, matches=pending, with_pending={t for match in pending for t in match},
+    )
+
+    status: Dict[int, str] = {}
+    for x, agg in enumerate(aggs):
+        if not _find(s, x, "out"):
+            status[agg.team.id] = CLINCHED
+        elif not _find(s, x, "in"):
+            status[agg.team.id] = ELIMINATED
+        else:
+            status[agg.team.id] = ALIVE
+    return ClinchResult(status=status, exact=s.exact, nodes=s.nodes)
+
+
+_LATEST = "tournaments:clinch:{}:latest"  # último resultado do grupo, de qualquer versão
+
+
+# ligado por core/wsgi.py e core/asgi.py: comandos (recalc_all e seus workers,
+# import_data, ...) recalculam em lote e nunca agendam clinch
+_serving = False
+
+
+def serve_precompute() -> None:
+    global _serving
+    _serving = True
+
+
+def _precompute() -> bool:
+    return _serving and bool(getattr(settings, "TOURNAMENTS_CLINCH", {}).get("PRECOMPUTE", False))
+
+
+def schedule_group_clinch(group_id: int) -> None:
+    """Agenda o cálculo em segundo plano (chamado no on_commit dos recálculos).
+
+    Só com TOURNAMENTS_CLINCH["PRECOMPUTE"] e num processo do servidor; sem isso,
+    a primeira leitura de cada versão agenda o cálculo (get_group_clinch).
+    """
+    if _precompute():
+        from .scheduler import enqueue_group_clinch
+
+        enqueue_group_clinch(group_id)
+
+
+def refresh_group_clinch(tournament: Tournament, group: Group) -> Dict[str, Any]:
+    """Calcula (se a versão atual ainda não estiver no cache) e guarda a situação do grupo."""
+    def compute():
+        result = clinch_status(tournament, group)
+        return {
+            "exact": result.exact,
+            "teams": [{"team_id": tid, "status": st} for tid, st in sorted(result.status.items())],
+        }
+
+    value = cached_group_value("clinch", tournament.id, group.id, compute)
+    shared_cache.set(_LATEST.format(group.id), value, None)
+    return value
+
+
+def get_group_clinch(tournament: Tournament, group: Group) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """(situação, atual) sem calcular: em miss agenda o cálculo e devolve o último resultado.
+
+    Situação None = nenhum cálculo concluído ainda para o grupo.
+    """
+    value = peek_group_value("clinch", tournament.id, group.id)
+    if value is not None:
+        return value, True
+    from .scheduler import enqueue_group_clinch
+
+    enqueue_group_clinch(group.id)
+    return shared_cache.get(_LATEST.format(group.id)), False
@@ -0,0 +1,216 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # backend opcional; o padrão continua sendo o "python"
+    np = None
+
+from tournaments.models import Match, Team
+from .ranking import CompiledRuleset, TeamAgg, _tiebreak_plan, match_report
+
+# Backend colunar: estatísticas do grupo em arrays NumPy indexados pela posição
+# do time (ordem de team_id) e H2H como matriz N×N. As partidas são lidas uma
+# vez para colunas por partida e aplicadas em lote com scatter-add (np.add.at).
+
+COLUMNS = (
+    "points", "wins", "losses", "wo_count",
+    "round_diff", "map_diff", "round_wins",
+    "win_times_ms", "win_times_n",
+)
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("O backend 'numpy' de agregação precisa do pacote numpy instalado.")
+
+
+@dataclass
+class ColumnarTable:
+    team_ids: "np.ndarray"
+    cols: Dict[str, "np.ndarray"]
+    h2h: Optional["np.ndarray"]  # h2h[i, j] = pontos de i contra j (None se o ruleset não usa H2H)
+
+    def __len__(self) -> int:
+        return len(self.team_ids)
+
+    def avg_win_time(self) -> "np.ndarray":
+        n = self.cols["win_times_n"]
+        out = np.full(len(n), np.inf)
+        # mesma conta de ranking._avg_win_time (ms / (1000 n), operandos exatos em float64)
+        np.divide(self.cols["win_times_ms"], n * 1000, out=out, where=n > 0)
+        return out
+
+
+def aggregate_columnar(
+    rules: CompiledRuleset,
+    team_ids: List[int],
+    matches: Iterable[Match],
+    with_h2h: Optional[bool] = None,
+) -> ColumnarTable:
+    """Agrega as partidas REPORTED do grupo em colunas (mesma semântica de build_group_table).
+
+    A matriz H2H (N×N) só é alocada se o ruleset usa H2H ou se `with_h2h=True`.
+    """
+    _require_numpy()
+    n = len(team_ids)
+    pos = {tid: i for i, tid in enumerate(team_ids)}
+
+    # 1) uma passada pelas partidas: colunas normalizadas (ou JSON validado) por partida
+    home_idx: List[int] = []
+    away_idx: List[int] = []
+    winner: List[int] = []   # 1 mandante, -1 visitante, 0 sem vencedor
+    is_wo: List[bool] = []
+    fields: List[Tuple[int, int, int, int, float]] = []
+    for m in matches:
+        rep = match_report(rules, m)
+        home_idx.append(pos[m.home_team_id])
+        away_idx.append(pos[m.away_team_id])
+        winner.append(1 if rep.winner == "home" else -1 if rep.winner == "away" else 0)
+        is_wo.append(bool(m.is_wo))
+        fields.append((rep.home_rounds, rep.away_rounds, rep.home_maps, rep.away_maps, rep.win_duration or 0))
+
+    cols = {
+        name: np.zeros(n, dtype=np.int64) for name in COLUMNS
+    }
+    if with_h2h is None:
+        with_h2h = any(kind == "h2h" for kind, _ in rules.plan)
+    h2h = np.zeros((n, n), dtype=np.int64) if with_h2h else None
+    table = ColumnarTable(team_ids=np.asarray(team_ids, dtype=np.int64), cols=cols, h2h=h2h)
+    if not home_idx:
+        return table
+
+    hi = np.asarray(home_idx, dtype=np.intp)
+    ai = np.asarray(away_idx, dtype=np.intp)
+    w = np.asarray(winner, dtype=np.int8)
+    wo = np.asarray(is_wo, dtype=bool)
+    hr, ar, hm, am, wt = (np.asarray(c) for c in zip(*fields))
+    wt = wt.astype(np.float64)
+    home_won = w == 1
+    away_won = w == -1
+
+    # 2) pontuação e H2H
+    home_pts = np.where(home_won, rules.win, np.where(away_won, rules.loss, 0))
+    away_pts = np.where(away_won, rules.win, np.where(home_won, rules.loss, 0))
+    if h2h is not None:
+        np.add.at(h2h, (hi, ai), home_pts)
+        np.add.at(h2h, (ai, hi), away_pts)
+
+    # WO: sem vencedor informado, o WO conta contra o mandante (como no backend python)
+    home_wo = wo & ~home_won
+    away_wo = wo & home_won
+    if rules.modality == "LOL" and rules.wo_loss is not None:
+        home_pts = home_pts + np.where(home_wo, rules.wo_loss, 0)
+        away_pts = away_pts + np.where(away_wo, rules.wo_loss, 0)
+
+    np.add.at(cols["points"], hi, home_pts)
+    np.add.at(cols["points"], ai, away_pts)
+    np.add.at(cols["wins"], hi, home_won)
+    np.add.at(cols["wins"], ai, away_won)
+    np.add.at(cols["losses"], hi, away_won)
+    np.add.at(cols["losses"], ai, home_won)
+    np.add.at(cols["wo_count"], hi, home_wo)
+    np.add.at(cols["wo_count"], ai, away_wo)
+
+    # 3) índices de modalidade (mesma leitura das colunas que os _apply_* fazem)
+    if rules.modality == "VALORANT":
+        rd = (hr - ar).astype(np.int64)
+        md = (hm - am).astype(np.int64)
+        np.add.at(cols["round_diff"], hi, rd)
+        np.add.at(cols["round_diff"], ai, -rd)
+        np.add.at(cols["map_diff"], hi, md)
+        np.add.at(cols["map_diff"], ai, -md)
+    elif rules.modality == "FREE_FIRE":
+        np.add.at(cols["round_wins"], hi, hr.astype(np.int64))
+        np.add.at(cols["round_wins"], ai, ar.astype(np.int64))
+
+    timed = wt > 0
+    wt_ms = np.rint(wt * 1000).astype(np.int64)  # = ranking.duration_ms
+    np.add.at(cols["win_times_ms"], hi[timed & home_won], wt_ms[timed & home_won])
+    np.add.at(cols["win_times_n"], hi[timed & home_won], 1)
+    np.add.at(cols["win_times_ms"], ai[timed & away_won], wt_ms[timed & away_won])
+    np.add.at(cols["win_times_n"], ai[timed & away_won], 1)
+    return table
+
+
+# -----------------------------
+# Ordenação sobre as colunas
+# -----------------------------
+_COLUMN_KEYS: Dict[str, Callable[[ColumnarTable], "np.ndarray"]] = {
+    "WO_FEWEST": lambda t: t.cols["wo_count"],
+    "WINS": lambda t: -t.cols["wins"],
+    "ROUND_DIFF": lambda t: -t.cols["round_diff"],
+    "MAP_DIFF": lambda t: -t.cols["map_diff"],
+    "ROUND_WINS": lambda t: -t.cols["round_wins"],
+    "AVG_WIN_TIME": ColumnarTable.avg_win_time,
+}
+
+
+@lru_cache(maxsize=64)
+def _column_plan(tiebreakers: Tuple[str, ...]) -> Tuple[Tuple[str, Any], ...]:
+    return _tiebreak_plan(tiebreakers, _COLUMN_KEYS)
+
+
+def _partition(idx: "np.ndarray", keys: List["np.ndarray"]) -> List["np.ndarray"]:
+    # lexsort é estável: empates continuam em ordem de team_id
+    order = np.lexsort(keys[::-1])
+    idx = idx[order]
+    keys = [k[order] for k in keys]
+    cut = np.zeros(len(idx), dtype=bool)
+    for k in keys:
+        cut[1:] |= k[1:] != k[:-1]
+    return np.split(idx, np.flatnonzero(cut))
+
+
+def _rank_idx(t: ColumnarTable, idx: "np.ndarray", plan, step: int, cache: Dict[Any, "np.ndarray"]) -> List["np.ndarray"]:
+    if len(idx) < 2 or step >= len(plan):
+        return [idx]
+
+    kind, fns = plan[step]
+    if kind == "keys":
+        keys = []
+        for f in fns:
+            if f not in cache:
+                cache[f] = f(t)
+            keys.append(cache[f][idx])
+        parts = _partition(idx, keys)
+        if len(parts) == 1:
+            return _rank_idx(t, idx, plan, step + 1, cache)
+        return [p for part in parts for p in _rank_idx(t, part, plan, step + 1, cache)]
+
+    # mini-liga: soma da submatriz dos empatados
+    mini = t.h2h[np.ix_(idx, idx)].sum(axis=1)
+    parts = _partition(idx, [-mini])
+    if len(parts) == 1:
+        return _rank_idx(t, idx, plan, step + 1, cache)
+    return [p for part in parts for p in _rank_idx(t, part, plan, step, cache)]
+
+
+def rank_columnar(rules: CompiledRuleset, table: ColumnarTable) -> "np.ndarray":
+    """Devolve as posições dos times (índices em `table`) do 1º ao último colocado."""
+    _require_numpy()
+    plan = _column_plan(rules.tiebreakers)
+    cache: Dict[Any, "np.ndarray"] = {}
+    idx = np.arange(len(table))
+    blocks = _partition(idx, [-table.cols["points"]])
+    out = [p for block in blocks for p in _rank_idx(table, block, plan, 0, cache)]
+    return np.concatenate(out) if out else idx
+
+
+def build_group_table_columnar(rules: CompiledRuleset, teams: List[Team], matches: Iterable[Match]) -> List[TeamAgg]:
+    """Equivalente a build_group_table usando o backend colunar.
+
+    Os TeamAgg só são materializados no final, para manter o mesmo retorno.
+    """
+    table = aggregate_columnar(rules, [t.id for t in teams], matches, with_h2h=True)
+    order = rank_columnar(rules, table)
+
+    cols = {name: table.cols[name].tolist() for name in COLUMNS}
+    out: List[TeamAgg] = []
+    for i in order.tolist():
+        agg = TeamAgg(team=teams[i], **{name: cols[name][i] for name in COLUMNS})
+        row = table.h2h[i]
+        agg.h2h_points = {int(table.team_ids[j]): int(row[j]) for j in np.flatnonzero(row)}
+        out.append(agg)
+    return out
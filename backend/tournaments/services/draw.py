@@ -0,0 +1,177 @@
+from __future__ import annotations
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+
+from tournaments.models import Enrollment, Group, Match, MatchStatus, Team, Tournament
+
+# Sorteio dos grupos e geração da tabela de jogos (todos contra todos).
+# Tudo é gravado com bulk_create numa única transação.
+
+DRAW_RANDOM = "random"   # sorteio puro
+DRAW_SEEDED = "seeded"   # potes por rating: cada grupo recebe um time de cada pote
+DRAW_SNAKE = "snake"     # serpentina determinística por rating (1-8, 16-9, ...)
+DRAW_METHODS = (DRAW_RANDOM, DRAW_SEEDED, DRAW_SNAKE)
+
+
+@dataclass
+class DrawResult:
+    groups: int
+    enrollments: int
+    matches: int
+
+
+def group_code(i: int) -> str:
+    """Código do i-ésimo grupo (0 -> A, 25 -> Z, 26 -> AA...)."""
+    letters = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+def team_rating(meta: Dict, key: str) -> float:
+    value = (meta or {}).get(key)
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+def assign_groups(
+    teams: Sequence[Tuple[int, float]],
+    groups_count: int,
+    method: str = DRAW_RANDOM,
+    rng: Optional[random.Random] = None,
+) -> List[List[int]]:
+    """Distribui (team_id, rating) em `groups_count` grupos de tamanhos que diferem no máximo 1."""
+    if method not in DRAW_METHODS:
+        raise ValueError(f"Draw method not supported: {method}")
+    rng = rng or random.Random()
+    groups: List[List[int]] = [[] for _ in range(groups_count)]
+
+    if method == DRAW_RANDOM:
+        ids = [tid for tid, _ in teams]
+        rng.shuffle(ids)
+        for i, tid in enumerate(ids):
+            groups[i % groups_count].append(tid)
+        return groups
+
+    # rating desc; empate de rating desempata pelo id (sorteio reprodutível)
+    ranked = [tid for tid, _ in sorted(teams, key=lambda t: (-t[1], t[0]))]
+    for pot_index, start in enumerate(range(0, len(ranked), groups_count)):
+        pot = ranked[start:start + groups_count]
+        if method == DRAW_SEEDED:
+            targets = rng.sample(range(groups_count), len(pot))
+        else:
+            targets = list(range(groups_count))
+            if pot_index % 2:
+                targets.reverse()
+        for tid, g in zip(pot, targets):
+            groups[g].append(tid)
+    return groups
+
+
+def round_robin(team_ids: Sequence[int], legs: int = 1) -> List[List[Tuple[int, int]]]:
+    """Rodadas (lista de (mandante, visitante)) pelo método do círculo.
+
+    Cada time joga uma vez por rodada (ou folga, com nº ímpar de times) e o
+    mando fica equilibrado: diferença mandante/visitante de no máximo 1.
+    Com legs=2 o returno repete as rodadas com o mando invertido.
+    """
+    if legs not in (1, 2):
+        raise ValueError("legs deve ser 1 ou 2")
+    ts = list(team_ids)
+    if len(ts) < 2:
+        return []
+    # nº par: o último time é o "pivô" e enfrenta quem estaria de folga no círculo ímpar
+    pivot = ts.pop() if len(ts) % 2 == 0 else None
+    m = len(ts)
+    order = list(range(m))
+    rounds: List[List[Tuple[int, int]]] = []
+    for r in range(m):
+        pairs: List[Tuple[int, int]] = []
+        if pivot is not None:
+            bye = ts[order[0]]
+            pairs.append((bye, pivot) if r % 2 == 0 else (pivot, bye))
+        for i in range(1, (m + 1) // 2):
+            a, b = sorted((order[i], order[m - i]))
+            # mando pela paridade dos índices: cada time recebe metade dos jogos do círculo
+            if (a + b) % 2 == 0:
+                a, b = b, a
+            pairs.append((ts[a], ts[b]))
+        rounds.append(pairs)
+        order = order[1:] + order[:1]
+    if legs == 2:
+        rounds += [[(b, a) for a, b in pairs] for pairs in rounds]
+    return rounds
+
+
+def _clear_draw(tournament: Tournament) -> None:
+    if tournament.matches.filter(status=MatchStatus.REPORTED).exists():
+        raise ValueError("Torneio já tem partidas reportadas; o sorteio não pode ser refeito")
+    # ordem importa: Match/Enrollment protegem Group
+    tournament.matches.all().delete()
+    tournament.standings.all().delete()
+    tournament.enrollments.all().delete()
+    tournament.groups.all().delete()
+
+
+@transaction.atomic
+def draw_tournament(
+    tournament: Tournament,
+    team_ids: Optional[Iterable[int]] = None,
+    method: str = DRAW_RANDOM,
+    rating_key: str = "rating",
+    seed: Optional[int] = None,
+    legs: int = 1,
+    replace: bool = False,
+) -> DrawResult:
+    """Sorteia os times em `tournament.groups_count` grupos e gera os jogos de cada grupo.
+
+    Sem `team_ids`, ressorteia os times já inscritos (exige `replace`). Com
+    `replace`, apaga grupos/inscrições/partidas anteriores (só se nada foi reportado).
+    """
+    if team_ids is None:
+        team_ids = list(tournament.enrollments.values_list("team_id", flat=True))
+    team_ids = list(dict.fromkeys(team_ids))
+
+    if tournament.groups.exists() or tournament.enrollments.exists():
+        if not replace:
+            raise ValueError("Torneio já tem grupos/inscrições; use replace para refazer o sorteio")
+        _clear_draw(tournament)
+
+    groups_count = tournament.groups_count
+    if len(team_ids) < 2 * groups_count:
+        raise ValueError(f"São necessários ao menos {2 * groups_count} times para {groups_count} grupo(s)")
+    if len(team_ids) > groups_count * tournament.teams_per_group:
+        raise ValueError(
+            f"{len(team_ids)} times excedem a capacidade ({groups_count} x {tournament.teams_per_group})"
+        )
+
+    metas = dict(Team.objects.filter(id__in=team_ids).values_list("id", "meta"))
+    missing = [tid for tid in team_ids if tid not in metas]
+    if missing:
+        raise ValueError(f"Time(s) inexistente(s): {missing[:20]}")
+
+    teams = [(tid, team_rating(metas[tid], rating_key)) for tid in team_ids]
+    drawn = assign_groups(teams, groups_count, method, random.Random(seed))
+
+    codes = [group_code(i) for i in range(groups_count)]
+    Group.objects.bulk_create([Group(tournament=tournament, code=c) for c in codes])
+    group_ids = dict(tournament.groups.values_list("code", "id"))
+
+    enrollments: List[Enrollment] = []
+    matches: List[Match] = []
+    for code, members in zip(codes, drawn):
+        gid = group_ids[code]
+        enrollments += [Enrollment(tournament=tournament, team_id=tid, group_id=gid) for tid in members]
+        for number, pairs in enumerate(round_robin(members, legs), start=1):
+            matches += [
+                Match(tournament=tournament, group_id=gid, home_team_id=h, away_team_id=a, round_number=number)
+                for h, a in pairs
+            ]
+
+    Enrollment.objects.bulk_create(enrollments, batch_size=2000)
+    Match.objects.bulk_create(matches, batch_size=2000)
+    return DrawResult(groups=len(codes), enrollments=len(enrollments), matches=len(matches))
@@ -0,0 +1,257 @@
+from __future__ import annotations
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from tournaments.models import Enrollment, Group, Match, Team, Tournament
+from .cache import bump_group_version
+
+# Importação em streaming de times, inscrições e partidas (CSV ou NDJSON).
+# O arquivo é lido linha a linha e gravado em lotes com bulk_create; só o lote
+# atual e os mapas nome->id ficam em memória.
+#
+# Colunas por tipo:
+#   team:       name[, meta (JSON)]
+#   enrollment: tournament_id, team, group
+#   match:      tournament_id, group, home, away[, scheduled_at]
+# Em NDJSON cada linha pode trazer "type" (team|enrollment|match) e misturar tipos.
+# bulk_create não dispara sinais: os grupos tocados têm a versão incrementada no commit.
+
+KINDS = ("team", "enrollment", "match")
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 2000
+MAX_ERRORS = 100
+
+
+@dataclass
+class ImportResult:
+    read: int = 0
+    # enviados ao bulk_create (duplicatas ignoradas pelo banco também contam)
+    written: Dict[str, int] = field(default_factory=lambda: {k: 0 for k in KINDS})
+    skipped: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Gera (nº da linha, registro) sem carregar o arquivo inteiro."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for n, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                rec = {"__error__": "linha não é JSON válido"}
+            if not isinstance(rec, dict):
+                rec = {"__error__": "linha não é um objeto JSON"}
+            yield n, rec
+    else:
+        raise ValueError(f"Format not supported: {fmt}")
+
+
+class _Resolver:
+    """Mapas em memória nome->id (times) e (torneio, código)->id (grupos), preenchidos sob demanda."""
+
+    def __init__(self):
+        self.teams: Dict[str, int] = {}
+        self.groups: Dict[Tuple[int, str], int] = {}
+        self.tournaments: Dict[int, bool] = {}
+
+    def known_tournament(self, tournament_id: int) -> bool:
+        if tournament_id not in self.tournaments:
+            self.tournaments[tournament_id] = Tournament.objects.filter(id=tournament_id).exists()
+        return self.tournaments[tournament_id]
+
+    def team_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        missing = {n for n in names if n not in self.teams}
+        if missing:
+            self.teams.update(Team.objects.filter(name__in=missing).values_list("name", "id"))
+        return self.teams
+
+    def group_ids(self, keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], int]:
+        missing = {k for k in keys if k not in self.groups}
+        if missing:
+            # grupos são criados sob demanda (unique_together tournament+code)
+            Group.objects.bulk_create(
+                [Group(tournament_id=t, code=c) for t, c in missing], ignore_conflicts=True
+            )
+            for gid, t, c in Group.objects.filter(
+                tournament_id__in={t for t, _ in missing}, code__in={c for _, c in missing}
+            ).values_list("id", "tournament_id", "code"):
+                self.groups[(t, c)] = gid
+        return self.groups
+
+
+def _bump_groups(objs) -> None:
+    for gid in {o.group_id for o in objs}:
+        transaction.on_commit(lambda gid=gid: bump_group_version(gid))
+
+
+def _flush_teams(chunk, resolver: _Resolver, result: ImportResult) -> None:
+    objs = []
+    for line, rec in chunk:
+        meta = rec.get("meta") or {}
+        if isinstance(meta, str):
+            try:
+                meta = json.loads(meta) if meta.strip() else {}
+            except ValueError:
+                result.error(line, "meta não é JSON válido")
+                continue
+        objs.append(Team(name=rec["name"], meta=meta))
+    # Team.name é unique: times já existentes são ignorados
+    Team.objects.bulk_create(objs, ignore_conflicts=True)
+    result.written["team"] += len(objs)
+
+
+def _flush_enrollments(chunk, resolver: _Resolver, result: ImportResult) -> None:
+    teams = resolver.team_ids(rec["team"] for _, rec in chunk)
+    groups = resolver.group_ids((rec["tournament_id"], rec["group"]) for _, rec in chunk)
+    objs = []
+    for line, rec in chunk:
+        team_id = teams.get(rec["team"])
+        if team_id is None:
+            result.error(line, f"time desconhecido: {rec['team']}")
+            continue
+        t = rec["tournament_id"]
+        objs.append(Enrollment(tournament_id=t, team_id=team_id, group_id=groups[(t, rec["group"])]))
+    # unique (tournament, team): reinscrições são ignoradas
+    Enrollment.objects.bulk_create(objs, ignore_conflicts=True)
+    result.written["enrollment"] += len(objs)
+    _bump_groups(objs)
+
+
+def _flush_matches(chunk, resolver: _Resolver, result: ImportResult) -> None:
+    teams = resolver.team_ids(n for _, rec in chunk for n in (rec["home"], rec["away"]))
+    groups = resolver.group_ids((rec["tournament_id"], rec["group"]) for _, rec in chunk)
+    objs, seen = [], set()
+    for line, rec in chunk:
+        home, away = teams.get(rec["home"]), teams.get(rec["away"])
+        if home is None or away is None:
+            result.error(line, f"time desconhecido: {rec['home'] if home is None else rec['away']}")
+            continue
+        if home == away:
+            # o CheckConstraint derrubaria o lote inteiro: filtra antes
+            result.error(line, "mandante e visitante iguais")
+            continue
+        t = rec["tournament_id"]
+        key = (t, groups[(t, rec["group"])], home, away)
+        if key in seen:
+            result.error(line, "partida repetida no arquivo")
+            continue
+        scheduled = rec.get("scheduled_at") or None
+        try:
+            scheduled = parse_datetime(scheduled) if scheduled else None
+        except ValueError:
+            scheduled = None
+        if rec.get("scheduled_at") and scheduled is None:
+            result.error(line, "scheduled_at inválido")
+            continue
+        seen.add(key)
+        objs.append(Match(
+            tournament_id=t, group_id=key[1], home_team_id=home, away_team_id=away,
+            scheduled_at=scheduled,
+        ))
+    # unique_together (tournament, group, home, away): confrontos já existentes são ignorados
+    Match.objects.bulk_create(objs, ignore_conflicts=True)
+    result.written["match"] += len(objs)
+    _bump_groups(objs)
+
+
+_FLUSHERS = {"team": _flush_teams, "enrollment": _flush_enrollments, "match": _flush_matches}
+_TEXT_FIELDS = ("name", "team", "group", "home", "away", "scheduled_at")
+# tamanho das colunas: valor longo demais derrubaria o lote inteiro (DataError no Postgres)
+_TEAM_NAME = Team._meta.get_field("name").max_length
+_MAX_LENGTH = {
+    "name": _TEAM_NAME, "team": _TEAM_NAME, "home": _TEAM_NAME, "away": _TEAM_NAME,
+    "group": Group._meta.get_field("code").max_length,
+}
+_REQUIRED = {
+    "team": ("name",),
+    "enrollment": ("tournament_id", "team", "group"),
+    "match": ("tournament_id", "group", "home", "away"),
+}
+
+
+def import_records(
+    lines: Iterable[str],
+    fmt: str,
+    kind: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> ImportResult:
+    """Importa um arquivo CSV/NDJSON em lotes. `kind` é obrigatório para CSV.
+
+    Cada lote roda na própria transação; linhas inválidas viram erro e não
+    interrompem a importação.
+    """
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"Kind not supported: {kind}")
+    if fmt == "csv" and kind is None:
+        raise ValueError("CSV precisa de kind (team|enrollment|match)")
+
+    result = ImportResult()
+    resolver = _Resolver()
+    chunks: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {k: [] for k in KINDS}
+
+    def flush(k: str) -> None:
+        if chunks[k]:
+            with transaction.atomic():
+                _FLUSHERS[k](chunks[k], resolver, result)
+            chunks[k] = []
+
+    for line, rec in iter_records(lines, fmt):
+        result.read += 1
+        if "__error__" in rec:
+            result.error(line, rec["__error__"])
+            continue
+        k = rec.get("type") or kind
+        if k not in KINDS:
+            result.error(line, f"tipo desconhecido: {k}")
+            continue
+        # NDJSON aceita qualquer tipo JSON; nomes/códigos precisam ser texto
+        not_text = [f for f in _TEXT_FIELDS if rec.get(f) is not None and not isinstance(rec[f], str)]
+        if not_text:
+            result.error(line, f"campos devem ser texto: {', '.join(not_text)}")
+            continue
+        for f in _TEXT_FIELDS:
+            if isinstance(rec.get(f), str):
+                rec[f] = rec[f].strip()
+        missing = [f for f in _REQUIRED[k] if not rec.get(f)]
+        if missing:
+            result.error(line, f"campos obrigatórios ausentes: {', '.join(missing)}")
+            continue
+        too_long = [f"{f} (máx. {n})" for f, n in _MAX_LENGTH.items() if len(rec.get(f) or "") > n]
+        if too_long:
+            result.error(line, f"campos longos demais: {', '.join(too_long)}")
+            continue
+        if "tournament_id" in _REQUIRED[k]:
+            try:
+                rec["tournament_id"] = int(rec["tournament_id"])
+            except (TypeError, ValueError):
+                result.error(line, "tournament_id inválido")
+                continue
+            if not resolver.known_tournament(rec["tournament_id"]):
+                result.error(line, f"torneio inexistente: {rec['tournament_id']}")
+                continue
+        chunks[k].append((line, rec))
+        if len(chunks[k]) >= chunk_size:
+            # times antes de inscrições/partidas que podem referenciá-los
+            for dep in KINDS[:KINDS.index(k) + 1]:
+                flush(dep)
+
+    for k in KINDS:
+        flush(k)
+    return result
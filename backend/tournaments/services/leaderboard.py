@@ -0,0 +1,169 @@
+from __future__ import annotations
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tournaments.models import LeaderboardEntry, Standing, Tournament
+from .live import PUBLIC_STATS
+from .ranking import CompiledRuleset, _tiebreak_plan, compile_tournament_ruleset
+
+# Quadro geral do torneio (LeaderboardEntry), derivado dos Standings dos grupos.
+# Cada recálculo de grupo trava e atualiza só as linhas do próprio grupo; as
+# posições gerais (overall_rank) são refeitas num passo curto depois do commit,
+# serializado por torneio. Assim recálculos de grupos diferentes do mesmo torneio
+# não esperam uns pelos outros. Servir o quadro é uma leitura pelo índice
+# (tournament, overall_rank).
+
+_INF = float("inf")
+_RANK_LOCK_NAMESPACE = zlib.crc32(b"tournaments.leaderboard") & 0x7FFFFFFF
+_ENTRY_FIELDS = ["group", "points", "penalty_points", "stats", "updated_at"]
+
+# critérios escalares sobre os stats do Standing ("menor é melhor"); H2H não se
+# aplica entre grupos e é ignorado pelo plano
+_STAT_KEYS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "WO_FEWEST": lambda s: s.get("wo_count", 0),
+    "WINS": lambda s: -s.get("wins", 0),
+    "ROUND_DIFF": lambda s: -s.get("round_diff", 0),
+    "MAP_DIFF": lambda s: -s.get("map_diff", 0),
+    "ROUND_WINS": lambda s: -s.get("round_wins", 0),
+    "AVG_WIN_TIME": lambda s: _INF if s.get("avg_win_time") is None else s["avg_win_time"],
+}
+
+
+def _sort_key(rules: CompiledRuleset) -> Callable[[LeaderboardEntry], Tuple]:
+    fns = [f for kind, step in _tiebreak_plan(rules.tiebreakers, _STAT_KEYS) if kind == "keys" for f in step]
+    return lambda e: (-e.points,) + tuple(f(e.stats) for f in fns) + (e.team_id,)
+
+
+def _fill(entry: LeaderboardEntry, rules: CompiledRuleset, group_id: int, stats: Dict[str, Any]) -> None:
+    entry.group_id = group_id
+    entry.stats = {k: stats.get(k) for k in PUBLIC_STATS}
+    entry.penalty_points = rules.wo_penalty_points * stats.get("wo_count", 0)
+    entry.points = stats.get("points", 0) + entry.penalty_points
+
+
+def _state(entry: LeaderboardEntry) -> Tuple:
+    return (entry.group_id, entry.points, entry.penalty_points, entry.stats, entry.overall_rank)
+
+
+@transaction.atomic
+def refresh_leaderboard(
+    tournament: Tournament, group_ids: Optional[Iterable[int]] = None
+) -> List[LeaderboardEntry]:
+    """Atualiza o quadro geral com os Standings de `group_ids` (None = todos os grupos).
+
+    Com `group_ids`, trava e grava só as linhas desses grupos (e de times que
+    entraram neles) e agenda rank_leaderboard para depois do commit. Sem, refaz
+    o quadro inteiro, posições incluídas, na mesma transação.
+    Grava apenas as linhas novas, removidas ou com valores/posição diferentes.
+    """
+    rules = compile_tournament_ruleset(tournament)
+    groups = None if group_ids is None else set(group_ids)
+
+    standings = Standing.objects.filter(tournament=tournament)
+    entries_qs = LeaderboardEntry.objects.select_for_update().filter(tournament=tournament)
+    if groups is not None:
+        standings = standings.filter(group_id__in=groups)
+    fresh = {team_id: (group_id, stats) for team_id, group_id, stats in
+             standings.values_list("team_id", "group_id", "stats")}
+    if groups is not None:
+        entries_qs = entries_qs.filter(Q(group_id__in=groups) | Q(team_id__in=list(fresh)))
+
+    entries = {e.team_id: e for e in entries_qs}
+    before = {tid: _state(e) for tid, e in entries.items()}
+
+    # times que saíram dos grupos atualizados (ou do torneio)
+    gone = [tid for tid, e in entries.items() if tid not in fresh and (groups is None or e.group_id in groups)]
+    removed = [entries.pop(tid).pk for tid in gone]
+
+    for team_id, (group_id, stats) in fresh.items():
+        entry = entries.get(team_id)
+        if entry is None:
+            entry = entries[team_id] = LeaderboardEntry(tournament=tournament, team_id=team_id)
+        _fill(entry, rules, group_id, stats or {})
+
+    if groups is None:
+        ordered = sorted(entries.values(), key=_sort_key(rules))
+        for rank, entry in enumerate(ordered, start=1):
+            entry.overall_rank = rank
+        fields = _ENTRY_FIELDS + ["overall_rank"]
+    else:
+        ordered = list(entries.values())
+        fields = _ENTRY_FIELDS
+
+    created, changed = [], []
+    for entry in ordered:
+        if entry.pk is None:
+            created.append(entry)
+        elif _state(entry) != before[entry.team_id]:
+            changed.append(entry)
+
+    if removed:
+        LeaderboardEntry.objects.filter(pk__in=removed).delete()
+    if changed:
+        now = timezone.now()
+        for entry in changed:
+            entry.updated_at = now  # bulk_update não aplica auto_now
+        LeaderboardEntry.objects.bulk_update(changed, fields, batch_size=1000)
+    if created:
+        LeaderboardEntry.objects.bulk_create(created, batch_size=1000)
+    if groups is not None and (removed or changed or created):
+        transaction.on_commit(lambda: rank_leaderboard(tournament))
+    return ordered
+
+
+def _rank_lock(tournament_id: int) -> None:
+    # um passo de posições por torneio de cada vez (liberado no commit); fora do
+    # Postgres a escrita já é serializada pelo banco
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", [_RANK_LOCK_NAMESPACE, tournament_id])
+
+
+@transaction.atomic
+def rank_leaderboard(tournament: Tournament) -> int:
+    """Refaz as posições gerais do torneio; grava só as que mudaram. Devolve quantas.
+
+    Não trava as linhas: só overall_rank é escrito, e os recálculos de grupo não
+    escrevem esse campo.
+    """
+    _rank_lock(tournament.id)
+    rules = compile_tournament_ruleset(tournament)
+    entries = list(
+        LeaderboardEntry.objects.filter(tournament=tournament)
+        .only("id", "team_id", "points", "stats", "overall_rank")
+    )
+    changed = []
+    for rank, entry in enumerate(sorted(entries, key=_sort_key(rules)), start=1):
+        if entry.overall_rank != rank:
+            entry.overall_rank = rank
+            changed.append(entry)
+    if changed:
+        LeaderboardEntry.objects.bulk_update(changed, ["overall_rank"], batch_size=1000)
+    return len(changed)
+
+
+def get_leaderboard(tournament_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Quadro geral pronto para servir: uma query pelo índice (tournament, overall_rank)."""
+    qs = (
+        LeaderboardEntry.objects.filter(tournament_id=tournament_id)
+        .order_by("overall_rank")
+        .values("overall_rank", "team_id", "team__name", "group_id", "points", "penalty_points", "stats")
+    )
+    if limit:
+        qs = qs[:limit]
+    return [
+        {
+            "rank": row["overall_rank"],
+            "team_id": row["team_id"],
+            "team": row["team__name"],
+            "group_id": row["group_id"],
+            "points": row["points"],
+            "penalty_points": row["penalty_points"],
+            "stats": row["stats"],
+        }
+        for row in qs
+    ]
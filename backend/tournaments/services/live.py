@@ -0,0 +1,237 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import transaction
+
+from tournaments.models import Standing
+
+# Push de standings ao vivo (SSE) por torneio e por grupo. Cada recálculo que
+# muda a tabela publica, após o commit, um diff compacto; o frame é serializado
+# uma única vez e distribuído em memória para todas as conexões do processo.
+#
+# Entre processos (workers WSGI, recalc_all, admin -> processo ASGI das conexões)
+# o transporte é o cache do Django, com TOURNAMENTS_LIVE_SHARED ligado:
+#   - quem publica grava o frame numa sequência (seq + uma chave por evento);
+#   - cada processo com conexões roda um relay que lê a sequência a cada
+#     TOURNAMENTS_LIVE_POLL segundos e entrega localmente os eventos dos outros;
+#   - o relay marca no cache os canais assistidos (com TTL), para que processos
+#     sem conexões saibam que vale a pena montar o diff.
+# Exige um cache compartilhado (Redis/Memcached). Desligado, só recálculos feitos
+# no próprio processo ASGI chegam aos clientes.
+
+# chaves de stats enviadas ao cliente (as internas do caminho incremental ficam de fora)
+PUBLIC_STATS = ("points", "wins", "losses", "wo_count", "round_diff", "map_diff", "round_wins", "avg_win_time")
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+
+_SEQ = "tournaments:live:seq"
+_EVENT = "tournaments:live:event:{}"
+_WATCH = "tournaments:live:watch:{}"
+EVENT_TTL = 60        # segundos que um evento fica disponível para os relays
+WATCH_TTL = 30        # canal assistido sem renovação expira
+MAX_PULL = 500        # relay atrasado mais que isso: resync em vez de ler tudo
+
+# identifica este processo: o relay ignora os eventos que ele mesmo publicou
+_ORIGIN = uuid.uuid4().hex
+
+
+def _backlog() -> int:
+    return getattr(settings, "TOURNAMENTS_LIVE_BACKLOG", 64)
+
+
+def shared_enabled() -> bool:
+    return getattr(settings, "TOURNAMENTS_LIVE_SHARED", False)
+
+
+def _poll_interval() -> float:
+    return getattr(settings, "TOURNAMENTS_LIVE_POLL", 0.5)
+
+
+def group_channel(group_id: int) -> str:
+    return f"group:{group_id}"
+
+
+def tournament_channel(tournament_id: int) -> str:
+    return f"tournament:{tournament_id}"
+
+
+class Subscriber:
+    """Uma conexão: fila limitada no loop da conexão.
+
+    Se o cliente não acompanha, a fila é descartada e ele recebe um "resync"
+    (deve refazer o GET da tabela) em vez de acumular backlog sem limite.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, backlog: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=backlog)
+
+    def offer(self, frame: bytes) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+
+
+class Broker:
+    def __init__(self):
+        self._subs: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._relay: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str) -> Subscriber:
+        loop = asyncio.get_running_loop()
+        sub = Subscriber(loop, _backlog())
+        with self._lock:
+            self._subs[channel].add(sub)
+        if shared_enabled() and (self._relay is None or self._relay.done()):
+            self._relay = loop.create_task(self._run_relay())
+        return sub
+
+    def unsubscribe(self, channel: str, sub: Subscriber) -> None:
+        with self._lock:
+            subs = self._subs.get(channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[channel]
+
+    def has_subscribers(self, channels: Iterable[str]) -> bool:
+        return any(self._subs.get(c) for c in channels)
+
+    def channels(self) -> List[str]:
+        with self._lock:
+            return list(self._subs)
+
+    def publish(self, channels: Iterable[str], frame: bytes) -> int:
+        """Entrega `frame` a todos os inscritos; um único salto de thread por loop."""
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscriber]] = defaultdict(list)
+        with self._lock:
+            for c in channels:
+                for sub in self._subs.get(c, ()):
+                    by_loop[sub.loop].append(sub)
+        for loop, subs in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, subs, frame)
+            except RuntimeError:  # loop encerrado
+                pass
+        return sum(len(s) for s in by_loop.values())
+
+    async def _run_relay(self) -> None:
+        """Relay do cache compartilhado; termina quando o processo fica sem conexões."""
+        last = await shared_cache.aget(_SEQ, 0)
+        while True:
+            channels = self.channels()
+            if not channels:
+                return
+            await shared_cache.aset_many({_WATCH.format(c): 1 for c in channels}, WATCH_TTL)
+            await asyncio.sleep(_poll_interval())
+            last, events = await pull_events(last)
+            for channels, frame in events:
+                self.publish(channels, frame)
+
+
+def _deliver(subs: List[Subscriber], frame: bytes) -> None:
+    for sub in subs:
+        sub.offer(frame)
+
+
+broker = Broker()
+
+
+# -----------------------------
+# Diffs de standings
+# -----------------------------
+Snapshot = Dict[int, Tuple[int, Dict[str, Any]]]  # team_id -> (rank, stats)
+
+
+def _channels(tournament_id: int, group_id: int) -> Tuple[str, str]:
+    return tournament_channel(tournament_id), group_channel(group_id)
+
+
+def is_watched(tournament_id: int, group_id: int) -> bool:
+    channels = _channels(tournament_id, group_id)
+    if broker.has_subscribers(channels):
+        return True
+    return shared_enabled() and bool(shared_cache.get_many([_WATCH.format(c) for c in channels]))
+
+
+def _publish(channels: Tuple[str, ...], frame: bytes) -> None:
+    broker.publish(channels, frame)
+    if shared_enabled():
+        shared_cache.add(_SEQ, 0, None)
+        seq = shared_cache.incr(_SEQ)
+        shared_cache.set(_EVENT.format(seq), (_ORIGIN, channels, frame), EVENT_TTL)
+
+
+async def pull_events(last: int) -> Tuple[int, List[Tuple[Tuple[str, ...], bytes]]]:
+    """Eventos de outros processos publicados depois de `last`: (nova seq, [(canais, frame)]).
+
+    Evento perdido (expirou) ou atraso grande viram um resync para todas as conexões.
+    """
+    seq = await shared_cache.aget(_SEQ, 0)
+    if seq <= last:
+        return seq, []
+    everyone = tuple(broker.channels())
+    if seq - last > MAX_PULL:
+        return seq, [(everyone, RESYNC_FRAME)]
+    keys = [_EVENT.format(n) for n in range(last + 1, seq + 1)]
+    found = await shared_cache.aget_many(keys)
+    if len(found) < len(keys):
+        return seq, [(everyone, RESYNC_FRAME)]
+    return seq, [(channels, frame) for origin, channels, frame in map(found.get, keys) if origin != _ORIGIN]
+
+
+def snapshot_groups(tournament_id: int, group_ids: Iterable[int]) -> Dict[int, Snapshot]:
+    """Estado atual dos grupos assistidos (só esses custam uma query)."""
+    watched = [gid for gid in group_ids if is_watched(tournament_id, gid)]
+    snaps: Dict[int, Snapshot] = {gid: {} for gid in watched}
+    if watched:
+        rows = Standing.objects.filter(tournament_id=tournament_id, group_id__in=watched)
+        for group_id, team_id, rank, stats in rows.values_list("group_id", "team_id", "order_rank", "stats"):
+            snaps[group_id][team_id] = (rank, stats)
+    return snaps
+
+
+def standings_diff(before: Snapshot, rows: Iterable[Standing]) -> Optional[Dict[str, Any]]:
+    changed = []
+    seen = set()
+    for row in rows:
+        seen.add(row.team_id)
+        old_rank, old_stats = before.get(row.team_id, (None, {}))
+        stats = {k: row.stats.get(k) for k in PUBLIC_STATS if row.stats.get(k) != (old_stats or {}).get(k)}
+        if row.order_rank != old_rank or stats:
+            entry: Dict[str, Any] = {"team_id": row.team_id, "rank": row.order_rank}
+            if stats:
+                entry["stats"] = stats
+            changed.append(entry)
+    removed = sorted(set(before) - seen)
+    if not changed and not removed:
+        return None
+    diff: Dict[str, Any] = {"changed": changed}
+    if removed:
+        diff["removed"] = removed
+    return diff
+
+
+def publish_group_diff(tournament_id: int, group_id: int, before: Optional[Snapshot], rows: List[Standing]) -> None:
+    """Publica (no commit) o diff do grupo, se alguém estiver assistindo."""
+    if before is None:
+        return
+    diff = standings_diff(before, rows)
+    if diff is None:
+        return
+    diff.update(tournament_id=tournament_id, group_id=group_id)
+    frame = f"event: standings\ndata: {json.dumps(diff, separators=(',', ':'))}\n\n".encode()
+    channels = _channels(tournament_id, group_id)
+    transaction.on_commit(lambda: _publish(channels, frame))
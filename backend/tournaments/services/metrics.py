@@ -0,0 +1,189 @@
+from __future__ import annotations
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+# Métricas em processo (histogramas e contadores) expostas em texto Prometheus
+# no /metrics. Desligadas (padrão), `timed()` devolve um context manager vazio
+# compartilhado e `observe()`/`inc()` retornam na primeira linha.
+#
+# Cada processo do servidor expõe os próprios números; o Prometheus soma as
+# instâncias. Observadores extras (logs, StatsD...) via add_observer().
+
+PHASE_SECONDS = "tournaments_phase_seconds"
+RECALC_SECONDS = "tournaments_recalc_seconds"
+MATCHES_AGGREGATED = "tournaments_matches_aggregated_total"
+REQUEST_SECONDS = "http_request_duration_seconds"
+REQUEST_QUERIES = "http_request_db_queries"
+REQUEST_DB_SECONDS = "http_request_db_seconds"
+
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# fases de compute_group_table / recalc_*
+PHASE_ENROLLMENTS = "enrollments"
+PHASE_MATCHES = "matches"
+PHASE_VALIDATION = "validation"
+PHASE_AGGREGATION = "aggregation"
+PHASE_SORT = "sort"
+PHASE_PERSIST = "persist"
+
+_HELP = {
+    PHASE_SECONDS: ("histogram", "Duração das fases do ranking/recálculo.", TIME_BUCKETS),
+    RECALC_SECONDS: ("histogram", "Duração total dos recálculos de standings.", TIME_BUCKETS),
+    MATCHES_AGGREGATED: ("counter", "Partidas agregadas no cálculo das tabelas.", None),
+    REQUEST_SECONDS: ("histogram", "Duração das requisições HTTP.", TIME_BUCKETS),
+    REQUEST_QUERIES: ("histogram", "Queries ao banco por requisição.", QUERY_BUCKETS),
+    REQUEST_DB_SECONDS: ("histogram", "Tempo em banco por requisição.", TIME_BUCKETS),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_enabled: Optional[bool] = None
+_lock = threading.Lock()
+# histograma: labels -> [contagens por bucket (+Inf no fim), soma]; contador: labels -> valor
+_series: Dict[str, Dict[Labels, Any]] = {name: {} for name in _HELP}
+_observers: List[Callable[[str, float, Dict[str, str]], None]] = []
+
+
+def enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        _enabled = bool(getattr(settings, "TOURNAMENTS_METRICS", {}).get("ENABLED", False))
+    return _enabled
+
+
+def set_enabled(value: Optional[bool]) -> None:
+    """Força ligado/desligado (None volta a ler o settings)."""
+    global _enabled
+    _enabled = value
+
+
+def add_observer(fn: Callable[[str, float, Dict[str, str]], None]) -> None:
+    """Registra um callback chamado a cada observe()/inc() (métrica, valor, labels)."""
+    _observers.append(fn)
+
+
+def _key(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    if not enabled():
+        return
+    buckets = _HELP[name][2]
+    key = _key(labels)
+    with _lock:
+        series = _series[name].get(key)
+        if series is None:
+            series = _series[name][key] = [[0] * (len(buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(buckets, value)] += 1
+        series[1] += value
+    for fn in _observers:
+        fn(name, value, labels)
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    if not enabled():
+        return
+    key = _key(labels)
+    with _lock:
+        _series[name][key] = _series[name].get(key, 0) + value
+    for fn in _observers:
+        fn(name, value, labels)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: Dict[str, Any]):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(name: str, **labels: Any):
+    """Context manager que observa a duração do bloco em `name` (histograma)."""
+    if not enabled():
+        return _NOOP
+    return _Timer(name, labels)
+
+
+def phase(name: str, modality: str):
+    return timed(PHASE_SECONDS, phase=name, modality=modality)
+
+
+def reset_metrics() -> None:
+    with _lock:
+        for series in _series.values():
+            series.clear()
+
+
+# -----------------------------
+# Exposição (formato texto do Prometheus)
+# -----------------------------
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + inner + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    lines: List[str] = []
+    with _lock:
+        snapshot = {
+            name: {k: ([list(v[0]), v[1]] if isinstance(v, list) else v) for k, v in series.items()}
+            for name, series in _series.items()
+        }
+    for name, (kind, help_text, buckets) in _HELP.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(snapshot[name].items()):
+            if kind == "counter":
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_number(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += n
+                le = bound if bound == "+Inf" else _fmt_number(bound)
+                lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', str(le)),))} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_number(total)}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import django
+from django.db import connections
+
+SHARD_TOURNAMENT = "tournament"
+SHARD_GROUP = "group"
+
+
+@dataclass
+class ShardResult:
+    kind: str
+    pk: int
+    label: str
+    rows: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _init_worker():
+    # cada processo abre a própria conexão; nada herdado do pai é reaproveitado
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+    connections.close_all()
+
+
+def _recalc_shard(kind: str, pk: int) -> ShardResult:
+    """Executa um shard no worker. Erros viram texto (exceções nem sempre são picklable)."""
+    from tournaments.models import Group, Tournament
+    from .recalc import recalc_group_standings, recalc_tournament_standings
+
+    label = f"{kind}:{pk}"
+    try:
+        if kind == SHARD_TOURNAMENT:
+            tournament = Tournament.objects.get(pk=pk)
+            label = str(tournament)
+            rows = sum(len(r) for r in recalc_tournament_standings(tournament).values())
+        else:
+            group = Group.objects.select_related("tournament").get(pk=pk)
+            label = str(group)
+            rows = len(recalc_group_standings(group.tournament, group))
+        return ShardResult(kind, pk, label, rows=rows)
+    except Exception as exc:  # um report inválido não derruba o lote
+        return ShardResult(kind, pk, label, error=f"{type(exc).__name__}: {exc}")
+
+
+def build_shards(tournament_ids: Iterable[int], shard: str = SHARD_TOURNAMENT) -> List[Tuple[str, int]]:
+    from tournaments.models import Group
+
+    tournament_ids = list(tournament_ids)
+    if shard == SHARD_TOURNAMENT:
+        return [(SHARD_TOURNAMENT, pk) for pk in tournament_ids]
+    if shard == SHARD_GROUP:
+        group_ids = (
+            Group.objects.filter(tournament_id__in=tournament_ids)
+            .order_by("tournament_id", "id")
+            .values_list("id", flat=True)
+        )
+        return [(SHARD_GROUP, pk) for pk in group_ids]
+    raise ValueError(f"Shard not supported: {shard}")
+
+
+def recalc_parallel(
+    shards: List[Tuple[str, int]],
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[int, int, ShardResult], None]] = None,
+) -> Iterator[ShardResult]:
+    """Distribui os shards num ProcessPoolExecutor e devolve os resultados conforme terminam.
+
+    `on_result(done, total, result)` é chamado a cada shard concluído (progresso).
+    Com workers=1 roda no próprio processo, útil para depuração.
+    """
+    total = len(shards)
+    if workers == 1:
+        for done, (kind, pk) in enumerate(shards, start=1):
+            result = _recalc_shard(kind, pk)
+            if on_result:
+                on_result(done, total, result)
+            yield result
+        return
+
+    # conexões do pai não podem ser compartilhadas com os processos filhos
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_recalc_shard, kind, pk) for kind, pk in shards]
+        for done, fut in enumerate(as_completed(futures), start=1):
+            result = fut.result()
+            if on_result:
+                on_result(done, total, result)
+            yield result
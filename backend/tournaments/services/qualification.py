@@ -0,0 +1,198 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tournaments.models import Tournament
+from .cache import cached_tournament_value
+from .ranking import (
+    CompiledRuleset,
+    TeamAgg,
+    _avg_win_time,
+    _tiebreak_plan,
+    compile_tournament_ruleset,
+    compute_tournament_tables,
+)
+
+# Classificação para o mata-mata.
+#
+# Os `advance_per_group` primeiros de cada grupo avançam direto. Vagas extras
+# (para completar a chave) vão para os melhores da posição seguinte, comparados
+# entre grupos. Como os grupos podem ter tamanhos diferentes, a comparação usa
+# médias por partida jogada; H2H é ignorado (times de grupos diferentes não se
+# enfrentaram) e os demais critérios seguem a ordem do ruleset.
+
+
+def _played(a: TeamAgg) -> int:
+    return a.wins + a.losses
+
+
+def _per_match(value: float, a: TeamAgg) -> float:
+    n = _played(a)
+    return value / n if n else 0.0
+
+
+# mesmas chaves de ranking._SCALAR_KEYS ("menor é melhor"), normalizadas por partida
+_CROSS_KEYS: Dict[str, Callable[[TeamAgg], Any]] = {
+    "WO_FEWEST": lambda a: _per_match(a.wo_count, a),
+    "WINS": lambda a: -_per_match(a.wins, a),
+    "ROUND_DIFF": lambda a: -_per_match(a.round_diff, a),
+    "MAP_DIFF": lambda a: -_per_match(a.map_diff, a),
+    "ROUND_WINS": lambda a: -_per_match(a.round_wins, a),
+    "AVG_WIN_TIME": _avg_win_time,  # já é média
+}
+
+
+def cross_group_key(rules: CompiledRuleset) -> Callable[[TeamAgg], Tuple]:
+    """Chave de ordenação entre grupos: pontos por partida + tiebreakers escalares."""
+    fns = [f for kind, step in _tiebreak_plan(rules.tiebreakers, _CROSS_KEYS) if kind == "keys" for f in step]
+    return lambda a: (-_per_match(a.points, a),) + tuple(f(a) for f in fns)
+
+
+@dataclass
+class Qualified:
+    team_id: int
+    team: str
+    group_id: int
+    position: int          # posição no grupo
+    direct: bool           # classificado direto (posição <= advance_per_group)
+    seed: int = 0
+
+
+def bracket_order(size: int) -> List[int]:
+    """Seeds na ordem da chave (1 e 2 só se cruzam na final): 4 -> [1, 4, 2, 3]."""
+    order = [1]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [s for seed in order for s in (seed, n + 1 - seed)]
+    return order
+
+
+def _next_pow2(n: int) -> int:
+    size = 1
+    while size < n:
+        size *= 2
+    return size
+
+
+def _avoid_same_group(pairs: List[List[Optional[Qualified]]]) -> int:
+    """Troca o seed mais baixo entre confrontos para evitar times do mesmo grupo na 1ª rodada.
+
+    Devolve quantos confrontos continuam entre times do mesmo grupo (nenhuma troca
+    resolveu, p.ex. um grupo com mais da metade dos classificados).
+    """
+    def clash(pair):
+        a, b = pair
+        return a is not None and b is not None and a.group_id == b.group_id
+
+    for i, pair in enumerate(pairs):
+        if not clash(pair):
+            continue
+        # procura a troca mais próxima (seeds parecidos) que resolva os dois confrontos
+        for j in sorted(range(len(pairs)), key=lambda j: abs(j - i)):
+            other = pairs[j]
+            if j == i or other[1] is None:
+                continue
+            pair[1], other[1] = other[1], pair[1]
+            if not clash(pair) and not clash(other):
+                break
+            pair[1], other[1] = other[1], pair[1]
+    return sum(map(clash, pairs))
+
+
+@dataclass
+class QualificationResult:
+    qualified: List[Qualified]                         # em ordem de seed
+    bracket: List[Tuple[Optional[Qualified], Optional[Qualified]]]  # 1ª rodada; None = bye
+    cutoff_tied: bool                                  # último classificado empatado com o 1º de fora
+    group_clashes: int = 0                             # confrontos da 1ª rodada entre times do mesmo grupo
+
+
+def qualify(
+    tournament: Tournament,
+    tables: Optional[Dict[int, List[TeamAgg]]] = None,
+    bracket_size: Optional[int] = None,
+) -> QualificationResult:
+    """Classificados, seeds e chave do mata-mata a partir das tabelas de grupo.
+
+    `bracket_size` (potência de 2) define as vagas; padrão: menor potência de 2
+    que comporte os classificados diretos. Vagas além dos diretos vão para os
+    melhores da posição seguinte entre os grupos.
+    """
+    rules = compile_tournament_ruleset(tournament)
+    tables = tables if tables is not None else compute_tournament_tables(tournament, rules)
+    key = cross_group_key(rules)
+    k = tournament.advance_per_group
+
+    # por posição: lista de (agg, group_id), ordenada entre grupos
+    by_position: Dict[int, List[Tuple[TeamAgg, int]]] = {}
+    for group_id, table in sorted(tables.items()):
+        for pos, agg in enumerate(table, start=1):
+            by_position.setdefault(pos, []).append((agg, group_id))
+    for entries in by_position.values():
+        entries.sort(key=lambda e: (key(e[0]), e[0].team.id))
+
+    direct = [(pos, agg, gid) for pos in range(1, k + 1) for agg, gid in by_position.get(pos, [])]
+    size = bracket_size or _next_pow2(len(direct))
+    if size & (size - 1) or size < 2:
+        raise ValueError("bracket_size deve ser potência de 2 (>= 2)")
+    if size < len(direct):
+        raise ValueError(f"Chave de {size} não comporta {len(direct)} classificados diretos")
+
+    # vagas restantes: melhores das posições seguintes, posição a posição
+    extra: List[Tuple[int, TeamAgg, int]] = []
+    cutoff_tied = False
+    pos = k + 1
+    while len(direct) + len(extra) < size and pos in by_position:
+        entries = by_position[pos]
+        free = size - len(direct) - len(extra)
+        extra += [(pos, agg, gid) for agg, gid in entries[:free]]
+        if len(entries) > free:
+            cutoff_tied = key(entries[free - 1][0]) == key(entries[free][0])
+        pos += 1
+
+    qualified = [
+        Qualified(team_id=agg.team.id, team=agg.team.name, group_id=gid, position=p, direct=p <= k)
+        for p, agg, gid in direct + extra
+    ]
+    # seeds: melhor posição primeiro; dentro da posição, a ordem entre grupos
+    for seed, q in enumerate(qualified, start=1):
+        q.seed = seed
+
+    by_seed = {q.seed: q for q in qualified}
+    order = bracket_order(size)
+    pairs = [[by_seed.get(order[i]), by_seed.get(order[i + 1])] for i in range(0, size, 2)]
+    clashes = _avoid_same_group(pairs)
+    return QualificationResult(
+        qualified=qualified,
+        bracket=[(a, b) for a, b in pairs],
+        cutoff_tied=cutoff_tied,
+        group_clashes=clashes,
+    )
+
+
+def _qualified_dict(q: Optional[Qualified]) -> Optional[Dict[str, Any]]:
+    if q is None:
+        return None
+    return {
+        "seed": q.seed, "team_id": q.team_id, "team": q.team,
+        "group_id": q.group_id, "position": q.position, "direct": q.direct,
+    }
+
+
+def get_qualification(tournament: Tournament, bracket_size: Optional[int] = None) -> Dict[str, Any]:
+    """Classificação serializada, cacheada pela versão de todos os grupos do torneio.
+
+    Enquanto nenhum grupo muda, repetir a consulta custa só leituras de cache.
+    """
+    group_ids = list(tournament.groups.values_list("id", flat=True))
+
+    def compute():
+        result = qualify(tournament, bracket_size=bracket_size)
+        return {
+            "qualified": [_qualified_dict(q) for q in result.qualified],
+            "bracket": [[_qualified_dict(a), _qualified_dict(b)] for a, b in result.bracket],
+            "cutoff_tied": result.cutoff_tied,
+            "group_clashes": result.group_clashes,
+        }
+
+    return cached_tournament_value(f"qualification:{bracket_size or 0}", tournament.id, group_ids, compute)
@@ -1,12 +1,32 @@
 from __future__ import annotations
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple, Any
+import json
+from functools import lru_cache
+from itertools import groupby
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from statistics import mean
 
+from django.conf import settings
 from django.db.models import Q
 
-from tournaments.models import Tournament, Match, Team
-from tournaments.modalities import get_ruleset, validate_report
+from tournaments.models import Tournament, Match, MatchStatus, Team
+from tournaments.modalities import (
+    NormalizedReport,
+    get_ruleset,
+    normalize_report_free_fire,
+    normalize_report_lol,
+    normalize_report_valorant,
+    validate_report_free_fire,
+    validate_report_lol,
+    validate_report_valorant,
+)
+from tournaments.modalities.schema import FieldError, ReportValidationError, compile_schema
+from . import metrics
+
+
+BACKEND_PYTHON = "python"
+BACKEND_NUMPY = "numpy"
 
 
 @dataclass
@@ -20,26 +40,31 @@ class TeamAgg:
     # índices por modalidade (usados em desempates)
     round_diff: int = 0           # Valorant
     map_diff: int = 0             # Valorant (em MD3)
-    avg_win_times: List[float] = field(default_factory=list)  # Valorant/LoL
     round_wins: int = 0           # Free Fire (total de rounds vencidos)
-    win_times_sum: float = 0.0    # para calcular média rápido
+    win_times_ms: int = 0         # soma dos tempos de vitória em ms (inteiro: somar/desfazer é exato)
     win_times_n: int = 0
 
     # head-to-head cache (pontos contra cada equipe)
     h2h_points: Dict[int, int] = field(default_factory=dict)  # key = team_id adversário
 
 
-def _apply_valorant(agg_home: TeamAgg, agg_away: TeamAgg, indices: Dict[str, Any], ruleset: Dict[str, Any], winner: str, is_wo: bool):
+def duration_ms(seconds: float) -> int:
+    """Duração em ms inteiros; as somas de tempos de vitória não dependem da ordem."""
+    return round(seconds * 1000)
+
+
+def _apply_valorant(agg_home: TeamAgg, agg_away: TeamAgg, rep: NormalizedReport, rules: CompiledRuleset, is_wo: bool):
+    winner = rep.winner
     # Pontuação
     if winner == "home":
-        agg_home.points += ruleset["scoring"]["win"]
+        agg_home.points += rules.win
         agg_home.wins += 1
-        agg_away.points += ruleset["scoring"]["loss"]
+        agg_away.points += rules.loss
         agg_away.losses += 1
     elif winner == "away":
-        agg_away.points += ruleset["scoring"]["win"]
+        agg_away.points += rules.win
         agg_away.wins += 1
-        agg_home.points += ruleset["scoring"]["loss"]
+        agg_home.points += rules.loss
         agg_home.losses += 1
 
     if is_wo:
@@ -48,43 +73,34 @@ def _apply_valorant(agg_home: TeamAgg, agg_away: TeamAgg, indices: Dict[str, Any
         else:
             agg_home.wo_count += 1
 
-    # Índices de rounds/mapas
-    rounds = indices.get("rounds", [])
-    mode = indices.get("mode", "MD1")
-    home_rounds_total = sum(r.get("home", 0) for r in rounds)
-    away_rounds_total = sum(r.get("away", 0) for r in rounds)
-    agg_home.round_diff += home_rounds_total - away_rounds_total
-    agg_away.round_diff += away_rounds_total - home_rounds_total
-
-    if mode == "MD3":
-        # saldo de mapas baseado no placar por mapa
-        home_maps = sum(1 for r in rounds if r.get("home", 0) > r.get("away", 0))
-        away_maps = sum(1 for r in rounds if r.get("away", 0) > r.get("home", 0))
-        agg_home.map_diff += home_maps - away_maps
-        agg_away.map_diff += away_maps - home_maps
+    # Índices de rounds/mapas (mapas só vêm preenchidos em MD3)
+    agg_home.round_diff += rep.home_rounds - rep.away_rounds
+    agg_away.round_diff += rep.away_rounds - rep.home_rounds
+    agg_home.map_diff += rep.home_maps - rep.away_maps
+    agg_away.map_diff += rep.away_maps - rep.home_maps
 
     # tempos médios de vitória (opcional no regulamento/preset)
-    avg_win_time = indices.get("avgWinTimeSec")
-    if isinstance(avg_win_time, (int, float)) and avg_win_time > 0:
+    if rep.win_duration is not None:
         if winner == "home":
-            agg_home.win_times_sum += avg_win_time
+            agg_home.win_times_ms += duration_ms(rep.win_duration)
             agg_home.win_times_n += 1
         elif winner == "away":
-            agg_away.win_times_sum += avg_win_time
+            agg_away.win_times_ms += duration_ms(rep.win_duration)
             agg_away.win_times_n += 1
 
 
-def _apply_free_fire(agg_home: TeamAgg, agg_away: TeamAgg, indices: Dict[str, Any], ruleset: Dict[str, Any], winner: str, is_wo: bool):
+def _apply_free_fire(agg_home: TeamAgg, agg_away: TeamAgg, rep: NormalizedReport, rules: CompiledRuleset, is_wo: bool):
+    winner = rep.winner
     # Pontuação (1 por vitória de partida)
     if winner == "home":
-        agg_home.points += ruleset["scoring"]["win"]
+        agg_home.points += rules.win
         agg_home.wins += 1
-        agg_away.points += ruleset["scoring"]["loss"]
+        agg_away.points += rules.loss
         agg_away.losses += 1
     elif winner == "away":
-        agg_away.points += ruleset["scoring"]["win"]
+        agg_away.points += rules.win
         agg_away.wins += 1
-        agg_home.points += ruleset["scoring"]["loss"]
+        agg_home.points += rules.loss
         agg_home.losses += 1
 
     if is_wo:
@@ -94,44 +110,39 @@ def _apply_free_fire(agg_home: TeamAgg, agg_away: TeamAgg, indices: Dict[str, An
             agg_home.wo_count += 1
 
     # vitórias de round contam para desempate
-    rw = indices.get("roundWins", {})
-    home_rw = int(rw.get("home", 0))
-    away_rw = int(rw.get("away", 0))
-    agg_home.round_wins += home_rw
-    agg_away.round_wins += away_rw
+    agg_home.round_wins += rep.home_rounds
+    agg_away.round_wins += rep.away_rounds
 
 
-def _apply_lol(agg_home: TeamAgg, agg_away: TeamAgg, indices: Dict[str, Any], ruleset: Dict[str, Any], winner: str, is_wo: bool):
+def _apply_lol(agg_home: TeamAgg, agg_away: TeamAgg, rep: NormalizedReport, rules: CompiledRuleset, is_wo: bool):
+    winner = rep.winner
     # Pontuação: vitória 1, derrota 0; WO derrota pode ser -1 (preset)
     if winner == "home":
-        agg_home.points += ruleset["scoring"]["win"]
+        agg_home.points += rules.win
         agg_home.wins += 1
         # derrota "normal"
-        agg_away.points += ruleset["scoring"]["loss"]
+        agg_away.points += rules.loss
         agg_away.losses += 1
         # tempo de vitória
-        dur = indices.get("gameDurationSec")
-        if isinstance(dur, (int, float)) and dur > 0:
-            agg_home.win_times_sum += dur
+        if rep.win_duration is not None:
+            agg_home.win_times_ms += duration_ms(rep.win_duration)
             agg_home.win_times_n += 1
     elif winner == "away":
-        agg_away.points += ruleset["scoring"]["win"]
+        agg_away.points += rules.win
         agg_away.wins += 1
-        agg_home.points += ruleset["scoring"]["loss"]
+        agg_home.points += rules.loss
         agg_home.losses += 1
-        dur = indices.get("gameDurationSec")
-        if isinstance(dur, (int, float)) and dur > 0:
-            agg_away.win_times_sum += dur
+        if rep.win_duration is not None:
+            agg_away.win_times_ms += duration_ms(rep.win_duration)
             agg_away.win_times_n += 1
 
     if is_wo:
         # quem perdeu por WO recebe penalidade se houver
-        wo_loss_pen = ruleset["scoring"].get("wo_loss")
-        if wo_loss_pen is not None:
+        if rules.wo_loss is not None:
             if winner == "home":
-                agg_away.points += wo_loss_pen
+                agg_away.points += rules.wo_loss
             else:
-                agg_home.points += wo_loss_pen
+                agg_home.points += rules.wo_loss
         # conta WO sofrido
         if winner == "home":
             agg_away.wo_count += 1
@@ -139,99 +150,251 @@ def _apply_lol(agg_home: TeamAgg, agg_away: TeamAgg, indices: Dict[str, Any], ru
             agg_home.wo_count += 1
 
 
-def _winner_from_indices(modality: str, indices: Dict[str, Any]) -> str:
-    m = modality.upper()
-    if m == "FREE_FIRE":
-        return indices.get("winner")
-    if m == "LOL":
-        return indices.get("winner")
-    if m == "VALORANT":
-        # por simplicidade: exigimos que o report informe winner explícito (home|away)
-        # (poderíamos inferir pelos rounds, mas manteremos direto para o MVP)
-        return indices.get("winner")
-    return None
+def match_report(rules: CompiledRuleset, match: Match) -> NormalizedReport:
+    """Campos derivados da partida: das colunas normalizadas no report, se houver;
+    senão valida e lê o JSON de `indices` (partidas antigas/sem ingestão)."""
+    if match.normalized_at is not None:
+        return NormalizedReport(
+            winner=match.winner_side or None,
+            home_rounds=match.home_rounds,
+            away_rounds=match.away_rounds,
+            home_maps=match.home_maps,
+            away_maps=match.away_maps,
+            win_duration=match.win_duration_sec,
+        )
+    # valida indices (levanta ValueError se inválido)
+    return rules.normalize(match.indices or {})
 
 
-def _apply_match_to_aggs(modality: str, ruleset: Dict[str, Any], match: Match, aggs: Dict[int, TeamAgg]):
-    # valida indices (levanta ValueError se inválido)
-    validate_report(modality, match.indices or {})
+def _apply_match_to_aggs(rules: CompiledRuleset, match: Match, aggs: Dict[int, TeamAgg], rep: Optional[NormalizedReport] = None):
+    if rep is None:
+        rep = match_report(rules, match)
 
     home = aggs[match.home_team_id]
     away = aggs[match.away_team_id]
 
-    winner = _winner_from_indices(modality, match.indices or {})
+    winner = rep.winner
     is_wo = bool(match.is_wo)
 
     # pontuação head-to-head (p/ critério H2H)
     if winner == "home":
-        home.h2h_points[match.away_team_id] = home.h2h_points.get(match.away_team_id, 0) + ruleset["scoring"]["win"]
-        away.h2h_points[match.home_team_id] = away.h2h_points.get(match.home_team_id, 0) + ruleset["scoring"]["loss"]
+        home.h2h_points[match.away_team_id] = home.h2h_points.get(match.away_team_id, 0) + rules.win
+        away.h2h_points[match.home_team_id] = away.h2h_points.get(match.home_team_id, 0) + rules.loss
     elif winner == "away":
-        away.h2h_points[match.home_team_id] = away.h2h_points.get(match.home_team_id, 0) + ruleset["scoring"]["win"]
-        home.h2h_points[match.away_team_id] = home.h2h_points.get(match.away_team_id, 0) + ruleset["scoring"]["loss"]
-
-    if modality == "VALORANT":
-        _apply_valorant(home, away, match.indices or {}, ruleset, winner, is_wo)
-    elif modality == "FREE_FIRE":
-        _apply_free_fire(home, away, match.indices or {}, ruleset, winner, is_wo)
-    elif modality == "LOL":
-        _apply_lol(home, away, match.indices or {}, ruleset, winner, is_wo)
-    else:
-        raise ValueError(f"Modality not supported: {modality}")
+        away.h2h_points[match.home_team_id] = away.h2h_points.get(match.home_team_id, 0) + rules.win
+        home.h2h_points[match.away_team_id] = home.h2h_points.get(match.away_team_id, 0) + rules.loss
+
+    rules.apply(home, away, rep, rules, is_wo)
 
 
 def _avg_win_time(agg: TeamAgg) -> float:
     if agg.win_times_n > 0:
-        return agg.win_times_sum / agg.win_times_n
+        return agg.win_times_ms / (1000 * agg.win_times_n)
     return float("inf")  # se não venceu nenhuma, pior média possível para ranking por menor tempo
 
 
-def _cmp_pair(a: TeamAgg, b: TeamAgg, tiebreakers: List[str]) -> int:
-    # Retorna -1 se a < b, 0 se igual, +1 se a > b (para ordenar)
-    # Primeira ordenação SEMPRE por pontos desc (quanto mais pontos, melhor)
-    if a.points != b.points:
-        return -1 if a.points > b.points else 1
-
+# -----------------------------
+# Motor de desempate
+# -----------------------------
+# Critérios escalares viram chaves de ordenação "menor é melhor"; critérios
+# consecutivos são fundidos numa única tupla, então cada bloco é ordenado uma vez.
+_SCALAR_KEYS: Dict[str, Callable[[TeamAgg], Any]] = {
+    "WO_FEWEST": lambda a: a.wo_count,
+    "WINS": lambda a: -a.wins,
+    "ROUND_DIFF": lambda a: -a.round_diff,
+    "MAP_DIFF": lambda a: -a.map_diff,
+    "ROUND_WINS": lambda a: -a.round_wins,
+    "AVG_WIN_TIME": _avg_win_time,
+}
+_H2H = "H2H"
+# o app marca pendência para jogo de desempate/sorteio; daqui em diante é empate
+_STOP = ("EXTRA_MATCH", "EXTRA_MATCH_OR_DRAW")
+
+
+def _tiebreak_plan(tiebreakers: Iterable[str], keys: Dict[str, Callable] = _SCALAR_KEYS) -> Tuple[Tuple[str, Any], ...]:
+    """Normaliza a lista de tiebreakers em passos: ("keys", fns) ou ("h2h", None).
+
+    `keys` permite que outros backends (ex.: colunar) reaproveitem o mesmo plano.
+    """
+    plan: List[Tuple[str, Any]] = []
     for tb in tiebreakers:
-        if tb == "WO_FEWEST":
-            if a.wo_count != b.wo_count:
-                return -1 if a.wo_count < b.wo_count else 1
-        elif tb == "WINS":
-            if a.wins != b.wins:
-                return -1 if a.wins > b.wins else 1
-        elif tb == "H2H":
-            # mais pontos contra o adversário
-            ap = a.h2h_points.get(b.team.id, 0)
-            bp = b.h2h_points.get(a.team.id, 0)
-            if ap != bp:
-                return -1 if ap > bp else 1
-        elif tb == "ROUND_DIFF":
-            if a.round_diff != b.round_diff:
-                return -1 if a.round_diff > b.round_diff else 1
-        elif tb == "MAP_DIFF":
-            if a.map_diff != b.map_diff:
-                return -1 if a.map_diff > b.map_diff else 1
-        elif tb == "ROUND_WINS":
-            if a.round_wins != b.round_wins:
-                return -1 if a.round_wins > b.round_wins else 1
-        elif tb == "AVG_WIN_TIME":
-            aavg = _avg_win_time(a)
-            bavg = _avg_win_time(b)
-            if aavg != bavg:
-                return -1 if aavg < bavg else 1
-        elif tb in ("EXTRA_MATCH", "EXTRA_MATCH_OR_DRAW"):
-            # o app marca pendência para jogo de desempate/sorteio; aqui consideramos empate
-            return 0
-        else:
-            # tiebreaker desconhecido -> ignora
-            continue
+        if tb in _STOP:
+            break
+        if tb == _H2H:
+            plan.append(("h2h", None))
+        elif tb in keys:
+            if plan and plan[-1][0] == "keys":
+                plan[-1] = ("keys", plan[-1][1] + (keys[tb],))
+            else:
+                plan.append(("keys", (keys[tb],)))
+        # tiebreaker desconhecido -> ignora
+    return tuple(plan)
+
+
+def _partition(block: List[TeamAgg], key: Callable[[TeamAgg], Any]) -> List[List[TeamAgg]]:
+    # sorted é estável: dentro de cada sub-bloco a ordem de team_id é mantida
+    return [list(g) for _, g in groupby(sorted(block, key=key), key=key)]
+
+
+def _mini_league_key(block: List[TeamAgg]) -> Callable[[TeamAgg], int]:
+    """Mini-liga: pontos de cada time somando só os confrontos entre os empatados."""
+    ids = {a.team.id for a in block}
+    pts = {
+        a.team.id: sum(p for opp, p in a.h2h_points.items() if opp in ids)
+        for a in block
+    }
+    return lambda a: -pts[a.team.id]
+
+
+def _rank_block(block: List[TeamAgg], plan: Tuple[Tuple[str, Any], ...], step: int) -> List[TeamAgg]:
+    if len(block) < 2 or step >= len(plan):
+        return block
+
+    kind, fns = plan[step]
+    if kind == "keys":
+        key = fns[0] if len(fns) == 1 else (lambda a: tuple(f(a) for f in fns))
+        parts = _partition(block, key)
+        if len(parts) == 1:
+            return _rank_block(block, plan, step + 1)
+        return [a for part in parts for a in _rank_block(part, plan, step + 1)]
+
+    # H2H: se a mini-liga separou alguém, ela é refeita só entre os que
+    # continuam empatados; se não separou ninguém, segue para o próximo critério
+    parts = _partition(block, _mini_league_key(block))
+    if len(parts) == 1:
+        return _rank_block(block, plan, step + 1)
+    return [a for part in parts for a in _rank_block(part, plan, step)]
+
+
+def _sort_block(block: List[TeamAgg], plan: Tuple[Tuple[str, Any], ...]) -> List[TeamAgg]:
+    """Ordena um bloco de times empatados em pontos aplicando os tiebreakers.
+
+    O bloco deve chegar em ordem de team_id: empates que sobram (EXTRA_MATCH)
+    ficam nessa ordem, então recálculo completo e incremental dão o mesmo resultado.
+    """
+    if len(block) < 2:
+        return list(block)
+    return _rank_block(list(block), plan, 0)
+
+
+# -----------------------------
+# Ruleset compilado
+# -----------------------------
+_APPLIERS = {
+    "VALORANT": _apply_valorant,
+    "FREE_FIRE": _apply_free_fire,
+    "LOL": _apply_lol,
+}
+_VALIDATORS = {
+    "VALORANT": validate_report_valorant,
+    "FREE_FIRE": validate_report_free_fire,
+    "LOL": validate_report_lol,
+}
+_NORMALIZERS = {
+    "VALORANT": normalize_report_valorant,
+    "FREE_FIRE": normalize_report_free_fire,
+    "LOL": normalize_report_lol,
+}
+
+
+def _checked(schema: Callable[[Any], List[FieldError]], validate: Callable[[Dict[str, Any]], None]):
+    # schema declarado primeiro (tipos/enum/limites); o validador da modalidade só
+    # roda sobre report estruturalmente válido e cobre as regras entre campos
+    def check(indices: Any) -> List[FieldError]:
+        errors = schema(indices)
+        if errors:
+            return errors
+        try:
+            validate(indices)
+        except (ValueError, TypeError) as exc:  # TypeError: itens de lista com tipo errado
+            return [FieldError("", "invalid", str(exc))]
+        return []
+    return check
+
+
+def _raising(check: Callable[[Any], List[FieldError]]):
+    def run(indices: Any) -> None:
+        errors = check(indices)
+        if errors:
+            raise ReportValidationError(errors)
+    return run
+
+
+def _validated(validate: Callable[[Dict[str, Any]], None], normalize: Callable[[Dict[str, Any]], NormalizedReport]):
+    def run(indices: Dict[str, Any]) -> NormalizedReport:
+        validate(indices)
+        return normalize(indices)
+    return run
+
+
+@dataclass(frozen=True)
+class CompiledRuleset:
+    """Ruleset pronto para os loops quentes: constantes e callables já resolvidos."""
+    name: str
+    modality: str
+    win: int
+    loss: int
+    wo_loss: Optional[int]
+    wo_penalty_points: int  # quadro geral: pontos por WO sofrido (Free Fire)
+    tiebreakers: Tuple[str, ...]
+    plan: Tuple[Tuple[str, Any], ...]
+    apply: Callable[..., None]
+    check: Callable[[Any], List[FieldError]]  # erros estruturados (lista vazia = válido)
+    validate: Callable[[Dict[str, Any]], None]  # ReportValidationError (ValueError) se inválido
+    normalize: Callable[[Dict[str, Any]], NormalizedReport]  # valida + deriva colunas
+
+
+@lru_cache(maxsize=256)
+def _compile(modality: str, content: str) -> CompiledRuleset:
+    if modality not in _APPLIERS:
+        raise ValueError(f"Modality not supported: {modality}")
+    ruleset = json.loads(content)
+    # ruleset customizado sem "scoring" herda a pontuação do preset
+    scoring = ruleset.get("scoring") or get_ruleset(modality)["scoring"]
+    tiebreakers = tuple(ruleset.get("tiebreakers", []))
+    # idem para o schema dos índices
+    schema = ruleset.get("indices_schema") or get_ruleset(modality)["indices_schema"]
+    check = _checked(compile_schema(schema), _VALIDATORS[modality])
+    return CompiledRuleset(
+        name=ruleset.get("name", modality),
+        modality=modality,
+        win=scoring["win"],
+        loss=scoring["loss"],
+        wo_loss=scoring.get("wo_loss"),
+        wo_penalty_points=ruleset.get("wo_penalty_points", 0),
+        tiebreakers=tiebreakers,
+        plan=_tiebreak_plan(tiebreakers),
+        apply=_APPLIERS[modality],
+        check=check,
+        validate=_raising(check),
+        normalize=_validated(_raising(check), _NORMALIZERS[modality]),
+    )
+
 
-    return 0
+def compile_ruleset(modality: str, ruleset: Optional[Dict[str, Any]] = None) -> CompiledRuleset:
+    """Compila (com cache LRU pelo conteúdo) o ruleset do torneio ou o preset da modalidade."""
+    modality = modality.upper()
+    ruleset = ruleset or get_ruleset(modality)
+    return _compile(modality, json.dumps(ruleset, sort_keys=True, default=str))
 
 
-def _sort_with_tiebreakers(aggs: List[TeamAgg], tiebreakers: List[str]) -> List[TeamAgg]:
-    # Ordena com aplicação de critérios em cascata, incluindo H2H para pares;
-    # para empates com 3+ times, aplicamos "mini-liga": recalcula H2H e reaplica critérios.
+def compile_tournament_ruleset(tournament: Tournament) -> CompiledRuleset:
+    """compile_ruleset do torneio, memoizado na instância.
+
+    A chave do LRU exige serializar o ruleset; aqui isso acontece uma vez por
+    instância, enquanto `ruleset` (o mesmo objeto) e `modality` não mudarem.
+    Alterar o dict in-place não é detectado até o save (ver signals.py).
+    """
+    memo = tournament.__dict__.get("_compiled_ruleset")
+    if memo is None or memo[0] is not tournament.ruleset or memo[1] != tournament.modality:
+        rules = compile_ruleset(tournament.modality, tournament.ruleset)
+        memo = tournament._compiled_ruleset = (tournament.ruleset, tournament.modality, rules)
+    return memo[2]
+
+
+def _sort_with_tiebreakers(aggs: List[TeamAgg], plan: Tuple[Tuple[str, Any], ...]) -> List[TeamAgg]:
+    # Ordena com aplicação de critérios em cascata; H2H vira "mini-liga" entre
+    # todos os empatados (não só pares), refeita a cada subdivisão do bloco.
     # 1) Ordena por pontos desc como base
     aggs.sort(key=lambda x: x.points, reverse=True)
 
@@ -242,48 +405,101 @@ def _sort_with_tiebreakers(aggs: List[TeamAgg], tiebreakers: List[str]) -> List[
         while j < len(aggs) and aggs[j].points == aggs[i].points:
             j += 1
 
-        block = aggs[i:j]
-        if len(block) >= 2:
-            # Para bloco de empatados, ordena aplicando os tiebreakers
-            # 1º tentativa: comparação par-a-par
-            block_sorted = sorted(block, key=lambda x: (
-                -x.points,  # já iguais, mas mantemos
-                x.wo_count,
-                -x.wins,
-                -x.h2h_points.get(x.team.id, 0),  # placeholder para estabilidade
-            ))
-
-            # Reordena de fato usando a função de comparação
-            # Python não tem cmp nativo no sorted; então fazemos um bubble/merge simples:
-            changed = True
-            while changed:
-                changed = False
-                for k in range(len(block_sorted) - 1):
-                    a, b = block_sorted[k], block_sorted[k + 1]
-                    cmp = _cmp_pair(a, b, tiebreakers)
-                    if cmp > 0:  # a "menor" que b → troca
-                        block_sorted[k], block_sorted[k + 1] = b, a
-                        changed = True
-
-            aggs[i:j] = block_sorted
+        if j - i >= 2:
+            aggs[i:j] = _sort_block(aggs[i:j], plan)
 
         i = j
 
     return aggs
 
 
-def compute_group_table(tournament: Tournament, group_id: int) -> List[TeamAgg]:
+# -----------------------------
+# Deltas (atualização incremental)
+# -----------------------------
+_AGG_NUMERIC_FIELDS = (
+    "points", "wins", "losses", "wo_count",
+    "round_diff", "map_diff", "round_wins",
+    "win_times_ms", "win_times_n",
+)
+
+
+def match_contribution(rules: CompiledRuleset, match: Match) -> Dict[int, TeamAgg]:
+    """Contribuição isolada de uma partida para os dois times envolvidos.
+
+    Devolve agregações "zeradas" só com o efeito desta partida; `team` fica None
+    porque os deltas nunca entram diretamente na ordenação.
+    """
+    aggs = {
+        match.home_team_id: TeamAgg(team=None),
+        match.away_team_id: TeamAgg(team=None),
+    }
+    _apply_match_to_aggs(rules, match, aggs)
+    return aggs
+
+
+def merge_agg(target: TeamAgg, delta: TeamAgg, sign: int = 1) -> None:
+    """Soma (sign=1) ou desfaz (sign=-1) uma contribuição em `target`."""
+    for name in _AGG_NUMERIC_FIELDS:
+        setattr(target, name, getattr(target, name) + sign * getattr(delta, name))
+    for opp_id, pts in delta.h2h_points.items():
+        target.h2h_points[opp_id] = target.h2h_points.get(opp_id, 0) + sign * pts
+
+
+def build_group_table(
+    rules: CompiledRuleset,
+    teams: List[Team],
+    matches: Iterable[Match],
+    backend: Optional[str] = None,
+) -> List[TeamAgg]:
+    """Agrega e ordena um grupo a partir de dados já carregados (sem queries).
+
+    `teams` deve vir em ordem de team_id; `matches` são as partidas REPORTED do grupo.
+    `backend` ("python" ou "numpy") sobrescreve settings.TOURNAMENTS_AGG_BACKEND.
+    """
+    backend = backend or getattr(settings, "TOURNAMENTS_AGG_BACKEND", BACKEND_PYTHON)
+    if backend == BACKEND_NUMPY:
+        from .columnar import build_group_table_columnar
+        with metrics.phase(metrics.PHASE_AGGREGATION, rules.modality):  # agregação + ordenação
+            return build_group_table_columnar(rules, teams, matches)
+    if backend != BACKEND_PYTHON:
+        raise ValueError(f"Aggregation backend not supported: {backend}")
+
+    aggs: Dict[int, TeamAgg] = {t.id: TeamAgg(team=t) for t in teams}
+
+    if not metrics.enabled():
+        for m in matches:
+            _apply_match_to_aggs(rules, m, aggs)
+        return rank_aggs(rules, aggs)
+
+    # instrumentado: valida tudo antes para medir validação e agregação separadas
+    with metrics.phase(metrics.PHASE_VALIDATION, rules.modality):
+        reports = [(m, match_report(rules, m)) for m in matches]
+    with metrics.phase(metrics.PHASE_AGGREGATION, rules.modality):
+        for m, rep in reports:
+            _apply_match_to_aggs(rules, m, aggs, rep)
+    metrics.inc(metrics.MATCHES_AGGREGATED, len(reports), modality=rules.modality)
+    return rank_aggs(rules, aggs)
+
+
+def rank_aggs(rules: CompiledRuleset, aggs: Dict[int, TeamAgg]) -> List[TeamAgg]:
+    """Ordena agregações já acumuladas (aggs em ordem de team_id); médias saem de win_times_*."""
+    with metrics.phase(metrics.PHASE_SORT, rules.modality):
+        return _sort_with_tiebreakers(list(aggs.values()), rules.plan)
+
+
+def compute_group_table(tournament: Tournament, group_id: int, backend: Optional[str] = None) -> List[TeamAgg]:
     """Calcula as agregações e devolve a lista ordenada (sem persistir)."""
-    ruleset = tournament.ruleset or get_ruleset(tournament.modality)
-    tiebreakers: List[str] = ruleset.get("tiebreakers", [])
-    modality = tournament.modality
+    rules = compile_tournament_ruleset(tournament)
 
     # Times do grupo
-    team_ids = list(
-        tournament.enrollments.filter(group_id=group_id).values_list("team_id", flat=True)
-    )
-    teams = {t.id: t for t in Team.objects.filter(id__in=team_ids)}
-    aggs: Dict[int, TeamAgg] = {tid: TeamAgg(team=teams[tid]) for tid in team_ids}
+    with metrics.phase(metrics.PHASE_ENROLLMENTS, rules.modality):
+        team_ids = list(
+            tournament.enrollments.filter(group_id=group_id)
+            .order_by("team_id")
+            .values_list("team_id", flat=True)
+        )
+        teams = {t.id: t for t in Team.objects.filter(id__in=team_ids)}
+        teams = [teams[tid] for tid in team_ids]
 
     # Partidas reportadas do grupo
     matches = Match.objects.filter(
@@ -292,14 +508,44 @@ def compute_group_table(tournament: Tournament, group_id: int) -> List[TeamAgg]:
         status="REPORTED",
     )
 
-    for m in matches:
-        _apply_match_to_aggs(modality, ruleset, m, aggs)
+    # tudo normalizado no report -> soma direto no banco, sem ler o JSON
+    backend = backend or getattr(settings, "TOURNAMENTS_AGG_BACKEND", BACKEND_PYTHON)
+    if backend == BACKEND_PYTHON and not matches.filter(normalized_at__isnull=True).exists():
+        from .report import aggregate_group_db
+        with metrics.phase(metrics.PHASE_AGGREGATION, rules.modality):
+            aggs = aggregate_group_db(rules, matches, teams)
+        return rank_aggs(rules, aggs)
+
+    with metrics.phase(metrics.PHASE_MATCHES, rules.modality):
+        matches = list(matches)
+    return build_group_table(rules, teams, matches, backend=backend)
 
-    # finalizar médias
-    for agg in aggs.values():
-        if agg.win_times_n > 0:
-            agg.avg_win_times = [_avg_win_time(agg)]
 
-    # ordenar com desempates
-    ordered = _sort_with_tiebreakers(list(aggs.values()), tiebreakers)
-    return ordered
+def compute_tournament_tables(
+    tournament: Tournament, rules: Optional[CompiledRuleset] = None
+) -> Dict[int, List[TeamAgg]]:
+    """Tabelas de todos os grupos do torneio numa passada (2 queries), sem persistir.
+
+    Carrega inscrições e partidas REPORTED do torneio de uma vez e particiona por
+    grupo em memória.
+    """
+    rules = rules or compile_tournament_ruleset(tournament)
+
+    enrollments = (
+        tournament.enrollments.select_related("team")
+        .order_by("group_id", "team_id")
+    )
+    teams_by_group: Dict[int, List[Team]] = defaultdict(list)
+    with metrics.phase(metrics.PHASE_ENROLLMENTS, rules.modality):
+        for e in enrollments:
+            teams_by_group[e.group_id].append(e.team)
+
+    matches_by_group: Dict[int, List[Match]] = defaultdict(list)
+    with metrics.phase(metrics.PHASE_MATCHES, rules.modality):
+        for m in Match.objects.filter(tournament=tournament, status=MatchStatus.REPORTED):
+            matches_by_group[m.group_id].append(m)
+
+    return {
+        group_id: build_group_table(rules, teams, matches_by_group.get(group_id, []))
+        for group_id, teams in teams_by_group.items()
+    }
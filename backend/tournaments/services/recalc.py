@@ -1,39 +1,267 @@
 from __future__ import annotations
-from typing import List
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from django.db import transaction
 
-from tournaments.models import Tournament, Standing, Group
-from .ranking import compute_group_table
+from tournaments.models import Tournament, Standing, Group, Match, MatchStatus
+from . import metrics
+from .cache import bump_group_version
+from .clinch import schedule_group_clinch
+from .leaderboard import refresh_leaderboard
+from .live import is_watched, publish_group_diff, snapshot_groups
+from .ranking import (
+    TeamAgg,
+    compile_tournament_ruleset,
+    compute_group_table,
+    compute_tournament_tables,
+    match_contribution,
+    merge_agg,
+    _avg_win_time,
+    _sort_block,
+)
 
 
+def _stats_from_agg(agg: TeamAgg) -> Dict[str, Any]:
+    """Snapshot serializável de uma agregação (vai para Standing.stats)."""
+    return {
+        "points": agg.points,
+        "wins": agg.wins,
+        "losses": agg.losses,
+        "wo_count": agg.wo_count,
+        "round_diff": agg.round_diff,
+        "map_diff": agg.map_diff,
+        "round_wins": agg.round_wins,
+        "avg_win_time": _avg_win_time(agg) if agg.win_times_n else None,
+        # necessários para o caminho incremental (desfazer/refazer partidas)
+        "win_times_ms": agg.win_times_ms,
+        "win_times_n": agg.win_times_n,
+        "h2h": {str(opp): pts for opp, pts in sorted(agg.h2h_points.items()) if pts},
+    }
+
+
+def _agg_from_standing(row: Standing) -> TeamAgg:
+    s = row.stats or {}
+    return TeamAgg(
+        team=row.team,
+        points=s.get("points", 0),
+        wins=s.get("wins", 0),
+        losses=s.get("losses", 0),
+        wo_count=s.get("wo_count", 0),
+        round_diff=s.get("round_diff", 0),
+        map_diff=s.get("map_diff", 0),
+        round_wins=s.get("round_wins", 0),
+        win_times_ms=s.get("win_times_ms", 0),
+        win_times_n=s.get("win_times_n", 0),
+        h2h_points={int(opp): pts for opp, pts in (s.get("h2h") or {}).items()},
+    )
+
+
+def _timed_recalc(scope: str, modality_of: Callable[[Any], str]):
+    """Observa a duração total do recálculo (metrics.RECALC_SECONDS) por modalidade."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(obj, *args, **kwargs):
+            if not metrics.enabled():
+                return fn(obj, *args, **kwargs)
+            with metrics.timed(metrics.RECALC_SECONDS, scope=scope, modality=modality_of(obj)):
+                return fn(obj, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _bump_and_schedule(group_id: int) -> None:
+    # nova versão do grupo: o clinch é recalculado fora do request (ver clinch.py)
+    bump_group_version(group_id)
+    schedule_group_clinch(group_id)
+
+
+@_timed_recalc("group", lambda t: t.modality)
 @transaction.atomic
-def recalc_group_standings(tournament: Tournament, group: Group) -> List[Standing]:
-    """Recalcula e persiste a tabela (Standings) do grupo informado."""
-    table = compute_group_table(tournament, group.id)
-
-    # apaga standings antigos do grupo
-    Standing.objects.filter(tournament=tournament, group=group).delete()
-
-    new_rows: List[Standing] = []
-    for pos, agg in enumerate(table, start=1):
-        stats = {
-            "points": agg.points,
-            "wins": agg.wins,
-            "losses": agg.losses,
-            "wo_count": agg.wo_count,
-            "round_diff": agg.round_diff,
-            "map_diff": agg.map_diff,
-            "round_wins": agg.round_wins,
-            "avg_win_time": agg.avg_win_times[0] if agg.avg_win_times else None,
-        }
-        row = Standing.objects.create(
-            tournament=tournament,
-            group=group,
-            team=agg.team,
-            stats=stats,
-            order_rank=pos,
-        )
-        new_rows.append(row)
+def recalc_group_standings(
+    tournament: Tournament, group: Group, table: Optional[List[TeamAgg]] = None
+) -> List[Standing]:
+    """Recalcula e persiste a tabela (Standings) do grupo informado.
+
+    `table` permite passar a tabela já calculada (só persiste).
+    """
+    if table is None:
+        table = compute_group_table(tournament, group.id)
+    before = snapshot_groups(tournament.id, [group.id]).get(group.id)
+
+    with metrics.phase(metrics.PHASE_PERSIST, tournament.modality):
+        # apaga standings antigos do grupo
+        Standing.objects.filter(tournament=tournament, group=group).delete()
 
+        # um INSERT para o grupo todo (o número de queries não cresce com os times)
+        new_rows: List[Standing] = Standing.objects.bulk_create([
+            Standing(
+                tournament=tournament,
+                group=group,
+                team=agg.team,
+                stats=_stats_from_agg(agg),
+                order_rank=pos,
+            )
+            for pos, agg in enumerate(table, start=1)
+        ])
+
+    refresh_leaderboard(tournament, [group.id])
+    transaction.on_commit(lambda: _bump_and_schedule(group.id))
+    publish_group_diff(tournament.id, group.id, before, new_rows)
     return new_rows
+
+
+@_timed_recalc("tournament", lambda t: t.modality)
+@transaction.atomic
+def recalc_tournament_standings(tournament: Tournament) -> Dict[int, List[Standing]]:
+    """Recalcula e persiste os Standings de todos os grupos do torneio.
+
+    Carrega inscrições e partidas REPORTED do torneio de uma vez, particiona por
+    grupo em memória e grava com upsert em lote: o número de queries é constante,
+    independente da quantidade de grupos e times.
+    """
+    rules = compile_tournament_ruleset(tournament)
+    tables = compute_tournament_tables(tournament, rules)
+
+    rows_by_group: Dict[int, List[Standing]] = {}
+    keep = set()
+    for group_id, table in tables.items():
+        rows_by_group[group_id] = [
+            Standing(
+                tournament=tournament,
+                group_id=group_id,
+                team=agg.team,
+                stats=_stats_from_agg(agg),
+                order_rank=pos,
+            )
+            for pos, agg in enumerate(table, start=1)
+        ]
+        keep.update((group_id, agg.team.id) for agg in table)
+
+    before = snapshot_groups(tournament.id, rows_by_group)
+
+    with metrics.phase(metrics.PHASE_PERSIST, rules.modality):
+        # remove snapshots de times que saíram do grupo/torneio
+        stale = [
+            pk for pk, group_id, team_id in
+            Standing.objects.filter(tournament=tournament).values_list("id", "group_id", "team_id")
+            if (group_id, team_id) not in keep
+        ]
+        if stale:
+            Standing.objects.filter(id__in=stale).delete()
+
+        Standing.objects.bulk_create(
+            [row for rows in rows_by_group.values() for row in rows],
+            update_conflicts=True,
+            unique_fields=["group", "team"],
+            update_fields=["tournament", "stats", "order_rank"],
+            batch_size=1000,
+        )
+    refresh_leaderboard(tournament)
+    for group_id, rows in rows_by_group.items():
+        transaction.on_commit(lambda gid=group_id: _bump_and_schedule(gid))
+        publish_group_diff(tournament.id, group_id, before.get(group_id), rows)
+    return rows_by_group
+
+
+# chaves que o caminho incremental precisa no snapshot (stats antigos -> recálculo completo)
+_DELTA_KEYS = ("h2h", "win_times_ms")
+
+Change = Tuple[Match, Optional[Match]]  # (partida gravada, estado anterior ao save)
+
+
+def apply_match_delta(match: Match, previous: Optional[Match] = None) -> List[Standing]:
+    """Atualiza os Standings do grupo aplicando só o efeito de uma partida.
+
+    `previous` é o estado da partida antes da alteração (correção de resultado);
+    se estava REPORTED, sua contribuição é desfeita antes de aplicar a nova.
+    """
+    return apply_group_deltas(match.tournament, match.group, [(match, previous)])
+
+
+@_timed_recalc("delta", lambda t: t.modality)
+@transaction.atomic
+def apply_group_deltas(tournament: Tournament, group: Group, changes: List[Change]) -> List[Standing]:
+    """Aplica as partidas alteradas de um grupo sobre o snapshot atual dos Standings.
+
+    Para cada (partida, anterior): desfaz a contribuição anterior, se estava
+    REPORTED, e soma a nova, se está REPORTED. Só os blocos de times empatados em
+    pontos que foram afetados são reordenados; o resultado é idêntico ao de
+    recalc_group_standings (somas inteiras, mesmos critérios e mesma ordem de base).
+
+    Se o snapshot atual não servir de base (grupo sem standings, inscrições
+    alteradas ou stats de versão antiga), cai no recálculo completo.
+    """
+    rules = compile_tournament_ruleset(tournament)
+
+    rows = list(
+        Standing.objects.select_for_update()
+        .filter(tournament=tournament, group=group)
+        .select_related("team")
+        .order_by("order_rank")
+    )
+    enrolled = set(
+        tournament.enrollments.filter(group=group).values_list("team_id", flat=True)
+    )
+    if (
+        not rows
+        or {r.team_id for r in rows} != enrolled
+        or any(key not in (r.stats or {}) for r in rows for key in _DELTA_KEYS)
+    ):
+        return recalc_group_standings(tournament, group)
+
+    before = (
+        {r.team_id: (r.order_rank, r.stats) for r in rows}
+        if is_watched(tournament.id, group.id) else None
+    )
+    deltas = []
+    for match, previous in changes:
+        if previous is not None and previous.status == MatchStatus.REPORTED:
+            deltas.append((match_contribution(rules, previous), -1))
+        if match.status == MatchStatus.REPORTED:
+            deltas.append((match_contribution(rules, match), 1))
+    if any(team_id not in enrolled for contribution, _ in deltas for team_id in contribution):
+        # partida com time de fora do grupo (troca de times/grupo): sem base para o delta
+        return recalc_group_standings(tournament, group)
+
+    by_team: Dict[int, Standing] = {r.team_id: r for r in rows}
+    aggs: Dict[int, TeamAgg] = {r.team_id: _agg_from_standing(r) for r in rows}
+    touched_points = set()
+
+    for contribution, sign in deltas:
+        for team_id, delta in contribution.items():
+            agg = aggs[team_id]
+            touched_points.add(agg.points)
+            merge_agg(agg, delta, sign)
+            touched_points.add(agg.points)
+
+    # ordem atual preservada; timsort é linear numa lista quase ordenada
+    ordered = sorted((aggs[r.team_id] for r in rows), key=lambda x: x.points, reverse=True)
+
+    i = 0
+    while i < len(ordered):
+        j = i + 1
+        while j < len(ordered) and ordered[j].points == ordered[i].points:
+            j += 1
+        if ordered[i].points in touched_points and j - i >= 2:
+            block = sorted(ordered[i:j], key=lambda x: x.team.id)
+            ordered[i:j] = _sort_block(block, rules.plan)
+        i = j
+
+    changed: List[Standing] = []
+    for pos, agg in enumerate(ordered, start=1):
+        row = by_team[agg.team.id]
+        stats = _stats_from_agg(agg)
+        if row.order_rank != pos or row.stats != stats:
+            row.order_rank = pos
+            row.stats = stats
+            changed.append(row)
+
+    if changed:
+        with metrics.phase(metrics.PHASE_PERSIST, rules.modality):
+            Standing.objects.bulk_update(changed, ["stats", "order_rank"])
+        refresh_leaderboard(tournament, [group.id])
+        transaction.on_commit(lambda: _bump_and_schedule(group.id))
+        publish_group_diff(tournament.id, group.id, before, rows)
+
+    return sorted(rows, key=lambda r: r.order_rank)
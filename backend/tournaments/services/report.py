@@ -0,0 +1,258 @@
+from __future__ import annotations
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from tournaments.models import Match, MatchStatus, Team, Tournament
+from tournaments.modalities import NormalizedReport
+from tournaments.modalities.schema import validate_batch
+from .ranking import CompiledRuleset, TeamAgg, compile_tournament_ruleset
+
+# Ingestão de reports: valida uma única vez e grava as colunas derivadas em Match,
+# para o ranking não reler o JSON de `indices` a cada recálculo.
+
+# campos gravados por report_match (úteis para bulk_update)
+REPORT_FIELDS = [
+    "status", "is_wo", "indices",
+    "winner_side", "home_rounds", "away_rounds", "home_maps", "away_maps",
+    "win_duration_sec", "normalized_at", "updated_at",
+]
+
+
+def apply_report_columns(match: Match, rep: Optional[NormalizedReport]) -> None:
+    """Copia os campos derivados para a partida (None limpa as colunas)."""
+    if rep is None:
+        match.winner_side = ""
+        match.home_rounds = match.away_rounds = 0
+        match.home_maps = match.away_maps = 0
+        match.win_duration_sec = None
+        match.normalized_at = None
+        return
+    match.winner_side = rep.winner or ""
+    match.home_rounds = rep.home_rounds
+    match.away_rounds = rep.away_rounds
+    match.home_maps = rep.home_maps
+    match.away_maps = rep.away_maps
+    match.win_duration_sec = rep.win_duration
+    match.normalized_at = timezone.now()
+
+
+def _rules_for(match: Match) -> CompiledRuleset:
+    t = match.tournament
+    return compile_tournament_ruleset(t)
+
+
+def previous_state(match: Match) -> Match:
+    """Cópia da partida antes de alterá-la: o caminho incremental desfaz a contribuição dela."""
+    return copy.copy(match)
+
+
+def report_match(
+    match: Match,
+    indices: Dict[str, Any],
+    is_wo: bool = False,
+    rules: Optional[CompiledRuleset] = None,
+    save: bool = True,
+) -> Match:
+    """Registra (ou corrige) o resultado: valida (ValueError se inválido) e grava as colunas derivadas.
+
+    Com `save=True` também atualiza os Standings do grupo pelo caminho incremental
+    (ou deixa para a fila de recálculo, se habilitada). Com `save=False` o chamador
+    grava em lote e chama recalc_reported_groups com o estado anterior (previous_state).
+    """
+    previous = previous_state(match) if save else None
+    rules = rules or _rules_for(match)
+    rep = rules.normalize(indices or {})
+    match.indices = indices
+    match.is_wo = bool(is_wo)
+    match.status = MatchStatus.REPORTED
+    apply_report_columns(match, rep)
+    match.updated_at = timezone.now()  # bulk_update não aplica auto_now
+    if save:
+        _save_and_apply(match, previous)
+    return match
+
+
+def unreport_match(match: Match, save: bool = True) -> Match:
+    """Desfaz o report: a partida volta a PENDING, sem resultado (mesmo contrato de report_match)."""
+    previous = previous_state(match) if save else None
+    match.indices = {}
+    match.is_wo = False
+    match.status = MatchStatus.PENDING
+    apply_report_columns(match, None)
+    match.updated_at = timezone.now()
+    if save:
+        _save_and_apply(match, previous)
+    return match
+
+
+def _save_and_apply(match: Match, previous: Match) -> None:
+    from .recalc import apply_match_delta
+    from .scheduler import queue_enabled
+
+    with transaction.atomic():
+        match.save(update_fields=REPORT_FIELDS)
+        if not queue_enabled():  # com a fila, o post_save já enfileirou o grupo
+            apply_match_delta(match, previous)
+
+
+def wo_indices(modality: str, winner: str) -> Dict[str, Any]:
+    """`indices` mínimos e válidos de um WO vencido por `winner` (home|away)."""
+    loser = "away" if winner == "home" else "home"
+    m = modality.upper()
+    if m == "VALORANT":
+        return {"mode": "MD1", "maps": ["WO"], "rounds": [{winner: 13, loser: 0}], "winner": winner, "wo": True}
+    if m == "FREE_FIRE":
+        return {"roundWins": {winner: 4, loser: 0}, "winner": winner, "wo": True}
+    if m == "LOL":
+        return {"winner": winner, "gameDurationSec": 1, "wo": True}
+    raise ValueError(f"Modality not supported: {modality}")
+
+
+def recalc_reported_groups(changes: Iterable[Tuple[Match, Optional[Match]]]) -> Dict[str, List]:
+    """Depois de gravar reports em lote: atualiza os Standings de cada grupo afetado uma vez.
+
+    `changes` são pares (partida gravada, previous_state de antes do report). Na
+    hora, pelo caminho incremental (apply_group_deltas, cada grupo no próprio
+    savepoint), ou enfileirado, se a fila de recálculo estiver habilitada; a fila
+    junta os reports da janela num único recálculo completo do grupo.
+    Chamar dentro de transaction.atomic().
+    """
+    from .cache import bump_group_version
+    from .recalc import apply_group_deltas
+    from .scheduler import enqueue_group_recalc, queue_enabled
+
+    groups: Dict[int, List[Tuple[Match, Optional[Match]]]] = {}
+    for match, previous in changes:
+        groups.setdefault(match.group_id, []).append((match, previous))
+
+    recalculated, queued, errors = [], [], []
+    for group_id, group_changes in groups.items():
+        # bulk_update não dispara sinais: invalida o cache do grupo aqui
+        transaction.on_commit(lambda gid=group_id: bump_group_version(gid))
+        if queue_enabled():
+            transaction.on_commit(lambda gid=group_id: enqueue_group_recalc(gid))
+            queued.append(group_id)
+            continue
+        match = group_changes[0][0]
+        try:
+            with transaction.atomic():
+                apply_group_deltas(match.tournament, match.group, group_changes)
+            recalculated.append(group_id)
+        except ValueError as exc:
+            # recálculo completo (snapshot sem base) achou outra partida do grupo com
+            # report inválido; os reports ficam gravados
+            errors.append({"group_id": group_id, "error": str(exc)})
+    return {
+        "groups_recalculated": sorted(recalculated),
+        "groups_queued": sorted(queued),
+        "recalc_errors": errors,
+    }
+
+
+def validate_tournament_reports(tournament: Tournament, rules: Optional[CompiledRuleset] = None) -> List[Dict[str, Any]]:
+    """Revalida os `indices` de todas as partidas REPORTED do torneio (1 query, só id e JSON).
+
+    Devolve os erros estruturados ({"match_id", "field", "code", "message"}); nada é gravado.
+    """
+    rules = rules or compile_tournament_ruleset(tournament)
+    rows = list(
+        tournament.matches.filter(status=MatchStatus.REPORTED).order_by("id").values_list("id", "indices")
+    )
+    errors = validate_batch(rules.check, (indices or {} for _, indices in rows))
+    for error in errors:
+        error["match_id"] = rows[error.pop("index")][0]
+    return errors
+
+
+def sync_report_columns(match: Match) -> None:
+    """Mantém as colunas coerentes com `indices` em saves comuns (admin, shell).
+
+    Report inválido não bloqueia o save: as colunas ficam limpas e o ranking
+    volta a validar o JSON (e falhar) como antes.
+    """
+    if match.status != MatchStatus.REPORTED:
+        apply_report_columns(match, None)
+        return
+    try:
+        apply_report_columns(match, _rules_for(match).normalize(match.indices or {}))
+    except ValueError:
+        apply_report_columns(match, None)
+
+
+# -----------------------------
+# Agregação no banco (Sum/Case sobre as colunas)
+# -----------------------------
+def _side_totals(rules: CompiledRuleset, matches, side: str, other: str):
+    won = Q(winner_side=side)
+    lost = Q(winner_side=other)
+    # WO conta contra o mandante quando não há vencedor informado (mesma regra dos _apply_*)
+    wo_lost = Q(is_wo=True) & (Q(winner_side="home") if side == "away" else ~Q(winner_side="home"))
+    zero = Value(0)
+
+    points = Case(When(won, then=Value(rules.win)), When(lost, then=Value(rules.loss)), default=zero)
+    if rules.modality == "LOL" and rules.wo_loss is not None:
+        points = points + Case(When(wo_lost, then=Value(rules.wo_loss)), default=zero)
+    timed = won & Q(win_duration_sec__isnull=False)
+
+    return (
+        matches.values(team=F(f"{side}_team_id"))
+        .order_by()
+        .annotate(
+            points=Sum(points, output_field=IntegerField()),
+            wins=Count("id", filter=won),
+            losses=Count("id", filter=lost),
+            wo_count=Count("id", filter=wo_lost),
+            rounds_for=Sum(f"{side}_rounds"),
+            rounds_against=Sum(f"{other}_rounds"),
+            maps_for=Sum(f"{side}_maps"),
+            maps_against=Sum(f"{other}_maps"),
+            # ms inteiros por partida (colunas gravadas com precisão de ms): soma exata
+            win_times_ms=Sum(Round(F("win_duration_sec") * 1000), filter=timed),
+            win_times_n=Count("id", filter=timed),
+        )
+    )
+
+
+def aggregate_group_db(rules: CompiledRuleset, matches, teams: List[Team]) -> Dict[int, TeamAgg]:
+    """Agrega no banco partidas já normalizadas (todas com normalized_at preenchido).
+
+    `matches` é o queryset das partidas REPORTED do grupo. São 2 queries de totais
+    (lado mandante/visitante) + 1 leve, só com ids e vencedor, para o H2H.
+    """
+    aggs: Dict[int, TeamAgg] = {t.id: TeamAgg(team=t) for t in teams}
+
+    for side, other in (("home", "away"), ("away", "home")):
+        for row in _side_totals(rules, matches, side, other):
+            agg = aggs[row["team"]]
+            agg.points += row["points"] or 0
+            agg.wins += row["wins"]
+            agg.losses += row["losses"]
+            agg.wo_count += row["wo_count"]
+            if rules.modality == "VALORANT":
+                agg.round_diff += (row["rounds_for"] or 0) - (row["rounds_against"] or 0)
+                agg.map_diff += (row["maps_for"] or 0) - (row["maps_against"] or 0)
+            elif rules.modality == "FREE_FIRE":
+                agg.round_wins += row["rounds_for"] or 0
+            if row["win_times_n"]:
+                agg.win_times_ms += int(row["win_times_ms"])
+                agg.win_times_n += row["win_times_n"]
+
+    # H2H sempre: além do critério, ele vai no snapshot usado pelo caminho incremental
+    for home_id, away_id, winner in matches.values_list("home_team_id", "away_team_id", "winner_side"):
+        if winner == "home":
+            pts_home, pts_away = rules.win, rules.loss
+        elif winner == "away":
+            pts_home, pts_away = rules.loss, rules.win
+        else:
+            continue
+        home_h2h = aggs[home_id].h2h_points
+        away_h2h = aggs[away_id].h2h_points
+        home_h2h[away_id] = home_h2h.get(away_id, 0) + pts_home
+        away_h2h[home_id] = away_h2h.get(home_id, 0) + pts_away
+
+    return aggs
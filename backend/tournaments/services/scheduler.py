@@ -0,0 +1,269 @@
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+# Fila de recálculo com debounce: reports enfileiram o group_id; duplicatas dentro
+# da janela viram um único recalc_group_standings por grupo. Single-flight entre
+# processos via advisory lock do Postgres (lock local nos demais bancos/testes).
+#
+# O mesmo agendador, com outra função por grupo, roda a classificação matemática
+# (clinch) fora do request: ver services/clinch.py.
+
+logger = logging.getLogger(__name__)
+
+_LOCK_NAMESPACE = zlib.crc32(b"tournaments.recalc") & 0x7FFFFFFF
+_CLINCH_LOCK_NAMESPACE = zlib.crc32(b"tournaments.clinch") & 0x7FFFFFFF
+
+
+def _conf(name: str, default):
+    return getattr(settings, "TOURNAMENTS_RECALC_QUEUE", {}).get(name, default)
+
+
+def queue_enabled() -> bool:
+    return bool(_conf("ENABLED", False))
+
+
+# -----------------------------
+# Single-flight
+# -----------------------------
+_local_locks: Dict[Tuple[int, int], threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+
+@contextmanager
+def group_lock(group_id: int, namespace: int = _LOCK_NAMESPACE) -> Iterator[bool]:
+    """Tenta pegar o lock do grupo sem bloquear; devolve se conseguiu."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s, %s)", [namespace, group_id])
+            acquired = cur.fetchone()[0]
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_unlock(%s, %s)", [namespace, group_id])
+        return
+
+    with _local_locks_guard:
+        lock = _local_locks.setdefault((namespace, group_id), threading.Lock())
+    acquired = lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
+
+
+def recalc_group_now(group_id: int) -> bool:
+    """Recalcula o grupo se ninguém mais estiver recalculando; False = ocupado."""
+    from tournaments.models import Group
+    from .recalc import recalc_group_standings
+
+    close_old_connections()
+    try:
+        with group_lock(group_id) as acquired:
+            if not acquired:
+                return False
+            group = Group.objects.select_related("tournament").filter(pk=group_id).first()
+            if group is not None:
+                recalc_group_standings(group.tournament, group)
+            return True
+    finally:
+        close_old_connections()
+
+
+def clinch_group_now(group_id: int) -> bool:
+    """Calcula e guarda no cache a situação (clinch) do grupo na versão atual; False = ocupado.
+
+    Um cálculo por grupo entre processos (advisory lock); a versão já calculada
+    por outro processo sai do cache sem refazer a busca.
+    """
+    from tournaments.models import Group
+    from .clinch import refresh_group_clinch
+
+    close_old_connections()
+    try:
+        with group_lock(group_id, _CLINCH_LOCK_NAMESPACE) as acquired:
+            if not acquired:
+                return False
+            group = Group.objects.select_related("tournament").filter(pk=group_id).first()
+            if group is not None:
+                refresh_group_clinch(group.tournament, group)
+            return True
+    finally:
+        close_old_connections()
+
+
+Job = Callable[[int], bool]  # group_id -> feito (False = ocupado, tentar de novo)
+
+
+# -----------------------------
+# Agendadores
+# -----------------------------
+class RecalcScheduler:
+    """Agendador com threads (WSGI): um despachante + pool de workers."""
+
+    def __init__(self, debounce: float, workers: int, job: Job = recalc_group_now):
+        self.debounce = debounce
+        self.job = job
+        self._pending: Dict[int, float] = {}   # group_id -> prazo (monotonic)
+        self._running: Set[int] = set()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recalc")
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def enqueue(self, group_id: int) -> None:
+        with self._cond:
+            # janela fixa: o prazo conta do primeiro report, rajadas não adiam o recálculo
+            self._pending.setdefault(group_id, time.monotonic() + self.debounce)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="recalc-dispatch", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _due(self) -> list:
+        now = time.monotonic()
+        due = [gid for gid, at in self._pending.items() if at <= now and gid not in self._running]
+        for gid in due:
+            del self._pending[gid]
+            self._running.add(gid)
+        return due
+
+    def _dispatch(self) -> None:
+        with self._cond:
+            while not self._stopped:
+                for gid in self._due():
+                    self._pool.submit(self._run, gid)
+                waiting = [at for gid, at in self._pending.items() if gid not in self._running]
+                timeout = max(0.0, min(waiting) - time.monotonic()) if waiting else None
+                self._cond.wait(timeout)
+
+    def _run(self, group_id: int) -> None:
+        try:
+            done = self.job(group_id)
+        except Exception:
+            logger.exception("%s do grupo %s falhou", self.job.__name__, group_id)
+            done = True
+        with self._cond:
+            self._running.discard(group_id)
+            if not done:
+                # outro processo está recalculando: tenta de novo após a janela
+                self._pending.setdefault(group_id, time.monotonic() + self.debounce)
+            self._cond.notify()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._pool.shutdown(wait=wait)
+
+
+class AsyncRecalcScheduler:
+    """Agendador asyncio (ASGI): uma task no loop do servidor, recálculo em threads."""
+
+    def __init__(self, debounce: float, loop: asyncio.AbstractEventLoop, job: Job = recalc_group_now):
+        self.debounce = debounce
+        self.loop = loop
+        self.job = job
+        self._pending: Dict[int, float] = {}
+        self._running: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._dispatch())
+
+    def enqueue(self, group_id: int) -> None:
+        # chamado de views/sinais síncronos (threads): agenda no loop
+        self.loop.call_soon_threadsafe(self._enqueue, group_id)
+
+    def _enqueue(self, group_id: int) -> None:
+        self._pending.setdefault(group_id, self.loop.time() + self.debounce)
+        self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _dispatch(self) -> None:
+        while True:
+            now = self.loop.time()
+            for gid, at in list(self._pending.items()):
+                if at <= now and gid not in self._running:
+                    del self._pending[gid]
+                    self._running.add(gid)
+                    self.loop.create_task(self._run(gid))
+            waiting = [at for gid, at in self._pending.items() if gid not in self._running]
+            self._wakeup.clear()
+            try:
+                timeout = max(0.0, min(waiting) - self.loop.time()) if waiting else None
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, group_id: int) -> None:
+        try:
+            done = await asyncio.to_thread(self.job, group_id)
+        except Exception:
+            logger.exception("%s do grupo %s falhou", self.job.__name__, group_id)
+            done = True
+        self._running.discard(group_id)
+        if not done:
+            self._pending.setdefault(group_id, self.loop.time() + self.debounce)
+        self._wakeup.set()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._task.cancel()
+
+
+def _clinch_conf(name: str, default):
+    return getattr(settings, "TOURNAMENTS_CLINCH", {}).get(name, default)
+
+
+# tipo -> (função por grupo, debounce, workers no modo WSGI)
+_KINDS: Dict[str, Callable[[], tuple]] = {
+    "recalc": lambda: (recalc_group_now, _conf("DEBOUNCE", 2.0), _conf("WORKERS", 4)),
+    "clinch": lambda: (clinch_group_now, _clinch_conf("DEBOUNCE", 1.0), _clinch_conf("WORKERS", 1)),
+}
+_schedulers: Dict[str, object] = {}
+_scheduler_guard = threading.Lock()
+
+
+def use_asyncio(loop: asyncio.AbstractEventLoop) -> None:
+    """Troca os agendadores pelos de asyncio (chamado pelo core/asgi.py já dentro do loop)."""
+    with _scheduler_guard:
+        for kind, conf in _KINDS.items():
+            current = _schedulers.get(kind)
+            if isinstance(current, AsyncRecalcScheduler):
+                continue
+            if current is not None:
+                current.shutdown(wait=False)
+            job, debounce, _ = conf()
+            _schedulers[kind] = AsyncRecalcScheduler(debounce, loop, job)
+
+
+def get_scheduler(kind: str = "recalc"):
+    with _scheduler_guard:
+        if kind not in _schedulers:
+            job, debounce, workers = _KINDS[kind]()
+            _schedulers[kind] = RecalcScheduler(debounce, workers, job)
+        return _schedulers[kind]
+
+
+def enqueue_group_recalc(group_id: int) -> None:
+    get_scheduler().enqueue(group_id)
+
+
+def enqueue_group_clinch(group_id: int) -> None:
+    get_scheduler("clinch").enqueue(group_id)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from functools import reduce
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from tournaments.models import Match, MatchStatus, Modality, Tournament
+from .cache import bump_group_version
+
+# Agenda (scheduled_at) das partidas PENDING de um torneio.
+#
+# O tempo é dividido em slots de `base` minutos (mdc das durações); cada partida
+# ocupa k slots consecutivos, dentro de uma mesma janela diária. Guloso em ordem
+# de rodada: cada partida vai para o primeiro horário em que os dois times já
+# descansaram (em tempo, não em slots) e há vaga em todos os slots que ela ocupa.
+# Os slots que não recebem mais nada ficam para trás (um ponteiro por duração),
+# então cada partida varre só a frente ainda aberta; sem backtracking.
+
+# duração (minutos) por modalidade; Valorant depende do formato da série
+SLOT_MINUTES: Dict[str, object] = {
+    Modality.VALORANT: {"MD1": 60, "MD3": 150},
+    Modality.FREE_FIRE: 30,
+    Modality.LOL: 45,
+}
+
+
+@dataclass
+class ScheduleResult:
+    scheduled: int
+    first_start: Optional[datetime]
+    last_end: Optional[datetime]
+
+
+def match_minutes(tournament: Tournament, match: Match, override: Optional[int] = None) -> int:
+    """Duração prevista da partida: `override`, formato informado (Valorant) ou padrão da modalidade."""
+    if override:
+        return override
+    minutes = SLOT_MINUTES[tournament.modality]
+    if isinstance(minutes, dict):
+        # formato pode vir pré-definido na partida ou no ruleset do torneio
+        mode = (match.indices or {}).get("mode") or (tournament.ruleset or {}).get("mode") or "MD3"
+        return minutes.get(mode, max(minutes.values()))
+    return minutes
+
+
+class _Calendar:
+    """Converte slots (inteiros) em datetimes, respeitando a janela diária opcional.
+
+    Com janela, os slots de cada dia são contíguos (o slot seguinte ao último do
+    dia é o primeiro do dia seguinte); o intervalo entre janelas só conta no
+    descanso (ready).
+    """
+
+    def __init__(self, start: datetime, base: int, day_start: Optional[time], day_end: Optional[time]):
+        self.minutes = base
+        self.base = timedelta(minutes=base)
+        if day_start is None or day_end is None:
+            self.start, self.per_day, self.skip = start, None, 0
+            return
+        window = (datetime.combine(start.date(), day_end) - datetime.combine(start.date(), day_start))
+        self.per_day = int(window / self.base)
+        if self.per_day <= 0:
+            raise ValueError("Janela diária menor que um slot")
+        tz = start.tzinfo
+        first = datetime.combine(start.date(), day_start, tzinfo=tz)
+        # começa no primeiro slot da janela que não seja antes de `start`
+        offset = max(0, math.ceil((start - first) / self.base))
+        if offset >= self.per_day:
+            first, offset = first + timedelta(days=1), 0
+        self.start, self.skip = first, offset
+
+    def next_fit(self, slot: int, length: int) -> int:
+        """Primeiro slot >= `slot` em que `length` slots cabem sem passar do fim da janela."""
+        if self.per_day is None:
+            return slot
+        offset = (slot + self.skip) % self.per_day
+        return slot if offset + length <= self.per_day else slot + self.per_day - offset
+
+    def ready(self, end: int, rest: int) -> int:
+        """Primeiro slot que começa pelo menos `rest` minutos depois do fim do slot `end - 1`."""
+        if self.per_day is None or not rest:
+            return end + -(-rest // self.minutes)
+        # em minutos desde o início da janela do primeiro dia
+        day, offset = divmod(end - 1 + self.skip, self.per_day)
+        day, moment = divmod(day * 1440 + (offset + 1) * self.minutes + rest, 1440)
+        offset = -(-moment // self.minutes)
+        if offset >= self.per_day:
+            day, offset = day + 1, 0
+        return max(end, day * self.per_day + offset - self.skip)
+
+    def to_datetime(self, slot: int) -> datetime:
+        if self.per_day is None:
+            return self.start + slot * self.base
+        slot += self.skip
+        day, offset = divmod(slot, self.per_day)
+        return self.start + timedelta(days=day) + offset * self.base
+
+
+def assign_slots(
+    items: List[Tuple[int, int, int]],
+    capacity: int,
+    calendar: _Calendar,
+    rest: int = 0,
+) -> List[int]:
+    """Slot inicial de cada (home, away, duração em slots), na ordem dada.
+
+    `capacity`: partidas simultâneas; `rest`: descanso mínimo (minutos) entre jogos do
+    mesmo time, em tempo (a noite entre duas janelas conta como descanso).
+    """
+    if capacity < 1:
+        raise ValueError("capacity deve ser >= 1")
+    load: List[int] = []               # partidas em andamento por slot
+    free_at: Dict[int, int] = {}       # time -> primeiro slot em que pode jogar
+    # por duração: primeiro início ainda viável. Slot cheio e fim de janela são
+    # permanentes, então o ponteiro só avança e cada partida varre só a frente aberta
+    first_open: Dict[int, int] = {}
+    starts: List[int] = []
+
+    def place(slot: int, length: int) -> int:
+        while True:
+            slot = calendar.next_fit(slot, length)
+            end = slot + length
+            if len(load) < end:
+                load.extend([0] * (end - len(load)))
+            busy = next((s for s in range(slot, end) if load[s] >= capacity), None)
+            if busy is None:
+                return slot
+            slot = busy + 1
+
+    for home, away, length in items:
+        opened = first_open[length] = place(first_open.get(length, 0), length)
+        slot = place(max(opened, free_at.get(home, 0), free_at.get(away, 0)), length)
+        for s in range(slot, slot + length):
+            load[s] += 1
+        free_at[home] = free_at[away] = calendar.ready(slot + length, rest)
+        starts.append(slot)
+    return starts
+
+
+@transaction.atomic
+def schedule_tournament(
+    tournament: Tournament,
+    start: datetime,
+    capacity: int,
+    rest_minutes: int = 0,
+    slot_minutes: Optional[int] = None,
+    day_start: Optional[time] = None,
+    day_end: Optional[time] = None,
+    save: bool = True,
+) -> ScheduleResult:
+    """Preenche scheduled_at das partidas PENDING (todas são reagendadas) e grava em lote."""
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    matches = list(
+        tournament.matches.filter(status=MatchStatus.PENDING)
+        .order_by("round_number", "group_id", "id")
+    )
+    if not matches:
+        return ScheduleResult(0, None, None)
+
+    minutes = [match_minutes(tournament, m, slot_minutes) for m in matches]
+    base = reduce(math.gcd, set(minutes))
+    calendar = _Calendar(start, base, day_start, day_end)
+    items = [(m.home_team_id, m.away_team_id, d // base) for m, d in zip(matches, minutes)]
+    if calendar.per_day is not None and max(k for *_, k in items) > calendar.per_day:
+        raise ValueError("Partida mais longa que a janela diária")
+
+    starts = assign_slots(items, capacity, calendar, rest_minutes)
+
+    now = timezone.now()
+    for m, slot in zip(matches, starts):
+        m.scheduled_at = calendar.to_datetime(slot)
+        m.updated_at = now  # bulk_update não aplica auto_now
+    if save:
+        Match.objects.bulk_update(matches, ["scheduled_at", "updated_at"], batch_size=1000)
+        for gid in {m.group_id for m in matches}:
+            transaction.on_commit(lambda gid=gid: bump_group_version(gid))
+
+    last = max(range(len(matches)), key=lambda i: starts[i] + items[i][2])
+    return ScheduleResult(
+        scheduled=len(matches),
+        first_start=calendar.to_datetime(min(starts)),
+        last_end=matches[last].scheduled_at + timedelta(minutes=minutes[last]),
+    )
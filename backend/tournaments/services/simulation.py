@@ -0,0 +1,292 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from django.db import connections
+
+from tournaments.models import Group, MatchStatus, Tournament
+from .columnar import _require_numpy, aggregate_columnar, np
+from .draw import team_rating
+from .parallel import _init_worker
+from .ranking import _tiebreak_plan, compile_ruleset, compile_tournament_ruleset, match_report
+
+# Simulação Monte Carlo das partidas PENDING de um grupo.
+#
+# Cada amostra sorteia o vencedor de cada partida pendente (uniforme ou pelo
+# rating de Team.meta, curva Elo) e reordena o grupo com a mesma pontuação e os
+# mesmos tiebreakers do ranking. As amostras são processadas em lote: colunas
+# (amostras × times) somadas com bincount e ordenadas com lexsort; H2H vira a
+# mini-liga calculada sobre a matriz (amostras × N × N), montada só quando o
+# plano tem H2H. O tamanho do lote sai de N e das partidas pendentes.
+#
+# Rounds, mapas e tempos de uma partida simulada são copiados de uma partida já
+# reportada do grupo (sorteada), vistos pelo lado do vencedor; sem partidas
+# reportadas, entram zerados.
+
+CHUNK = 5000        # amostras por lote, no máximo
+# células por lote: amostras × partidas pendentes e, com H2H no plano, amostras × N².
+# Cada célula custa algumas dezenas de bytes nos temporários (~150 MB por lote).
+CHUNK_CELLS = 2_000_000
+ELO_SCALE = 400.0
+
+# mesmas chaves de columnar._COLUMN_KEYS, sobre colunas (amostras × times)
+_SAMPLE_KEYS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "WO_FEWEST": lambda c: c["wo_count"],
+    "WINS": lambda c: -c["wins"],
+    "ROUND_DIFF": lambda c: -c["round_diff"],
+    "MAP_DIFF": lambda c: -c["map_diff"],
+    "ROUND_WINS": lambda c: -c["round_wins"],
+    "AVG_WIN_TIME": lambda c: np.divide(
+        c["win_times_ms"], c["win_times_n"] * 1000,
+        out=np.full(c["win_times_n"].shape, np.inf), where=c["win_times_n"] > 0,
+    ),
+}
+
+
+@dataclass
+class GroupSnapshot:
+    """Estado do grupo para simular (só arrays; vai por pickle para os workers)."""
+    modality: str
+    ruleset: Dict[str, Any]
+    team_ids: List[int]
+    team_names: List[str]
+    base: Dict[str, "np.ndarray"]   # colunas das partidas REPORTED, (N,)
+    h2h: "np.ndarray"               # (N, N)
+    home: "np.ndarray"              # índices dos times das partidas PENDING, (P,)
+    away: "np.ndarray"
+    p_home: "np.ndarray"            # probabilidade de vitória do mandante, (P,)
+    templates: "np.ndarray"         # (T, 5): saldo de rounds, saldo de mapas, rounds do vencedor,
+                                    #         rounds do perdedor, duração (0 = sem tempo)
+
+
+@dataclass
+class TeamOdds:
+    team_id: int
+    team: str
+    positions: List[float]   # probabilidade de terminar em cada posição (1ª, 2ª, ...)
+    advance: float           # probabilidade de terminar entre os `advance_per_group`
+
+
+@dataclass
+class SimulationResult:
+    samples: int
+    pending: int
+    advance_per_group: int
+    teams: List[TeamOdds]    # na ordem atual do grupo
+
+
+def win_probability(r_home: "np.ndarray", r_away: "np.ndarray", scale: float = ELO_SCALE) -> "np.ndarray":
+    """Curva Elo: ratings iguais (ou ausentes) -> 50%."""
+    return 1.0 / (1.0 + 10.0 ** ((r_away - r_home) / scale))
+
+
+def load_snapshot(
+    tournament: Tournament, group: Group, rating_key: Optional[str] = None, scale: float = ELO_SCALE
+) -> GroupSnapshot:
+    """Lê inscrições e partidas do grupo (2 queries) e agrega as REPORTED."""
+    _require_numpy()
+    rules = compile_tournament_ruleset(tournament)
+    teams = list(
+        tournament.enrollments.filter(group=group).order_by("team_id")
+        .values_list("team_id", "team__name", "team__meta")
+    )
+    team_ids = [tid for tid, _, _ in teams]
+    pos = {tid: i for i, tid in enumerate(team_ids)}
+
+    reported, pending = [], []
+    for m in group.matches.filter(tournament=tournament).order_by("id"):
+        (reported if m.status == MatchStatus.REPORTED else pending).append(m)
+
+    table = aggregate_columnar(rules, team_ids, reported, with_h2h=True)
+
+    templates = []
+    for m in reported:
+        rep = match_report(rules, m)
+        if m.is_wo or rep.winner not in ("home", "away"):
+            continue
+        w, l = ("home", "away") if rep.winner == "home" else ("away", "home")
+        rounds = {"home": rep.home_rounds, "away": rep.away_rounds}
+        maps = {"home": rep.home_maps, "away": rep.away_maps}
+        templates.append((rounds[w] - rounds[l], maps[w] - maps[l], rounds[w], rounds[l], rep.win_duration or 0))
+
+    home = np.asarray([pos[m.home_team_id] for m in pending], dtype=np.intp)
+    away = np.asarray([pos[m.away_team_id] for m in pending], dtype=np.intp)
+    if rating_key:
+        ratings = np.asarray([team_rating(meta, rating_key) for _, _, meta in teams], dtype=np.float64)
+        p_home = win_probability(ratings[home], ratings[away], scale)
+    else:
+        p_home = np.full(len(pending), 0.5)
+
+    return GroupSnapshot(
+        modality=rules.modality,
+        ruleset=tournament.ruleset,
+        team_ids=team_ids,
+        team_names=[name for _, name, _ in teams],
+        base=table.cols,
+        h2h=table.h2h,
+        home=home,
+        away=away,
+        p_home=p_home,
+        templates=np.asarray(templates, dtype=np.float64).reshape(-1, 5),
+    )
+
+
+def _scatter(target: "np.ndarray", flat_idx: "np.ndarray", weights) -> None:
+    # bincount é bem mais rápido que np.add.at para somar em índices repetidos
+    target += np.bincount(flat_idx, weights=weights, minlength=target.size).reshape(target.shape).astype(target.dtype)
+
+
+def _plan(snap: GroupSnapshot):
+    rules = compile_ruleset(snap.modality, snap.ruleset)
+    return rules, _tiebreak_plan(rules.tiebreakers, _SAMPLE_KEYS)
+
+
+def _uses_h2h(plan) -> bool:
+    return any(kind == "h2h" for kind, _ in plan)
+
+
+def chunk_size(snap: GroupSnapshot, with_h2h: bool) -> int:
+    """Amostras por lote para que os arrays do lote caibam em CHUNK_CELLS."""
+    N = len(snap.team_ids)
+    per_sample = max(len(snap.home), N * N if with_h2h else N, 1)
+    return max(1, min(CHUNK, CHUNK_CELLS // per_sample))
+
+
+def sample_columns(
+    snap: GroupSnapshot, n: int, rng: "np.random.Generator", win: int, loss: int, with_h2h: bool = True
+):
+    """Colunas (n × N) e H2H (n × N × N) de `n` amostras das partidas pendentes.
+
+    Sem `with_h2h` (plano sem H2H), a matriz não é montada e volta None.
+    """
+    N, P = len(snap.team_ids), len(snap.home)
+    cols = {k: np.repeat(v[None, :], n, axis=0) for k, v in snap.base.items()}
+    h2h = np.repeat(snap.h2h[None, :, :], n, axis=0) if with_h2h else None
+    if not P:
+        return cols, h2h
+
+    home_won = rng.random((n, P)) < snap.p_home
+    w = np.where(home_won, snap.home, snap.away).ravel()
+    l = np.where(home_won, snap.away, snap.home).ravel()
+    s = np.repeat(np.arange(n), P)
+    wi, li = s * N + w, s * N + l
+
+    _scatter(cols["points"], wi, np.full(len(wi), win))
+    _scatter(cols["points"], li, np.full(len(li), loss))
+    _scatter(cols["wins"], wi, None)
+    _scatter(cols["losses"], li, None)
+    if with_h2h:
+        _scatter(h2h, s * N * N + w * N + l, np.full(len(wi), win))
+        _scatter(h2h, s * N * N + l * N + w, np.full(len(wi), loss))
+
+    if len(snap.templates):
+        t = snap.templates[rng.integers(len(snap.templates), size=n * P)]
+        if snap.modality == "VALORANT":
+            _scatter(cols["round_diff"], wi, t[:, 0])
+            _scatter(cols["round_diff"], li, -t[:, 0])
+            _scatter(cols["map_diff"], wi, t[:, 1])
+            _scatter(cols["map_diff"], li, -t[:, 1])
+        elif snap.modality == "FREE_FIRE":
+            _scatter(cols["round_wins"], wi, t[:, 2])
+            _scatter(cols["round_wins"], li, t[:, 3])
+        timed = t[:, 4] > 0
+        _scatter(cols["win_times_ms"], wi[timed], np.rint(t[timed, 4] * 1000))
+        _scatter(cols["win_times_n"], wi[timed], None)
+    return cols, h2h
+
+
+def _same_block(keys: List["np.ndarray"]) -> "np.ndarray":
+    same = np.ones(keys[0].shape + keys[0].shape[-1:], dtype=bool)
+    for k in keys:
+        same &= k[:, :, None] == k[:, None, :]
+    return same
+
+
+def rank_samples(plan, cols: Dict[str, "np.ndarray"], h2h: Optional["np.ndarray"]) -> "np.ndarray":
+    """Ordem final (n × N, índices dos times) de cada amostra; mesma semântica de rank_columnar.
+
+    Passos "keys" viram chaves do lexsort. Na mini-liga, os pontos de H2H entre os
+    empatados viram mais uma chave e ela é refeita enquanto separar algum bloco.
+    """
+    keys = [-cols["points"]]
+    for kind, fns in plan:
+        if kind == "keys":
+            keys += [f(cols) for f in fns]
+            continue
+        same = _same_block(keys)
+        while True:
+            mini = (h2h * same).sum(axis=2)
+            split = same & (mini[:, :, None] == mini[:, None, :])
+            if (split == same).all():
+                break
+            keys.append(-mini)
+            same = split
+    n, N = keys[0].shape
+    # lexsort: última chave é a principal; empates finais ficam em ordem de team_id
+    return np.lexsort(tuple([np.broadcast_to(np.arange(N), (n, N))] + keys[::-1]), axis=-1)
+
+
+def simulate_chunk(snap: GroupSnapshot, n: int, seed) -> "np.ndarray":
+    """Contagem (N × N) de [time, posição] em `n` amostras."""
+    rules, plan = _plan(snap)
+    cols, h2h = sample_columns(snap, n, np.random.default_rng(seed), rules.win, rules.loss, _uses_h2h(plan))
+    order = rank_samples(plan, cols, h2h)
+    N = len(snap.team_ids)
+    flat = order.ravel() * N + np.tile(np.arange(N), n)
+    return np.bincount(flat, minlength=N * N).reshape(N, N)
+
+
+def run_samples(snap: GroupSnapshot, samples: int, seed: Optional[int] = None, workers: int = 1) -> "np.ndarray":
+    """Distribui as amostras em lotes de chunk_size (num ProcessPoolExecutor se workers > 1).
+
+    As sementes dos lotes saem de uma SeedSequence: com `seed` fixo o resultado
+    não depende do número de workers.
+    """
+    chunk = chunk_size(snap, _uses_h2h(_plan(snap)[1]))
+    sizes = [chunk] * (samples // chunk) + ([samples % chunk] if samples % chunk else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    N = len(snap.team_ids)
+    counts = np.zeros((N, N), dtype=np.int64)
+    if workers == 1 or len(sizes) == 1:
+        for n, s in zip(sizes, seeds):
+            counts += simulate_chunk(snap, n, s)
+        return counts
+
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for part in pool.map(simulate_chunk, [snap] * len(sizes), sizes, seeds):
+            counts += part
+    return counts
+
+
+def simulate_group(
+    tournament: Tournament,
+    group: Group,
+    samples: int = 10_000,
+    rating_key: Optional[str] = None,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> SimulationResult:
+    """Probabilidades de cada posição final e de classificação para os times do grupo.
+
+    `rating_key`: chave de Team.meta usada como rating (None = 50% para todos).
+    """
+    if samples < 1:
+        raise ValueError("samples deve ser >= 1")
+    snap = load_snapshot(tournament, group, rating_key)
+    counts = run_samples(snap, samples, seed, workers) if snap.team_ids else np.zeros((0, 0))
+
+    current = dict(group.standings.values_list("team_id", "order_rank"))
+    k = tournament.advance_per_group
+    teams = [
+        TeamOdds(
+            team_id=tid,
+            team=snap.team_names[i],
+            positions=(counts[i] / samples).round(6).tolist(),
+            advance=round(float(counts[i, :k].sum()) / samples, 6),
+        )
+        for i, tid in enumerate(snap.team_ids)
+    ]
+    teams.sort(key=lambda t: (current.get(t.team_id, len(teams) + 1), t.team_id))
+    return SimulationResult(samples=samples, pending=len(snap.home), advance_per_group=k, teams=teams)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+import random
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+
+from tournaments.models import (
+    Enrollment, Group, Match, MatchStatus, Modality, Team, Tournament, TournamentStatus,
+)
+from tournaments.modalities import get_ruleset
+from .draw import group_code
+from .ranking import compile_ruleset
+from .report import apply_report_columns, wo_indices
+
+# Gerador de torneios sintéticos (benchmarks e testes de carga).
+# Os `indices` seguem o formato de cada modalidade e passam pelos validadores;
+# a mesma semente gera sempre o mesmo torneio.
+
+VALORANT_MAPS = ["Ascent", "Bind", "Haven", "Split", "Lotus", "Sunset", "Icebox"]
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    modality: str = Modality.VALORANT
+    groups: int = 4
+    teams_per_group: int = 4
+    legs: int = 1               # 1 = turno único, 2 = ida e volta
+    reported: float = 1.0       # fração das partidas já reportadas
+    wo_rate: float = 0.05       # fração dos reports que são WO
+    tie_density: float = 0.0    # fração das partidas com resultado "cíclico" (gera empates)
+    valorant_mode: str = "MD3"
+    normalized: bool = True     # False = deixa as colunas vazias (ranking lê o JSON)
+    seed: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _other(side: str) -> str:
+    return "away" if side == "home" else "home"
+
+
+def _valorant(rng: random.Random, winner: str, tie: bool, mode: str) -> Dict[str, Any]:
+    n_maps = 1 if mode == "MD1" else rng.choice((2, 3))
+    # em MD3 o perdedor leva um mapa quando a série vai a 3
+    map_winners = [winner] * n_maps
+    if n_maps == 3:
+        map_winners[rng.randrange(2)] = _other(winner)
+    rounds = []
+    for side in map_winners:
+        if tie:
+            score = {side: 13, _other(side): 11}
+        elif rng.random() < 0.15:
+            loser = rng.randint(12, 14)
+            score = {side: loser + 2, _other(side): loser}  # prorrogação
+        else:
+            score = {side: 13, _other(side): rng.randint(0, 11)}
+        rounds.append(score)
+    return {
+        "mode": mode if n_maps > 1 else "MD1",
+        "maps": rng.sample(VALORANT_MAPS, n_maps),
+        "rounds": rounds,
+        "winner": winner,
+        "avgWinTimeSec": 95.0 if tie else round(rng.uniform(70, 130), 1),
+    }
+
+
+def _free_fire(rng: random.Random, winner: str, tie: bool) -> Dict[str, Any]:
+    loser = 2 if tie else rng.randint(0, 3)
+    return {"roundWins": {winner: 4, _other(winner): loser}, "winner": winner}
+
+
+def _lol(rng: random.Random, winner: str, tie: bool) -> Dict[str, Any]:
+    loser = _other(winner)
+    return {
+        "winner": winner,
+        "gameDurationSec": 1800 if tie else rng.randint(1500, 2700),
+        "kills": {winner: rng.randint(15, 35), loser: rng.randint(3, 20)},
+        "turrets": {winner: rng.randint(6, 11), loser: rng.randint(0, 5)},
+        "dragons": {winner: rng.randint(2, 5), loser: rng.randint(0, 2)},
+        "barons": {winner: rng.randint(0, 2), loser: 0},
+    }
+
+
+def generate_indices(
+    modality: str,
+    winner: str,
+    rng: random.Random,
+    tie: bool = False,
+    wo: bool = False,
+    valorant_mode: str = "MD3",
+) -> Dict[str, Any]:
+    """`indices` plausíveis para uma partida vencida por `winner` (home|away)."""
+    m = modality.upper()
+    if wo:
+        return wo_indices(m, winner)
+    if m == Modality.VALORANT:
+        return _valorant(rng, winner, tie, valorant_mode)
+    if m == Modality.FREE_FIRE:
+        return _free_fire(rng, winner, tie)
+    if m == Modality.LOL:
+        return _lol(rng, winner, tie)
+    raise ValueError(f"Modality not supported: {modality}")
+
+
+def _pairings(n: int, legs: int) -> List[tuple]:
+    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+    if legs == 2:
+        pairs += [(j, i) for i, j in pairs]
+    return pairs
+
+
+@transaction.atomic
+def create_synthetic_tournament(spec: SyntheticSpec, name: Optional[str] = None) -> Tournament:
+    """Cria torneio, times, grupos, inscrições e partidas (com bulk_create)."""
+    if spec.legs not in (1, 2):
+        raise ValueError("legs deve ser 1 ou 2")
+    if spec.teams_per_group < 2 or spec.groups < 1:
+        raise ValueError("precisa de ao menos 1 grupo com 2 times")
+    rng = random.Random(spec.seed)
+    tag = uuid.uuid4().hex[:8]
+    modality = spec.modality.upper()
+
+    tournament = Tournament.objects.create(
+        name=name or f"bench-{modality.lower()}-{tag}",
+        modality=modality,
+        groups_count=spec.groups,
+        teams_per_group=spec.teams_per_group,
+        ruleset=get_ruleset(modality),
+        status=TournamentStatus.ACTIVE,
+    )
+    rules = compile_ruleset(modality, tournament.ruleset)
+
+    codes = [group_code(i) for i in range(spec.groups)]
+    Group.objects.bulk_create([Group(tournament=tournament, code=c) for c in codes])
+    groups = list(tournament.groups.order_by("id"))
+
+    names = [f"bench-{tag}-{g}-{i}" for g in range(spec.groups) for i in range(spec.teams_per_group)]
+    Team.objects.bulk_create([Team(name=n) for n in names])
+    team_ids = dict(Team.objects.filter(name__in=names).values_list("name", "id"))
+
+    enrollments, matches = [], []
+    for g, group in enumerate(groups):
+        ids = [team_ids[f"bench-{tag}-{g}-{i}"] for i in range(spec.teams_per_group)]
+        # força relativa: decide o vencedor das partidas "normais"
+        strength = [rng.random() for _ in ids]
+        enrollments += [Enrollment(tournament=tournament, team_id=t, group=group) for t in ids]
+
+        n = len(ids)
+        for a, b in _pairings(n, spec.legs):
+            m = Match(tournament=tournament, group=group, home_team_id=ids[a], away_team_id=ids[b])
+            matches.append(m)
+            if rng.random() >= spec.reported:
+                continue
+            tie = rng.random() < spec.tie_density
+            if tie:
+                # torneio cíclico: cada time vence metade dos confrontos -> pontos iguais
+                winner = "home" if (b - a) % n <= n // 2 else "away"
+            else:
+                p_home = strength[a] / ((strength[a] + strength[b]) or 1)
+                winner = "home" if rng.random() < p_home else "away"
+            wo = rng.random() < spec.wo_rate
+            m.indices = generate_indices(modality, winner, rng, tie, wo, spec.valorant_mode)
+            m.is_wo = wo
+            m.status = MatchStatus.REPORTED
+            m.result = {"winner": winner}
+            if spec.normalized:
+                apply_report_columns(m, rules.normalize(m.indices))
+
+    Enrollment.objects.bulk_create(enrollments, batch_size=2000)
+    Match.objects.bulk_create(matches, batch_size=2000)
+    return tournament
+
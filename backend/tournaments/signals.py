@@ -1,10 +1,111 @@
-from django.db.models.signals import pre_save
+import json
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
-from .models import Tournament
+from django.utils import timezone
+from .models import Tournament, Group, Team, Match, Enrollment
 from .modalities import get_ruleset
+from .services.cache import bump_group_version, bump_tournament_version
+from .services.report import sync_report_columns
+from .services.scheduler import enqueue_group_recalc, queue_enabled
 
 @receiver(pre_save, sender=Tournament)
 def fill_ruleset(sender, instance: Tournament, **kwargs):
     # se não houver ruleset ou estiver vazio, popular a partir da modalidade
     if not instance.ruleset:
         instance.ruleset = get_ruleset(instance.modality)
+
+
+@receiver(pre_save, sender=Match)
+def normalize_report_columns(sender, instance: Match, update_fields=None, **kwargs):
+    # report_match() já preencheu as colunas (e salva com update_fields incluindo normalized_at)
+    if update_fields is not None and "normalized_at" in update_fields:
+        return
+    sync_report_columns(instance)
+
+
+# -----------------------------
+# Invalidação do cache de tabelas (versões por grupo/torneio)
+# -----------------------------
+# os incrementos rodam no commit: ninguém lê dado antigo com a versão nova
+
+def _ruleset_digest(instance: Tournament):
+    if "ruleset" not in instance.__dict__:  # campo adiado (defer/only)
+        return None
+    return json.dumps(instance.ruleset, sort_keys=True, default=str)
+
+@receiver(post_init, sender=Tournament)
+def remember_ruleset(sender, instance: Tournament, **kwargs):
+    instance._loaded_ruleset = _ruleset_digest(instance)
+
+@receiver(post_save, sender=Tournament)
+def bump_on_ruleset_change(sender, instance: Tournament, created: bool, **kwargs):
+    digest = _ruleset_digest(instance)
+    if not created and digest != instance._loaded_ruleset:
+        instance.__dict__.pop("_compiled_ruleset", None)  # memo de compile_tournament_ruleset
+        transaction.on_commit(lambda: bump_tournament_version(instance.pk))
+    instance._loaded_ruleset = digest
+
+def _group_ids(instance):
+    return {instance.group_id, getattr(instance, "_loaded_group_id", None)} - {None}
+
+@receiver(post_init, sender=Match)
+@receiver(post_init, sender=Enrollment)
+def remember_group(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.__dict__.get("group_id")
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def bump_on_group_change(sender, instance, **kwargs):
+    # partida/inscrição que trocou de grupo invalida o grupo antigo também
+    for gid in _group_ids(instance):
+        transaction.on_commit(lambda gid=gid: bump_group_version(gid))
+
+
+# nomes de time e códigos de grupo entram nos payloads versionados (grupo, tabela,
+# standings, qualificação): renomear invalida os grupos em que aparecem
+@receiver(post_init, sender=Team)
+def remember_name(sender, instance: Team, **kwargs):
+    instance._loaded_name = instance.__dict__.get("name")
+
+@receiver(post_save, sender=Team)
+def bump_on_team_rename(sender, instance: Team, created: bool, **kwargs):
+    if created or instance.name == instance._loaded_name:
+        return
+    instance._loaded_name = instance.name
+    for gid in set(Enrollment.objects.filter(team=instance).values_list("group_id", flat=True)):
+        transaction.on_commit(lambda gid=gid: bump_group_version(gid))
+
+@receiver(post_init, sender=Group)
+def remember_code(sender, instance: Group, **kwargs):
+    instance._loaded_code = instance.__dict__.get("code")
+
+@receiver(post_save, sender=Group)
+def bump_on_code_change(sender, instance: Group, created: bool, **kwargs):
+    if created or instance.code == instance._loaded_code:
+        return
+    instance._loaded_code = instance.code
+    transaction.on_commit(lambda: bump_group_version(instance.pk))
+    # tournament_detail lista os códigos; o ETag dele sai de updated_at
+    Tournament.objects.filter(pk=instance.tournament_id).update(updated_at=timezone.now())
+
+
+# -----------------------------
+# Fila de recálculo (opcional, TOURNAMENTS_RECALC_QUEUE["ENABLED"])
+# -----------------------------
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def enqueue_recalc(sender, instance: Match, **kwargs):
+    if queue_enabled():
+        for gid in _group_ids(instance):
+            transaction.on_commit(lambda gid=gid: enqueue_group_recalc(gid))
+
+
+# registrado por último: os receivers acima ainda veem o grupo carregado
+@receiver(post_save, sender=Match)
+@receiver(post_save, sender=Enrollment)
+def reset_loaded_group(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.group_id
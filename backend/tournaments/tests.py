@@ -1,3 +1,967 @@
-from django.test import TestCase
+import asyncio
+import copy
+import itertools
+import json
+import os
+import random
+import tempfile
+from dataclasses import replace
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .modalities import get_ruleset
+from .modalities.schema import compile_schema, validate_batch
+from .models import Match, MatchStatus, Modality, Standing, Team, Tournament
+from .services.cache import _LocalLRU, bump_group_version, group_version, reset_cache
+from .services.columnar import build_group_table_columnar, np
+from .services.clinch import ALIVE, CLINCHED, ELIMINATED, clinch_status, refresh_group_clinch
+from .services.draw import DRAW_METHODS, DRAW_RANDOM, DRAW_SNAKE, assign_groups, round_robin
+from .services.importer import import_records
+from .services import live, metrics
+from .services.leaderboard import get_leaderboard, rank_leaderboard, refresh_leaderboard
+from .services.qualification import bracket_order, qualify
+from .services.ranking import (
+    TeamAgg, _sort_block, _tiebreak_plan, compile_ruleset, compile_tournament_ruleset, compute_group_table,
+    compute_tournament_tables, match_contribution, merge_agg, rank_aggs,
+)
+from .services.recalc import _stats_from_agg, recalc_group_standings, recalc_tournament_standings
+from .services.report import report_match, unreport_match, validate_tournament_reports
+from .services.scheduling import _Calendar, assign_slots
+from .services.scheduler import _CLINCH_LOCK_NAMESPACE, clinch_group_now, group_lock
+from .services.simulation import CHUNK_CELLS, _plan, chunk_size, load_snapshot, rank_samples, sample_columns
+from .services.synthetic import SyntheticSpec, create_synthetic_tournament, generate_indices
+
+# Orçamento de queries e planos (EXPLAIN) dos serviços de ranking.
+#
+# Os dados vêm do gerador sintético: um torneio "pequeno" (grupos de 4) e um
+# "grande" (grupos de 10) da mesma modalidade, mais um de outra modalidade como
+# ruído. Os orçamentos são fixos e valem para os dois tamanhos: uma query por
+# time/partida (N+1) quebra o teste. Ao mudar um serviço de propósito, ajuste
+# o número aqui junto, no mesmo commit.
+
+
+class _SyntheticData(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = create_synthetic_tournament(
+            SyntheticSpec(groups=3, teams_per_group=4, reported=0.7, tie_density=0.3, seed=1), name="small"
+        )
+        cls.large = create_synthetic_tournament(
+            SyntheticSpec(groups=3, teams_per_group=10, reported=0.7, tie_density=0.3, seed=2), name="large"
+        )
+        create_synthetic_tournament(
+            SyntheticSpec(modality=Modality.LOL, groups=2, teams_per_group=6, seed=3), name="noise"
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_cache()
+
+    def first_group(self, tournament):
+        return tournament.groups.order_by("code").first()
+
+
+class QueryBudgetTests(_SyntheticData):
+    def assertBudget(self, budget, fn):
+        """`fn(tournament, group)` custa `budget` queries nos dois torneios (group = o primeiro)."""
+        for tournament in (self.small, self.large):
+            group = self.first_group(tournament)
+            with self.subTest(tournament=tournament.name), self.assertNumQueries(budget):
+                fn(tournament, group)
+
+    def test_compute_group_table(self):
+        # inscrições, times, checagem de não normalizadas, totais mandante/visitante, H2H
+        self.assertBudget(6, lambda t, g: compute_group_table(t, g.id))
+
+    def test_compute_tournament_tables(self):
+        self.assertBudget(2, lambda t, g: compute_tournament_tables(t))
+
+    def test_recalc_group_standings(self):
+        # tabela (6) + delete e um INSERT dos Standings + quadro geral, com os savepoints do atomic
+        self.assertBudget(15, recalc_group_standings)
+
+    def test_report_match_delta(self):
+        # caminho incremental: save, Standings + inscrições do grupo, um UPDATE em lote e
+        # o quadro geral, com os savepoints; nenhuma partida do grupo é relida
+        rng = random.Random(0)
+        for tournament in (self.small, self.large):
+            group = self.first_group(tournament)
+            recalc_group_standings(tournament, group)
+            match = group.matches.select_related("tournament", "group").filter(status=MatchStatus.PENDING).first()
+            indices = generate_indices(tournament.modality, "home", rng)
+            with self.subTest(tournament=tournament.name), self.assertNumQueries(13):
+                report_match(match, indices)
+
+    def test_recalc_tournament_standings(self):
+        self.assertBudget(11, lambda t, g: recalc_tournament_standings(t))
+
+    def test_recalc_tournament_standings_constant_in_groups(self):
+        # mesmo orçamento com 1 ou 8 grupos; na regravação (upsert) o quadro geral já
+        # existe e não há INSERT de entradas novas
+        for groups in (1, 8):
+            tournament = create_synthetic_tournament(
+                SyntheticSpec(groups=groups, teams_per_group=6, reported=0.8, seed=groups), name=f"g{groups}"
+            )
+            for run, budget in (("first", 11), ("again", 10)):
+                with self.subTest(groups=groups, run=run), self.assertNumQueries(budget):
+                    recalc_tournament_standings(tournament)
+
+    def test_refresh_leaderboard(self):
+        recalc_tournament_standings(self.small)
+        recalc_tournament_standings(self.large)
+        self.assertBudget(4, lambda t, g: refresh_leaderboard(t))
+        self.assertBudget(1, lambda t, g: get_leaderboard(t.id))
+        # posições sem mudança: lê o quadro e não grava nada (mais os savepoints)
+        self.assertBudget(3, lambda t, g: rank_leaderboard(t))
+
+    def test_validate_tournament_reports(self):
+        self.assertBudget(1, lambda t, g: validate_tournament_reports(t))
+
+    def test_load_snapshot(self):
+        self.assertBudget(2, load_snapshot)
+
+    def test_clinch_status(self):
+        self.assertBudget(7, clinch_status)
+
+    def test_match_list_page(self):
+        # página da API REST: 1 query (relacionamentos por select_related)
+        for tournament in (self.small, self.large):
+            with self.subTest(tournament=tournament.name), self.assertNumQueries(1):
+                response = self.client.get(f"/api/tournaments/{tournament.id}/matches/")
+            self.assertEqual(response.status_code, 200)
+
+
+class QueryPlanTests(_SyntheticData):
+    """As queries quentes de Match precisam ser servidas pelos índices do modelo."""
+
+    def explain(self, queryset) -> str:
+        if connection.vendor == "postgresql":
+            # com poucas linhas o planner prefere seq scan e o plano não diz nada
+            # sobre os índices; desligado, ele mostra o melhor índice disponível
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, *names):
+        plan = self.explain(queryset)
+        self.assertTrue(
+            any(name in plan for name in names),
+            f"esperado um dos índices {', '.join(names)}; plano:\n{plan}",
+        )
+
+    def test_group_reported_matches(self):
+        # compute_group_table
+        group = self.first_group(self.large)
+        self.assertUsesIndex(
+            Match.objects.filter(tournament=self.large, group_id=group.id, status=MatchStatus.REPORTED),
+            "match_t_group_status_idx", "match_reported_idx",
+        )
+
+    def test_group_unnormalized_check(self):
+        group = self.first_group(self.large)
+        self.assertUsesIndex(
+            Match.objects.filter(
+                tournament=self.large, group_id=group.id, status=MatchStatus.REPORTED, normalized_at__isnull=True,
+            ),
+            "match_unnormalized_idx", "match_t_group_status_idx",
+        )
+
+    def test_group_pending_matches(self):
+        # clinch / simulação
+        group = self.first_group(self.large)
+        self.assertUsesIndex(
+            group.matches.filter(tournament=self.large, status=MatchStatus.PENDING),
+            "match_t_group_status_idx",
+        )
+
+    def test_tournament_reported_matches(self):
+        # compute_tournament_tables / checagem do sorteio
+        self.assertUsesIndex(
+            Match.objects.filter(tournament=self.large, status=MatchStatus.REPORTED),
+            "match_reported_idx", "match_t_group_status_idx",
+        )
+
+
+class TiebreakerTests(SimpleTestCase):
+    """Mini-liga (H2H) entre times empatados em pontos: _mini_league_key / _rank_block."""
+
+    def teams(self, *ids, **stats):
+        return {i: TeamAgg(team=Team(id=i, name=f"T{i}"), **{k: v[n] for k, v in stats.items()})
+                for n, i in enumerate(ids)}
+
+    def beat(self, winner, loser):
+        winner.h2h_points[loser.team.id] = winner.h2h_points.get(loser.team.id, 0) + 3
+        loser.h2h_points.setdefault(winner.team.id, 0)
+
+    def rank(self, teams, *tiebreakers):
+        block = sorted(teams.values(), key=lambda a: a.team.id)
+        return [a.team.id for a in _sort_block(block, _tiebreak_plan(tiebreakers))]
+
+    def circular(self, **stats):
+        t = self.teams(1, 2, 3, **stats)
+        self.beat(t[1], t[2])
+        self.beat(t[2], t[3])
+        self.beat(t[3], t[1])
+        return t
+
+    def test_circular_tie_falls_back_to_next_criterion(self):
+        # 3 pontos para cada na mini-liga: H2H não separa ninguém, decide o saldo
+        t = self.circular(round_diff=(3, 1, 5))
+        self.assertEqual(self.rank(t, "H2H", "ROUND_DIFF"), [3, 1, 2])
+
+    def test_circular_tie_without_next_criterion_keeps_team_order(self):
+        t = self.circular(round_diff=(3, 1, 5))
+        self.assertEqual(self.rank(t, "H2H", "EXTRA_MATCH", "ROUND_DIFF"), [1, 2, 3])
+
+    def test_partial_tie_recurses_into_sub_blocks(self):
+        # mini-liga dos 4: A e D com 6, B e C com 3; cada dupla é refeita só entre
+        # as duas (A venceu D, B venceu C), o que inverte a ordem de team_id
+        t = self.teams(1, 2, 3, 4)
+        d, a, c, b = t[1], t[2], t[3], t[4]
+        self.beat(a, b)
+        self.beat(a, d)
+        self.beat(c, a)
+        self.beat(b, c)
+        self.beat(d, b)
+        self.beat(d, c)
+        self.assertEqual(self.rank(t, "H2H"), [2, 1, 4, 3])
+
+    def test_mini_league_ignores_games_outside_the_block(self):
+        # 1 e 2 só pontuaram contra o 9 (fora do bloco): mini-liga zerada, decide WINS
+        t = self.teams(1, 2, wins=(1, 2))
+        t[1].h2h_points[9] = 6
+        self.assertEqual(self.rank(t, "H2H", "WINS"), [2, 1])
+
+    def test_next_criterion_after_partial_h2h(self):
+        # H2H separa o 3 dos demais; 1 e 2 empatam na mini-liga entre eles e caem no saldo
+        t = self.teams(1, 2, 3, round_diff=(1, 4, 0))
+        self.beat(t[3], t[1])
+        self.beat(t[3], t[2])
+        self.assertEqual(self.rank(t, "H2H", "ROUND_DIFF"), [3, 2, 1])
+
+
+@skipUnless(np is not None, "numpy não instalado")
+class ColumnarParityTests(TestCase):
+    def test_columnar_matches_compute_group_table(self):
+        # muitos empates cíclicos e WOs: exercita H2H e todos os critérios de cada modalidade
+        for modality in Modality.values:
+            tournament = create_synthetic_tournament(SyntheticSpec(
+                modality=modality, groups=2, teams_per_group=8, reported=0.8,
+                tie_density=0.6, wo_rate=0.1, seed=7,
+            ))
+            rules = compile_ruleset(tournament.modality, tournament.ruleset)
+            for group in tournament.groups.all():
+                teams = [e.team for e in tournament.enrollments.filter(group=group).select_related("team").order_by("team_id")]
+                matches = list(group.matches.filter(status=MatchStatus.REPORTED))
+                expected = compute_group_table(tournament, group.id)
+                actual = build_group_table_columnar(rules, teams, matches)
+                with self.subTest(modality=modality, group=group.code):
+                    self.assertEqual([a.team.id for a in actual], [a.team.id for a in expected])
+                    self.assertEqual([_stats_from_agg(a) for a in actual], [_stats_from_agg(a) for a in expected])
+
+
+class IncrementalStandingsTests(TestCase):
+    """Reports, correções e reports desfeitos pelo caminho incremental == recálculo completo."""
+
+    def expected(self, tournament, group):
+        table = compute_group_table(tournament, group.id)
+        return [(agg.team.id, pos, _stats_from_agg(agg)) for pos, agg in enumerate(table, start=1)]
+
+    def actual(self, group):
+        return [(r.team_id, r.order_rank, r.stats) for r in Standing.objects.filter(group=group).order_by("order_rank")]
+
+    def test_random_replay_matches_full_recompute(self):
+        for modality in Modality.values:
+            with self.subTest(modality=modality):
+                rng = random.Random(modality)
+                tournament = create_synthetic_tournament(SyntheticSpec(
+                    modality=modality, groups=1, teams_per_group=6, reported=0.5,
+                    tie_density=0.5, wo_rate=0.1, seed=11,
+                ))
+                group = tournament.groups.get()
+                recalc_group_standings(tournament, group)
+                matches = list(group.matches.select_related("tournament", "group").order_by("id"))
+
+                # o recálculo completo não pode ser o caminho usado (só a base do teste)
+                with mock.patch("tournaments.services.recalc.compute_group_table", side_effect=AssertionError):
+                    for step in range(150):
+                        match = rng.choice(matches)
+                        if match.status == MatchStatus.REPORTED and rng.random() < 0.3:
+                            unreport_match(match)
+                        else:  # report novo ou correção
+                            wo = rng.random() < 0.1
+                            winner = rng.choice(("home", "away"))
+                            report_match(match, generate_indices(modality, winner, rng, wo=wo), is_wo=wo)
+                        self.assertEqual(self.actual(group), self.expected(tournament, group), f"passo {step}")
+
+
+class LeaderboardTests(TestCase):
+    def test_group_refresh_then_rank_matches_full_refresh(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=3, teams_per_group=5, reported=0.4, seed=6))
+        recalc_tournament_standings(tournament)
+        rng = random.Random(6)
+        pending = list(tournament.matches.select_related("tournament", "group").filter(status=MatchStatus.PENDING))
+        for match in rng.sample(pending, 8):
+            # cada report: linhas do grupo na transação, posições no commit
+            with self.captureOnCommitCallbacks(execute=True):
+                report_match(match, generate_indices(tournament.modality, rng.choice(("home", "away")), rng))
+        incremental = get_leaderboard(tournament.id)
+        refresh_leaderboard(tournament)
+        self.assertEqual(incremental, get_leaderboard(tournament.id))
+        self.assertEqual([row["rank"] for row in incremental], list(range(1, 16)))
+
+
+@skipUnless(np is not None, "numpy não instalado")
+class SimulationTests(TestCase):
+    def test_plan_without_h2h_skips_matrix(self):
+        # Free Fire não tem H2H: a matriz não muda a ordem e não é montada
+        tournament = create_synthetic_tournament(SyntheticSpec(
+            modality=Modality.FREE_FIRE, groups=1, teams_per_group=12, reported=0.3, seed=3,
+        ))
+        snap = load_snapshot(tournament, tournament.groups.get())
+        rules, plan = _plan(snap)
+        orders = []
+        for with_h2h in (True, False):
+            cols, h2h = sample_columns(snap, 200, np.random.default_rng(0), rules.win, rules.loss, with_h2h)
+            self.assertEqual(h2h is None, not with_h2h)
+            orders.append(rank_samples(plan, cols, h2h))
+        np.testing.assert_array_equal(*orders)
+
+    def test_chunk_size_bounds_h2h_cells(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=40, reported=0.5, seed=3))
+        snap = load_snapshot(tournament, tournament.groups.get())
+        n = chunk_size(snap, with_h2h=True)
+        self.assertLessEqual(n * 40 * 40, CHUNK_CELLS)
+        self.assertLessEqual(n * len(snap.home), CHUNK_CELLS)
+        self.assertGreater(chunk_size(snap, with_h2h=False), n)
+
+    def test_view_accepts_only_fixed_parameters(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, reported=0.5, seed=7))
+        url = f"/api/groups/{tournament.groups.get().id}/simulation/"
+        self.assertEqual(self.client.get(url, {"samples": "50000"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"samples": "999"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"rating_key": "elo2"}).status_code, 400)
+        response = self.client.get(url, {"samples": "1000", "rating_key": "rating"})
+        self.assertEqual((response.status_code, response.json()["samples"]), (200, 1000))
+
+    def test_view_reports_invalid_match_as_conflict(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, reported=0.5, seed=8))
+        group = tournament.groups.get()
+        group.matches.filter(status=MatchStatus.REPORTED).update(indices={"winner": "nobody"}, normalized_at=None)
+        response = self.client.get(f"/api/groups/{group.id}/simulation/", {"samples": "1000"})
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("detail", response.json())
+
+
+class DrawTests(SimpleTestCase):
+    def test_round_robin_pairs_rounds_and_home_balance(self):
+        for n, legs in itertools.product(range(2, 12), (1, 2)):
+            teams = list(range(100, 100 + n))
+            rounds = round_robin(teams, legs)
+            self.assertEqual(len(rounds), legs * (n - 1 if n % 2 == 0 else n), (n, legs))
+            pairs = [pair for games in rounds for pair in games]
+            # todos contra todos: cada par uma vez por turno; no returno, mando invertido
+            self.assertEqual(len(pairs), legs * n * (n - 1) // 2)
+            if legs == 1:
+                self.assertEqual({frozenset(p) for p in pairs}, {frozenset(p) for p in itertools.combinations(teams, 2)})
+            else:
+                self.assertEqual(set(pairs), set(itertools.permutations(teams, 2)))
+            byes = dict.fromkeys(teams, 0)
+            for games in rounds:
+                playing = [t for pair in games for t in pair]
+                self.assertEqual(len(playing), len(set(playing)), (n, legs))  # um jogo por time na rodada
+                for t in set(teams) - set(playing):
+                    byes[t] += 1
+            # nº ímpar: exatamente uma folga por time em cada turno; par: nenhuma
+            self.assertEqual(set(byes.values()), {legs if n % 2 else 0})
+            home = [h for h, _ in pairs]
+            diffs = [home.count(t) - (len(pairs) * 2 // n - home.count(t)) for t in teams]
+            self.assertLessEqual(max(map(abs, diffs)), 1 if legs == 1 else 0, (n, legs))
+
+    def test_round_robin_rejects_other_legs(self):
+        with self.assertRaises(ValueError):
+            round_robin([1, 2, 3], legs=3)
+
+    def test_snake_seeding(self):
+        # rating = id: 9 > 8 > ... > 1; serpentina A B C | C B A | A B C
+        teams = [(tid, float(tid)) for tid in range(1, 10)]
+        groups = assign_groups(teams, 3, DRAW_SNAKE)
+        self.assertEqual(groups, [[9, 4, 3], [8, 5, 2], [7, 6, 1]])
+
+    def test_group_sizes_and_pots(self):
+        teams = [(tid, float(tid % 7)) for tid in range(1, 15)]
+        ranked = [tid for tid, _ in sorted(teams, key=lambda t: (-t[1], t[0]))]
+        for method in DRAW_METHODS:
+            groups = assign_groups(teams, 4, method, random.Random(3))
+            self.assertEqual(sorted(tid for g in groups for tid in g), list(range(1, 15)))
+            self.assertLessEqual(max(map(len, groups)) - min(map(len, groups)), 1, method)
+            if method != DRAW_RANDOM:
+                # cada grupo recebe no máximo um time de cada pote
+                for g in groups:
+                    self.assertEqual(len({ranked.index(tid) // 4 for tid in g}), len(g), method)
+        with self.assertRaises(ValueError):
+            assign_groups(teams, 4, "pots")
+
+
+class QualificationTests(SimpleTestCase):
+    """qualify() sobre tabelas montadas à mão (Free Fire: 1 ponto por vitória, desempate ROUND_WINS)."""
+
+    def tournament(self, advance):
+        return Tournament(id=1, modality=Modality.FREE_FIRE, ruleset=get_ruleset(Modality.FREE_FIRE),
+                          advance_per_group=advance)
+
+    def tables(self, *groups):
+        # groups: por grupo, (wins, losses[, round_wins]) na ordem da tabela; team_id = 10*grupo + posição
+        return {
+            g: [TeamAgg(team=Team(id=10 * g + pos, name=f"G{g}P{pos}"), points=rec[0], wins=rec[0], losses=rec[1],
+                        round_wins=rec[2] if len(rec) > 2 else 0)
+                for pos, rec in enumerate(records, start=1)]
+            for g, records in enumerate(groups, start=1)
+        }
+
+    def test_bracket_order(self):
+        self.assertEqual(bracket_order(2), [1, 2])
+        self.assertEqual(bracket_order(4), [1, 4, 2, 3])
+        self.assertEqual(bracket_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+
+    def test_cross_group_normalizes_by_matches_played(self):
+        # grupos de 8, 5 e 8 times: o 2º do grupo 2 (3-1) tem menos vitórias que o do grupo 1 (4-3),
+        # mas aproveitamento melhor por partida
+        tables = self.tables([(6, 1), (4, 3)], [(4, 0), (3, 1)], [(5, 2), (3, 4)])
+        result = qualify(self.tournament(1), tables, bracket_size=4)
+        self.assertEqual([q.team_id for q in result.qualified], [21, 11, 31, 22])
+        self.assertEqual([q.direct for q in result.qualified], [True, True, True, False])
+        self.assertFalse(result.cutoff_tied)
+
+    def test_extra_slots_filled_position_by_position(self):
+        # chave de 8: 3 primeiros, 3 segundos e os 2 melhores terceiros
+        tables = self.tables(
+            [(4, 0), (3, 1), (2, 2, 9)],
+            [(4, 0), (3, 1), (2, 2, 7)],
+            [(4, 0), (3, 1), (2, 2, 8), (0, 4)],
+        )
+        result = qualify(self.tournament(1), tables, bracket_size=8)
+        self.assertEqual([q.position for q in result.qualified], [1, 1, 1, 2, 2, 2, 3, 3])
+        self.assertEqual([q.team_id for q in result.qualified][-2:], [13, 33])
+        self.assertFalse(result.cutoff_tied)
+
+    def test_cutoff_tied(self):
+        tables = self.tables([(3, 0), (2, 1, 5)], [(3, 0), (2, 1, 5)], [(3, 0), (2, 1, 4)])
+        result = qualify(self.tournament(1), tables, bracket_size=4)
+        # 12 e 22 empatam em tudo: fica o de menor team_id, e a chave avisa
+        self.assertEqual(result.qualified[-1].team_id, 12)
+        self.assertTrue(result.cutoff_tied)
+
+    def test_same_group_first_round_is_swapped(self):
+        # seeds 1 e 4 são do grupo 1: (1, 4), (2, 3) vira (1, 3), (2, 4)
+        tables = self.tables([(3, 0), (1, 2)], [(2, 1), (2, 1)])
+        result = qualify(self.tournament(2), tables, bracket_size=4)
+        self.assertEqual([(a.team_id, b.team_id) for a, b in result.bracket], [(11, 22), (21, 12)])
+        self.assertEqual(result.group_clashes, 0)
+
+    def test_unresolved_clash_is_reported(self):
+        # um grupo só: não há troca possível
+        result = qualify(self.tournament(2), self.tables([(1, 0), (0, 1)]), bracket_size=2)
+        self.assertEqual(result.group_clashes, 1)
+
+    def test_invalid_bracket_size(self):
+        tables = self.tables([(2, 0), (1, 1), (0, 2)], [(2, 0), (1, 1), (0, 2)], [(2, 0), (1, 1), (0, 2)])
+        for size in (1, 6, 4):  # não é potência de 2 / não cabe os 6 diretos
+            with self.assertRaises(ValueError):
+                qualify(self.tournament(2), tables, bracket_size=size)
+
+
+class SchedulingTests(SimpleTestCase):
+    START = datetime(2025, 9, 1, 10, 0, tzinfo=dt_timezone.utc)
+
+    def items(self, seed, n=300):
+        rng = random.Random(seed)
+        return [(*rng.sample(range(24), 2), rng.choice((1, 2, 5))) for _ in range(n)]
+
+    def assertConstraints(self, items, starts, calendar, capacity, rest, window=None):
+        load = {}
+        played = {}
+        for (home, away, length), slot in zip(items, starts):
+            begin = calendar.to_datetime(slot)
+            end = begin + length * calendar.base
+            for s in range(slot, slot + length):
+                load[s] = load.get(s, 0) + 1
+            if window:
+                self.assertGreaterEqual(begin.time(), window[0])
+                self.assertLessEqual((end - timedelta(microseconds=1)).time(), window[1])
+                self.assertEqual(begin.date(), (end - timedelta(microseconds=1)).date())
+            for team in (home, away):
+                played.setdefault(team, []).append((begin, end))
+        self.assertLessEqual(max(load.values()), capacity)
+        for games in played.values():
+            games.sort()
+            for (_, end), (begin, _) in zip(games, games[1:]):
+                self.assertGreaterEqual(begin - end, timedelta(minutes=rest))
+
+    def test_capacity_and_rest(self):
+        calendar = _Calendar(self.START, 30, None, None)
+        items = self.items(1)
+        starts = assign_slots(items, 3, calendar, rest=60)
+        self.assertConstraints(items, starts, calendar, 3, 60)
+
+    def test_daily_window(self):
+        window = (time(10), time(22))
+        calendar = _Calendar(self.START, 30, *window)
+        items = self.items(2)
+        starts = assign_slots(items, 4, calendar, rest=90)
+        self.assertConstraints(items, starts, calendar, 4, 90, window)
+
+    def test_overnight_gap_counts_as_rest(self):
+        # janela de 2h: quem termina às 12:00 volta às 10:00 do dia seguinte (22h depois)
+        calendar = _Calendar(self.START, 30, time(10), time(12))
+        starts = assign_slots([(1, 2, 4), (1, 3, 1)], 10, calendar, rest=600)
+        self.assertEqual(calendar.to_datetime(starts[1]), self.START + timedelta(days=1))
+        # dentro da janela, o descanso conta normalmente (10:30 + 1h)
+        starts = assign_slots([(1, 2, 1), (1, 3, 1)], 10, calendar, rest=60)
+        self.assertEqual(calendar.to_datetime(starts[1]), self.START + timedelta(minutes=90))
+
+
+class ClinchSolverTests(TestCase):
+    """Veredito do solver contra força bruta: todos os resultados das pendentes, placares sorteados."""
+
+    def outcome_positions(self, tournament, group, rng, samples=2):
+        rules = compile_ruleset(tournament.modality, tournament.ruleset)
+        base = sorted(compute_group_table(tournament, group.id), key=lambda a: a.team.id)
+        pending = list(group.matches.filter(status=MatchStatus.PENDING).order_by("id"))
+        for winners in itertools.product(("home", "away"), repeat=len(pending)):
+            for _ in range(samples):
+                aggs = {a.team.id: replace(a, h2h_points=dict(a.h2h_points)) for a in base}
+                for match, winner in zip(pending, winners):
+                    played = report_match(
+                        copy.copy(match), generate_indices(tournament.modality, winner, rng), rules=rules, save=False,
+                    )
+                    for team_id, delta in match_contribution(rules, played).items():
+                        merge_agg(aggs[team_id], delta)
+                yield {a.team.id: pos for pos, a in enumerate(rank_aggs(rules, aggs), start=1)}
+
+    def assertVerdictsHold(self, tournament, seed):
+        group = tournament.groups.get()
+        result = clinch_status(tournament, group)
+        k = tournament.advance_per_group
+        for positions in self.outcome_positions(tournament, group, random.Random(seed)):
+            for team_id, pos in positions.items():
+                if result.status[team_id] == CLINCHED:
+                    self.assertLessEqual(pos, k, f"seed {seed}: time {team_id} dado como classificado")
+                elif result.status[team_id] == ELIMINATED:
+                    self.assertGreater(pos, k, f"seed {seed}: time {team_id} dado como eliminado")
+        return result
+
+    def test_verdicts_hold_in_every_outcome(self):
+        plans = [None, ["ROUND_DIFF", "H2H"], ["H2H", "MAP_DIFF", "WINS"]]
+        decided = 0
+        cases = itertools.product((Modality.VALORANT, Modality.LOL, Modality.FREE_FIRE), range(len(plans)), range(8))
+        for modality, plan, seed in cases:
+            tournament = create_synthetic_tournament(SyntheticSpec(
+                modality=modality, groups=1, teams_per_group=4 + seed % 2, reported=(0.6, 1.0)[seed % 2],
+                tie_density=0.4, wo_rate=0.1, seed=seed,
+            ), name=f"clinch {modality} {plan} {seed}")
+            tournament.advance_per_group = 1 + seed // 2 % 2
+            if plans[plan] is not None:
+                tournament.ruleset = {**tournament.ruleset, "tiebreakers": plans[plan]}
+            tournament.save()
+            result = self.assertVerdictsHold(tournament, seed)
+            decided += sum(status != ALIVE for status in result.status.values())
+        self.assertGreater(decided, 0)
+
+    def test_finished_group_tiebreak_uses_reported_scores(self):
+        # C/A/B com 1 ponto cada, separados por rounds vencidos (7/6/4)
+        tournament = create_synthetic_tournament(SyntheticSpec(
+            modality=Modality.FREE_FIRE, groups=1, teams_per_group=3, reported=0, seed=1,
+        ))
+        tournament.advance_per_group = 1
+        tournament.save()
+        group = tournament.groups.get()
+        a, b, c = (e.team for e in group.enrollments.order_by("team_id").select_related("team"))
+        results = {frozenset((a.id, b.id)): (a, 0), frozenset((b.id, c.id)): (b, 3), frozenset((c.id, a.id)): (c, 2)}
+        for match in group.matches.select_related("tournament", "group"):
+            winner, loser_rounds = results[frozenset((match.home_team_id, match.away_team_id))]
+            side = "home" if match.home_team_id == winner.id else "away"
+            other = "away" if side == "home" else "home"
+            report_match(match, {"winner": side, "roundWins": {side: 4, other: loser_rounds}})
+        result = clinch_status(tournament, group)
+        self.assertTrue(result.exact)
+        self.assertEqual(result.status, {a.id: ELIMINATED, b.id: ELIMINATED, c.id: CLINCHED})
+
+
+class ClinchViewTests(TestCase):
+    """A view só lê o cache; o cálculo roda no agendador depois do commit."""
+
+    def setUp(self):
+        cache.clear()
+        reset_cache()
+        self.tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, reported=0.5, seed=2))
+        self.group = self.tournament.groups.get()
+        self.url = f"/api/groups/{self.group.id}/clinch/"
+        patcher = mock.patch("tournaments.services.scheduler.enqueue_group_clinch")
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_view_never_computes(self):
+        with mock.patch("tournaments.services.clinch.clinch_status", side_effect=AssertionError("calculou no GET")):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"pending": True})
+        self.enqueue.assert_called_once_with(self.group.id)
+
+        refresh_group_clinch(self.tournament, self.group)
+        with mock.patch("tournaments.services.clinch.clinch_status", side_effect=AssertionError("calculou no GET")):
+            fresh = self.client.get(self.url)
+            self.assertFalse(fresh.json()["stale"])
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=fresh["ETag"]).status_code, 304)
+
+            # nova versão ainda não calculada: último resultado, sem ETag
+            bump_group_version(self.group.id)
+            reset_cache()
+            stale = self.client.get(self.url)
+        self.assertEqual(stale.status_code, 200)
+        self.assertTrue(stale.json()["stale"])
+        self.assertNotIn("ETag", stale)
+        self.assertEqual(stale.json()["teams"], fresh.json()["teams"])
+        self.assertEqual(self.enqueue.call_count, 2)
+
+    @override_settings(TOURNAMENTS_CLINCH={"PRECOMPUTE": True})
+    def test_recalc_schedules_clinch_after_commit(self):
+        # comandos (fora do servidor) não agendam
+        with self.captureOnCommitCallbacks(execute=True):
+            recalc_group_standings(self.tournament, self.group)
+        self.enqueue.assert_not_called()
+
+        with mock.patch("tournaments.services.clinch._serving", True):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                recalc_group_standings(self.tournament, self.group)
+            self.enqueue.assert_not_called()
+            for callback in callbacks:
+                callback()
+        self.enqueue.assert_called_once_with(self.group.id)
+
+    @mock.patch("tournaments.services.scheduler.close_old_connections")
+    def test_one_clinch_run_per_group(self, _):
+        with mock.patch("tournaments.services.clinch.clinch_status", wraps=clinch_status) as solver:
+            with group_lock(self.group.id, _CLINCH_LOCK_NAMESPACE):
+                self.assertFalse(clinch_group_now(self.group.id))  # outro processo calculando
+            self.assertTrue(clinch_group_now(self.group.id))
+            reset_cache()
+            self.assertTrue(clinch_group_now(self.group.id))  # versão já no cache compartilhado
+        self.assertEqual(solver.call_count, 1)
+
+
+class TableCacheTests(TestCase):
+    def test_local_entries_expire(self):
+        lru = _LocalLRU(max_bytes=1024, ttl=5)
+        with mock.patch("tournaments.services.cache.time.monotonic", return_value=100.0):
+            lru.set("k", [1], 3)
+            self.assertEqual(lru.get("k"), [1])
+        with mock.patch("tournaments.services.cache.time.monotonic", return_value=105.0):
+            self.assertIsNone(lru.get("k"))
+        self.assertEqual((len(lru), lru.size), (0, 0))
+
+    def test_compiled_ruleset_memoized_on_instance(self):
+        created = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, reported=0, seed=7))
+        tournament = Tournament.objects.get(pk=created.pk)  # ruleset decodificado do banco, não o preset
+        rules = compile_tournament_ruleset(tournament)
+        with mock.patch("tournaments.services.ranking.json.dumps") as dumps:
+            self.assertIs(compile_tournament_ruleset(tournament), rules)
+        dumps.assert_not_called()
+        # alteração in-place só é vista no save; um ruleset novo, na hora
+        tournament.ruleset["tiebreakers"] = ["WINS"]
+        tournament.save()
+        self.assertEqual(compile_tournament_ruleset(tournament).tiebreakers, ("WINS",))
+        tournament.ruleset = {**tournament.ruleset, "tiebreakers": ["H2H"]}
+        self.assertEqual(compile_tournament_ruleset(tournament).tiebreakers, ("H2H",))
+
+    def test_match_moved_between_groups_bumps_both(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=2, teams_per_group=4, seed=5))
+        old, new = tournament.groups.order_by("code")
+        match = Match.objects.get(pk=old.matches.values_list("pk", flat=True).first())
+        before = {g.id: group_version(tournament.id, g.id) for g in (old, new)}
+        with self.captureOnCommitCallbacks(execute=True):
+            match.group = new
+            match.save()
+        after = {g.id: group_version(tournament.id, g.id) for g in (old, new)}
+        self.assertNotEqual(after[old.id], before[old.id])
+        self.assertNotEqual(after[new.id], before[new.id])
+
+
+    def test_team_rename_refreshes_group_payloads(self):
+        cache.clear()
+        reset_cache()
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=2, teams_per_group=4, reported=0.5, seed=6))
+        recalc_tournament_standings(tournament)
+        group = tournament.groups.order_by("code").first()
+        url = f"/api/groups/{group.id}/standings/"
+        etag = self.client.get(url)["ETag"]
+        team = Team.objects.get(pk=group.enrollments.values_list("team_id", flat=True).first())
+        with self.captureOnCommitCallbacks(execute=True):
+            team.name = "Renomeado"
+            team.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Renomeado", [row["team"] for row in response.json()])
+
+    def test_group_code_change_refreshes_tournament_detail(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=2, teams_per_group=4, seed=6))
+        url = f"/api/tournaments/{tournament.id}/"
+        etag = self.client.get(url)["ETag"]
+        group = tournament.groups.order_by("code").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            group.code = "Z"
+            group.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Z", [g["code"] for g in response.json()["groups"]])
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin")
+        cls.tournament = create_synthetic_tournament(SyntheticSpec(groups=2, teams_per_group=4, reported=0.5, seed=3))
+        recalc_tournament_standings(cls.tournament)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.match = self.tournament.matches.filter(status=MatchStatus.PENDING).order_by("id").first()
+
+    def change(self, match, **fields):
+        data = {
+            "tournament": match.tournament_id, "group": match.group_id,
+            "home_team": match.home_team_id, "away_team": match.away_team_id,
+            "scheduled_at_0": "", "scheduled_at_1": "", "round_number": match.round_number or "",
+            "status": match.status, "result": "{}", "indices": "{}", "winner_side": "",
+            "home_rounds": 0, "away_rounds": 0, "home_maps": 0, "away_maps": 0,
+            "win_duration_sec": "", "normalized_at_0": "", "normalized_at_1": "",
+        }
+        data.update(fields)
+        return self.client.post(f"/admin/tournaments/match/{match.pk}/change/", data)
+
+    def test_invalid_indices_is_form_error(self):
+        response = self.change(self.match, status=MatchStatus.REPORTED, indices='{"winner": "nobody"}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("indices", response.context["adminform"].form.errors)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.status, MatchStatus.PENDING)
+
+    def test_valid_report_updates_standings(self):
+        indices = generate_indices(self.tournament.modality, "home", random.Random(3))
+        response = self.change(self.match, status=MatchStatus.REPORTED, indices=json.dumps(indices))
+        self.assertEqual(response.status_code, 302)
+        group = self.match.group
+        expected = [agg.team.id for agg in compute_group_table(self.tournament, group.id)]
+        self.assertEqual(list(group.standings.order_by("order_rank").values_list("team_id", flat=True)), expected)
+
+    def test_tournament_recalc_reports_invalid_match(self):
+        self.tournament.matches.filter(status=MatchStatus.REPORTED).update(indices={"winner": "nobody"}, normalized_at=None)
+        response = self.client.post(
+            "/admin/tournaments/tournament/",
+            {"action": "recalc_standings", "_selected_action": [self.tournament.pk]},
+            follow=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        levels = [m.level_tag for m in response.context["messages"]]
+        self.assertIn("error", levels)
+
+    def test_group_filters_by_tournament_and_modality(self):
+        for query in ({"tournament__id__exact": self.tournament.pk}, {"tournament__modality": self.tournament.modality}):
+            response = self.client.get("/admin/tournaments/group/", query)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context["cl"].result_count, 2)
+
+
+class SchemaTests(TestCase):
+    SCHEMA = {
+        "mode": {"type": "str", "enum": ["MD1", "MD3"], "required": True},
+        "maps": {"type": "list", "min": 1, "max": 3},
+        "score": {"type": "int", "min": 0, "max": 13},
+        "format": {"enum": [1, True]},
+    }
+
+    def codes(self, indices):
+        return [(e.field, e.code) for e in compile_schema(self.SCHEMA)(indices)]
+
+    def test_error_codes(self):
+        self.assertEqual(self.codes({"mode": "MD3"}), [])
+        self.assertEqual(self.codes({}), [("mode", "required")])
+        self.assertEqual(self.codes({"mode": None}), [("mode", "required")])
+        self.assertEqual(self.codes({"mode": 3}), [("mode", "type")])
+        self.assertEqual(self.codes({"mode": "MD5"}), [("mode", "enum")])
+        self.assertEqual(self.codes({"mode": "MD1", "maps": []}), [("maps", "min")])
+        self.assertEqual(self.codes({"mode": "MD1", "maps": ["a", "b", "c", "d"]}), [("maps", "max")])
+        self.assertEqual(self.codes({"mode": "MD1", "score": -1}), [("score", "min")])
+        self.assertEqual(self.codes({"mode": "MD1", "score": 14}), [("score", "max")])
+        self.assertEqual(self.codes({"mode": "MD1", "score": True}), [("score", "type")])
+        # enum não-texto compara pela forma JSON: 1 != true
+        self.assertEqual(self.codes({"mode": "MD1", "format": 1}), [])
+        self.assertEqual(self.codes({"mode": "MD1", "format": "1"}), [("format", "enum")])
+        self.assertEqual(self.codes([]), [("", "type")])
+
+    def test_undeclared_fields_are_accepted(self):
+        # não existe código "unknown": o Valorant reporta "winner" sem declarar no schema
+        self.assertEqual(self.codes({"mode": "MD1", "winner": "home", "extra": [1]}), [])
+
+    def test_invalid_schema_is_value_error(self):
+        for schema in ({"a": {"type": "float"}}, {"a": {"typ": "str"}}, {"a": {"type": "int", "min": 2, "max": 1}},
+                       {"a": {"type": "bool", "max": 1}}, {"a": {"enum": []}}, {"a": "str"}):
+            with self.assertRaises(ValueError):
+                compile_schema(schema)
+
+    def test_validate_batch_indexes_errors(self):
+        errors = validate_batch(compile_schema(self.SCHEMA), [{"mode": "MD1"}, {"mode": "X", "score": 99}, None])
+        self.assertEqual(errors, [
+            {"index": 1, "field": "mode", "code": "enum", "message": "mode deve ser um de MD1, MD3"},
+            {"index": 1, "field": "score", "code": "max", "message": "score deve ser <= 13"},
+            {"index": 2, "field": "", "code": "type", "message": "indices deve ser um objeto"},
+        ])
+
+    def test_validate_tournament_reports_shape(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, seed=4))
+        self.assertEqual(validate_tournament_reports(tournament), [])
+        bad = tournament.matches.order_by("id")[1]
+        Match.objects.filter(pk=bad.pk).update(indices={"mode": "MD5", "maps": ["Ascent"], "rounds": [{}]})
+        errors = validate_tournament_reports(tournament)
+        self.assertEqual(errors, [{"field": "mode", "code": "enum", "message": "mode deve ser um de MD1, MD3",
+                                   "match_id": bad.pk}])
+
+
+class ReportBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, reported=0, seed=9))
+        cls.match = cls.tournament.matches.order_by("id").first()
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+        cls.staff.user_permissions.add(Permission.objects.get(codename="change_match"))
+
+    def post(self, reports, user=None):
+        if user is not None:
+            self.client.force_login(user)
+        return self.client.post("/api/matches/report/batch", {"reports": reports}, content_type="application/json")
+
+    def test_requires_staff_with_change_permission(self):
+        self.assertIn(self.post([]).status_code, (401, 403))
+        plain = User.objects.create_user("plain", is_staff=True)
+        self.assertEqual(self.post([], user=plain).status_code, 403)
+        self.assertEqual(self.post([], user=self.staff).status_code, 200)
+
+    def test_rejects_non_int_match_id_and_non_bool_is_wo(self):
+        indices = generate_indices(self.tournament.modality, "home", random.Random(0))
+        response = self.post([
+            {"match_id": True, "indices": indices},
+            {"match_id": [self.match.id], "indices": indices},
+            {"match_id": {"id": 1}, "indices": indices},
+            {"match_id": str(self.match.id), "indices": indices},
+            {"match_id": self.match.id, "indices": indices, "is_wo": "false"},
+            {"match_id": self.match.id + 1, "indices": indices, "is_wo": False},
+        ], user=self.staff)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["updated"], 1)
+        self.assertEqual([e["index"] for e in body["errors"]], [0, 1, 2, 3, 4])
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.status, MatchStatus.PENDING)
+
+
+class ImportTests(TestCase):
+    def test_ndjson_non_object_lines_are_line_errors(self):
+        lines = ['5', '[1]', '"x"', 'null', '{"type": "team", "name": ["A"]}', '{bad', '{"type": "team", "name": "Ok"}']
+        result = import_records(lines, "ndjson")
+        self.assertEqual((result.read, result.skipped, result.written["team"]), (7, 6, 1))
+        self.assertEqual([e["line"] for e in result.errors], [1, 2, 3, 4, 5, 6])
+        self.assertTrue(Team.objects.filter(name="Ok").exists())
+
+    def test_values_over_max_length_are_line_errors(self):
+        t = create_synthetic_tournament(SyntheticSpec(modality=Modality.LOL, groups=1, teams_per_group=2))
+        lines = [
+            json.dumps({"type": "team", "name": "X" * 121}),
+            json.dumps({"type": "team", "name": "Curto"}),
+            json.dumps({"type": "enrollment", "tournament_id": t.id, "team": "Curto", "group": "GRUPO"}),
+        ]
+        result = import_records(lines, "ndjson")
+        self.assertEqual((result.written["team"], result.written["enrollment"], result.skipped), (1, 0, 2))
+        self.assertEqual([e["line"] for e in result.errors], [1, 3])
+        self.assertIn("name (máx. 120)", result.errors[0]["error"])
+        self.assertIn("group (máx. 4)", result.errors[1]["error"])
+
+    def test_command_strips_utf8_bom(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8-sig", delete=False) as f:
+            f.write("name\nComBOM\n")
+        self.addCleanup(os.remove, f.name)
+        call_command("import_data", f.name, kind="team", stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(Team.objects.filter(name="ComBOM").exists())
+
+
+@override_settings(TOURNAMENTS_LIVE_SHARED=True)
+class SharedLiveTests(TestCase):
+    """Diffs publicados num processo sem conexões chegam ao relay dos outros pelo cache."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_recalc_elsewhere_reaches_relay(self):
+        tournament = create_synthetic_tournament(SyntheticSpec(groups=1, teams_per_group=4, reported=0.5, seed=4))
+        group = tournament.groups.get()
+        channel = live.group_channel(group.id)
+        self.assertFalse(live.is_watched(tournament.id, group.id))
+
+        # um processo ASGI marcou o canal como assistido
+        cache.set(live._WATCH.format(channel), 1, live.WATCH_TTL)
+        self.assertTrue(live.is_watched(tournament.id, group.id))
+        seq, _ = asyncio.run(live.pull_events(0))
+
+        match = group.matches.select_related("tournament", "group").filter(status=MatchStatus.PENDING).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            report_match(match, generate_indices(tournament.modality, "home", random.Random(1)))
+
+        # o próprio processo não reentrega o evento; outro processo recebe
+        self.assertEqual(asyncio.run(live.pull_events(seq))[1], [])
+        with mock.patch.object(live, "_ORIGIN", "other"):
+            _, events = asyncio.run(live.pull_events(seq))
+        self.assertEqual(len(events), 1)
+        channels, frame = events[0]
+        self.assertIn(channel, channels)
+        self.assertTrue(frame.startswith(b"event: standings"))
+
+    def test_lost_event_becomes_resync(self):
+        cache.set(live._SEQ, 3, None)
+        _, events = asyncio.run(live.pull_events(1))
+        self.assertEqual([frame for _, frame in events], [live.RESYNC_FRAME])
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.set_enabled(True)
+        metrics.reset_metrics()
+        self.addCleanup(metrics.set_enabled, None)
+        self.addCleanup(metrics.reset_metrics)
+
+    def observed(self, name, route):
+        # [nº de observações, soma] da rota
+        return next(
+            ([sum(buckets), total] for labels, (buckets, total) in metrics._series[name].items()
+             if dict(labels)["route"] == route),
+            [0, 0],
+        )
+
+    async def test_async_requests_record_db_queries(self):
+        # pelo handler ASGI (AsyncClient): view síncrona com queries no banco
+        response = await self.async_client.get("/api/tournaments/")
+        self.assertEqual(response.status_code, 200)
+        count, queries = self.observed(metrics.REQUEST_QUERIES, "api/tournaments/")
+        self.assertEqual(count, 1)
+        self.assertGreaterEqual(queries, 1)
+        self.assertEqual(self.observed(metrics.REQUEST_DB_SECONDS, "api/tournaments/")[0], 1)
+
+
+class MigrationTests(TestCase):
+    def test_no_missing_migrations(self):
+        # índice/campo novo no modelo sem migração quebra aqui, não no deploy
+        call_command("makemigrations", "tournaments", check=True, dry_run=True, stdout=StringIO())
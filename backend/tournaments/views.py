@@ -1,3 +1,103 @@
-from django.shortcuts import render
+from __future__ import annotations
+from django.db.models import Prefetch
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 
-# Create your views here.
+from .models import Enrollment, Group, Match, MatchStatus, Standing, Tournament
+from .pagination import KeysetPagination
+from .serializers import (
+    EnrollmentSerializer,
+    GroupSerializer,
+    MatchSerializer,
+    StandingSerializer,
+    TournamentSerializer,
+)
+
+# API REST de leitura (listas paginadas por keyset).
+#
+# Cada view carrega os relacionamentos que o serializer usa com select_related/
+# prefetch_related, então uma página custa um número fixo de queries, e ordena
+# por `keyset` alinhado a um índice existente (ver pagination.py).
+
+GROUP_PARAM = OpenApiParameter("group", OpenApiTypes.INT, description="Filtra por grupo")
+
+
+def _int_param(request, name):
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        return None
+    if not raw.isdigit():
+        raise ValidationError({name: "deve ser um inteiro"})
+    return int(raw)
+
+
+class _KeysetList(generics.ListAPIView):
+    pagination_class = KeysetPagination
+    keyset: tuple = ("id",)
+
+
+class TournamentList(_KeysetList):
+    serializer_class = TournamentSerializer
+    keyset = ("-id",)  # mesma ordem do Meta.ordering, pela PK
+
+    def get_queryset(self):
+        return Tournament.objects.prefetch_related(
+            Prefetch("groups", queryset=Group.objects.only("id", "code", "tournament_id").order_by("code"))
+        )
+
+
+class _TournamentScoped(_KeysetList):
+    """Listas de um torneio; `?group=` restringe a um grupo."""
+
+    def scoped(self, queryset):
+        queryset = queryset.filter(tournament_id=self.kwargs["tournament_id"])
+        group_id = _int_param(self.request, "group")
+        if group_id is not None:
+            queryset = queryset.filter(group_id=group_id)
+        return queryset
+
+
+class GroupList(_KeysetList):
+    serializer_class = GroupSerializer
+    keyset = ("code", "id")  # unique (tournament, code)
+
+    def get_queryset(self):
+        return Group.objects.filter(tournament_id=self.kwargs["tournament_id"])
+
+
+@extend_schema(parameters=[GROUP_PARAM])
+class EnrollmentList(_TournamentScoped):
+    serializer_class = EnrollmentSerializer
+    keyset = ("group_id", "id")  # índice (tournament, group)
+
+    def get_queryset(self):
+        return self.scoped(Enrollment.objects.select_related("team", "group"))
+
+
+@extend_schema(parameters=[
+    GROUP_PARAM,
+    OpenApiParameter("status", OpenApiTypes.STR, enum=MatchStatus.values, description="Filtra por status"),
+])
+class MatchList(_TournamentScoped):
+    serializer_class = MatchSerializer
+    keyset = ("group_id", "id")  # índice (tournament, group)
+
+    def get_queryset(self):
+        queryset = self.scoped(Match.objects.select_related("group", "home_team", "away_team"))
+        status = self.request.query_params.get("status")
+        if status:
+            if status not in MatchStatus.values:
+                raise ValidationError({"status": f"use um de {', '.join(MatchStatus.values)}"})
+            queryset = queryset.filter(status=status)
+        return queryset
+
+
+@extend_schema(parameters=[GROUP_PARAM])
+class StandingList(_TournamentScoped):
+    serializer_class = StandingSerializer
+    keyset = ("group_id", "order_rank", "id")  # índice (group, order_rank)
+
+    def get_queryset(self):
+        return self.scoped(Standing.objects.select_related("team", "group"))